@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк NotionArticleFinder на синтетической нагрузке.
+
+Поднимает локальный stub-сервер Notion API, для каждого размера базы
+запускает поиск, извлечение и экспорт в CSV в отдельном процессе и
+измеряет время этапов, скорость (страниц/с) и пиковое потребление памяти.
+Результаты сохраняются в JSON для сравнения между версиями.
+
+Запуск из корня репозитория:
+    python3 -m benchmarks.bench_finder --sizes 1000 10000 100000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+from notion_article_finder import NotionArticleFinder
+from notion_transport import NotionTransport
+
+
+START_DATE = "2024-01-01"
+END_DATE = "2024-12-31"
+
+
+def peak_rss_mb() -> float:
+    """Пиковый RSS текущего процесса в мегабайтах"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # На macOS ru_maxrss в байтах, на Linux - в килобайтах
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(base_url: str, mode: str, output_file: str, result_queue):
+    """
+    Один прогон в отдельном процессе (чтобы пиковый RSS относился только к нему)
+
+    Args:
+        base_url: Адрес stub-сервера
+        mode: batch (поиск -> извлечение -> запись) или stream (потоковая выгрузка)
+        output_file: Путь к CSV
+        result_queue: Очередь для передачи результата в родительский процесс
+    """
+    transport = NotionTransport("bench-token", base_url=base_url, backoff_base=0.05)
+    finder = NotionArticleFinder("bench-token", "bench-db", transport=transport)
+    result: Dict[str, Any] = {"mode": mode}
+
+    started = time.perf_counter()
+    finder.resolve_extractor()
+
+    if mode == "stream":
+        count = finder.save_articles_stream(
+            finder.iter_articles_info(finder.iter_articles_by_date(START_DATE, END_DATE)), output_file
+        )
+        result["pages"] = count
+    else:
+        search_started = time.perf_counter()
+        articles = finder.search_articles_by_date(START_DATE, END_DATE)
+        result["search_seconds"] = time.perf_counter() - search_started
+        result["pages"] = len(articles)
+
+        extract_started = time.perf_counter()
+        articles_info = finder.extract_articles_info(articles)
+        result["extract_seconds"] = time.perf_counter() - extract_started
+
+        export_started = time.perf_counter()
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                finder.save_articles_to_file(articles_info, output_file)
+            finally:
+                sys.stdout = stdout
+        result["export_seconds"] = time.perf_counter() - export_started
+
+    result["total_seconds"] = time.perf_counter() - started
+    result["pages_per_sec"] = result["pages"] / result["total_seconds"] if result["total_seconds"] else 0.0
+    result["peak_rss_mb"] = peak_rss_mb()
+    transport.close()
+    result_queue.put(result)
+
+
+def run_size(size: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Прогон всех режимов для базы заданного размера"""
+    database = SyntheticDatabase(size, start_date=START_DATE, days=365,
+                                 title_segments=args.title_segments, url_type=args.url_type,
+                                 extra_properties=args.extra_properties)
+    results = []
+    context = multiprocessing.get_context("spawn")
+
+    with StubNotionServer(database, latency=args.latency, throttle_rate=args.throttle_rate) as server:
+        for mode in args.modes:
+            before = requests.get(f"{server.base_url}/__stats").json()
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                result_queue = context.Queue()
+                process = context.Process(target=measure, args=(
+                    server.base_url, mode, os.path.join(tmp_dir, "bench.csv"), result_queue
+                ))
+                process.start()
+                result = result_queue.get()
+                process.join()
+            after = requests.get(f"{server.base_url}/__stats").json()
+
+            result["size"] = size
+            result["requests"] = after["requests"] - before["requests"]
+            result["throttled"] = after["throttled"] - before["throttled"]
+            result["bytes_received"] = after["bytes_sent"] - before["bytes_sent"]
+            results.append(result)
+            print(f"{size:>8} {mode:<7} {result['total_seconds']:>8.2f} с "
+                  f"{result['pages_per_sec']:>10.0f} стр/с {result['peak_rss_mb']:>8.1f} МБ "
+                  f"запросов: {result['requests']} (429: {result['throttled']})")
+
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Текущий коммит репозитория (если доступен)"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_file: str):
+    """Сравнение скорости с предыдущим прогоном"""
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = {(r["size"], r["mode"]): r for r in json.load(f)["results"]}
+
+    print(f"\nСравнение с {baseline_file}:")
+    for result in results:
+        previous = baseline.get((result["size"], result["mode"]))
+        if not previous or not previous["pages_per_sec"]:
+            continue
+        change = (result["pages_per_sec"] / previous["pages_per_sec"] - 1) * 100
+        print(f"{result['size']:>8} {result['mode']:<7} {change:+.1f}% стр/с, "
+              f"память {previous['peak_rss_mb']:.1f} -> {result['peak_rss_mb']:.1f} МБ")
+
+
+def main():
+    """Главная функция бенчмарка"""
+    parser = argparse.ArgumentParser(description="Бенчмарк Notion Article Finder на stub-сервере")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Размеры базы (по умолчанию: 1000 10000 100000)")
+    parser.add_argument("--modes", nargs="+", choices=("batch", "stream"), default=["batch", "stream"],
+                        help="Режимы выгрузки")
+    parser.add_argument("--title-segments", type=int, default=1, help="Сегментов rich text в названии")
+    parser.add_argument("--url-type", choices=("url", "rich_text"), default="url", help="Тип поля URL")
+    parser.add_argument("--extra-properties", type=int, default=0,
+                        help="Дополнительных текстовых полей в каждой странице")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа сервера в секундах")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Доля ответов 429")
+    parser.add_argument("--output", default="bench_results.json", help="Файл для результатов (JSON)")
+    parser.add_argument("--compare", help="Файл результатов предыдущего прогона для сравнения")
+    args = parser.parse_args()
+
+    print(f"{'страниц':>8} {'режим':<7} {'время':>10} {'скорость':>15} {'память':>11}")
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args))
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены в {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
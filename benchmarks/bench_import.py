@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк времени импорта модулей командной строки.
+
+Каждый модуль импортируется в отдельном процессе с `python -X importtime`,
+из вывода берется накопленное время импорта самого модуля (без site и
+sitecustomize) и самые дорогие зависимости. Проверяется, что тяжелые
+сетевые модули (requests и др.) не загружаются при импорте, и что время
+укладывается в бюджет (его проверяет test_unified.py).
+
+Запуск из корня репозитория:
+    python3 -m benchmarks.bench_import
+    python3 -m benchmarks.bench_import --modules notion_article_finder --runs 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Бюджет времени импорта в миллисекундах (до отложенного импорта requests
+# notion_article_finder импортировался ~150 мс, сейчас ~35 мс)
+IMPORT_BUDGETS_MS = {
+    "notion_article_finder": 100.0,
+    "run_auto": 100.0,
+    "run_batch": 100.0,
+}
+
+# Модули, которые не должны загружаться до первого запроса к API
+HEAVY_MODULES = ("requests", "urllib3", "httpx", "pyarrow", "zstandard")
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Разбор вывода -X importtime
+
+    Returns:
+        Кортежи (модуль, собственное время мкс, накопленное время мкс, глубина вложенности)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """
+    Один импорт модуля в чистом процессе
+
+    Returns:
+        Накопленное время импорта (мс), список загруженных модулей и самые дорогие из них
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    entries = parse_importtime(completed.stderr)
+    total_us = next(cumulative for name, _, cumulative, depth in entries if name == module and depth == 0)
+
+    # Зависимости самого модуля: записи между началом его импорта и им самим
+    end = next(i for i, (name, _, _, depth) in enumerate(entries) if name == module and depth == 0)
+    start = end
+    while start > 0 and entries[start - 1][3] > 0:
+        start -= 1
+    loaded = [name for name, _, _, _ in entries[start:end]]
+    top = sorted(((name, cumulative) for name, _, cumulative, depth in entries[start:end] if depth == 1),
+                 key=lambda item: item[1], reverse=True)
+
+    return {
+        "module": module,
+        "total_ms": total_us / 1000,
+        "loaded": loaded,
+        "top": [{"module": name, "ms": cumulative / 1000} for name, cumulative in top[:8]],
+    }
+
+
+def bench_module(module: str, runs: int = 5) -> Dict[str, Any]:
+    """
+    Несколько импортов модуля: берется минимальное время (наименее зашумленное)
+
+    Returns:
+        Результат лучшего прогона, медиана и загруженные тяжелые модули
+    """
+    results = [measure_import(module) for _ in range(runs)]
+    times = sorted(result["total_ms"] for result in results)
+    best = min(results, key=lambda result: result["total_ms"])
+    best["median_ms"] = times[len(times) // 2]
+    best["heavy"] = sorted({name.split(".")[0] for name in best["loaded"]} & set(HEAVY_MODULES))
+    return best
+
+
+def check_budgets(modules: List[str] = None, runs: int = 5) -> List[str]:
+    """
+    Проверка бюджета времени импорта и отсутствия тяжелых модулей
+
+    Returns:
+        Список нарушений (пустой, если все в порядке)
+    """
+    problems = []
+    for module in modules or list(IMPORT_BUDGETS_MS):
+        result = bench_module(module, runs)
+        budget = IMPORT_BUDGETS_MS.get(module)
+        if budget is not None and result["total_ms"] > budget:
+            problems.append(f"{module}: импорт {result['total_ms']:.1f} мс, бюджет {budget:.0f} мс")
+        if result["heavy"]:
+            problems.append(f"{module}: при импорте загружаются {', '.join(result['heavy'])}")
+    return problems
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Время импорта модулей командной строки (-X importtime)")
+    parser.add_argument("--modules", nargs="+", default=list(IMPORT_BUDGETS_MS),
+                        help="Модули для проверки (по умолчанию: все с бюджетом)")
+    parser.add_argument("--runs", type=int, default=5, help="Число импортов каждого модуля (по умолчанию: 5)")
+    parser.add_argument("--output", help="Сохранить результаты в JSON файл")
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+    for module in args.modules:
+        result = bench_module(module, args.runs)
+        results.append(result)
+        budget = IMPORT_BUDGETS_MS.get(module)
+        status = ""
+        if budget is not None:
+            within = result["total_ms"] <= budget
+            failed = failed or not within
+            status = f"бюджет {budget:.0f} мс: {'OK' if within else 'ПРЕВЫШЕН'}"
+        print(f"{module:<24} {result['total_ms']:>7.1f} мс (медиана {result['median_ms']:.1f}) {status}")
+        for item in result["top"]:
+            print(f"    {item['module']:<28} {item['ms']:>7.1f} мс")
+        if result["heavy"]:
+            failed = failed or budget is not None
+            print(f"    загружаются тяжелые модули: {', '.join(result['heavy'])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк сервиса запросов (notion_service.py) на синтетической нагрузке.
+
+Несколько клиентов несколько раз запрашивают один и тот же диапазон дат:
+сначала каждый своим поисковиком напрямую к API, затем через сервис с
+объединением одинаковых запросов и общим кэшем. Запросы к API считает
+stub-сервер (с задержкой ответа и долей ответов 429), так что видно,
+сколько повторной пагинации убирает сервис.
+
+Запуск из корня репозитория:
+    python3 -m benchmarks.bench_service
+    python3 -m benchmarks.bench_service --clients 20 --rounds 5 --latency 0.05 --throttle-rate 0.05
+"""
+
+import argparse
+import json
+import threading
+import time
+from typing import Any, Callable, Dict
+
+import requests
+
+from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+from notion_article_finder import NotionArticleFinder
+from notion_service import QueryServer, QueryService
+from notion_transport import NotionTransport
+
+
+START_DATE = "2024-01-01"
+END_DATE = "2024-01-31"
+
+
+def run_clients(clients: int, rounds: int, pause: float, query: Callable[[], int]) -> Dict[str, Any]:
+    """
+    Одновременный запуск клиентов, каждый делает rounds запросов с паузой между ними
+
+    Returns:
+        Время, число запросов клиентов и число статей в последнем ответе
+    """
+    counts = []
+    lock = threading.Lock()
+
+    def client():
+        for round_number in range(rounds):
+            count = query()
+            with lock:
+                counts.append(count)
+            if round_number < rounds - 1:
+                time.sleep(pause)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"seconds": time.perf_counter() - started, "queries": len(counts), "articles": counts[-1]}
+
+
+def bench(args: argparse.Namespace) -> Dict[str, Any]:
+    """Прогон без сервиса и с сервисом на одном stub-сервере"""
+    database = SyntheticDatabase(args.pages, start_date=START_DATE, days=365)
+    results = {}
+
+    with StubNotionServer(database, latency=args.latency, throttle_rate=args.throttle_rate) as server:
+        def stub_stats() -> Dict[str, int]:
+            return requests.get(f"{server.base_url}/__stats").json()
+
+        def direct() -> int:
+            # Каждый инструмент - свой процесс со своим поисковиком
+            transport = NotionTransport("bench-token", base_url=server.base_url, backoff_base=0.05)
+            finder = NotionArticleFinder("bench-token", "bench-db", transport=transport)
+            finder.resolve_extractor()
+            count = len(list(finder.iter_articles_info(finder.iter_articles_by_date(START_DATE, END_DATE))))
+            transport.close()
+            return count
+
+        transport = NotionTransport("bench-token", base_url=server.base_url, backoff_base=0.05)
+        finder = NotionArticleFinder("bench-token", "bench-db", transport=transport)
+        with QueryServer(QueryService(finder, ttl=args.ttl), port=0) as query_server:
+            url = f"{query_server.base_url}/articles"
+
+            def via_service() -> int:
+                response = requests.get(url, params={"start_date": START_DATE, "end_date": END_DATE})
+                response.raise_for_status()
+                return response.json()["count"]
+
+            for name, query in (("direct", direct), ("service", via_service)):
+                before = stub_stats()
+                result = run_clients(args.clients, args.rounds, args.pause, query)
+                after = stub_stats()
+                result["api_requests"] = after["requests"] - before["requests"]
+                result["throttled"] = after["throttled"] - before["throttled"]
+                results[name] = result
+                print(f"{name:<8} {result['seconds']:>7.2f} с, запросов клиентов: {result['queries']}, "
+                      f"запросов к API: {result['api_requests']} (429: {result['throttled']}), "
+                      f"статей в ответе: {result['articles']}")
+            results["service"]["stats"] = query_server.service.snapshot()
+        transport.close()
+
+    direct_requests = results["direct"]["api_requests"]
+    service_requests = results["service"]["api_requests"] or 1
+    results["reduction"] = direct_requests / service_requests
+    print(f"\nЗапросов к API меньше в {results['reduction']:.1f} раза; статистика сервиса: "
+          f"{json.dumps(results['service']['stats'], ensure_ascii=False)}")
+    return results
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Бенчмарк сервиса запросов с объединением и общим кэшем")
+    parser.add_argument("--pages", type=int, default=5000, help="Страниц в базе (по умолчанию: 5000)")
+    parser.add_argument("--clients", type=int, default=10, help="Число клиентов (по умолчанию: 10)")
+    parser.add_argument("--rounds", type=int, default=3, help="Запросов каждого клиента (по умолчанию: 3)")
+    parser.add_argument("--pause", type=float, default=0.2,
+                        help="Пауза между запросами клиента в секундах (по умолчанию: 0.2)")
+    parser.add_argument("--ttl", type=float, default=300, help="TTL кэша сервиса в секундах (по умолчанию: 300)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Задержка ответа API в секундах")
+    parser.add_argument("--throttle-rate", type=float, default=0.05, help="Доля ответов 429")
+    parser.add_argument("--output", help="Сохранить результаты в JSON файл")
+    args = parser.parse_args()
+
+    results = bench(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Запись кассеты для test_unified.py.
+
+По умолчанию поднимает локальный stub-сервер Notion API с синтетической
+базой (несколько страниц пагинации и воспроизводимые ответы 429) и
+запускает test_unified.py под pytest в режиме NOTION_CASSETTE=record.
+С --live запись идет с настоящего API (токен и база - из config.py или
+NOTION_TOKEN и NOTION_DATABASE_ID).
+
+Запуск из корня репозитория:
+    python3 -m benchmarks.record_cassettes
+    python3 -m benchmarks.record_cassettes --live
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict
+
+from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STUB_DATABASE_ID = "stub-database"
+
+
+def record(env: Dict[str, str]) -> int:
+    """Прогон test_unified.py с записью кассеты"""
+    env = dict(os.environ, **env, NOTION_CASSETTE="record")
+    completed = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "test_unified.py"],
+        cwd=REPO_ROOT, env=env
+    )
+    return completed.returncode
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Запись кассеты cassettes/unified.json для test_unified.py")
+    parser.add_argument("--live", action="store_true", help="Записывать с настоящего Notion API")
+    parser.add_argument("--pages", type=int, default=150, help="Страниц в синтетической базе (по умолчанию: 150)")
+    parser.add_argument("--throttle-rate", type=float, default=0.1,
+                        help="Доля ответов 429 stub-сервера (по умолчанию: 0.1)")
+    parser.add_argument("--seed", type=int, default=7, help="Зерно для ответов 429 (по умолчанию: 7)")
+    args = parser.parse_args()
+
+    if args.live:
+        sys.exit(record({}))
+
+    # Даты с августа по ноябрь 2025: октябрь из test_unified.py - в середине диапазона
+    database = SyntheticDatabase(args.pages, start_date="2025-08-01", days=122)
+    with StubNotionServer(database, throttle_rate=args.throttle_rate, retry_after=0.05,
+                          seed=args.seed, database_id=STUB_DATABASE_ID) as server:
+        print(f"Stub Notion API: {server.base_url} ({args.pages} страниц)")
+        returncode = record({"NOTION_API_URL": server.base_url, "NOTION_TOKEN": "stub-token",
+                             "NOTION_DATABASE_ID": STUB_DATABASE_ID})
+        print(f"Запросов: {server.stats['requests']}, из них 429: {server.stats['throttled']}")
+    sys.exit(returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Локальный stub-сервер, имитирующий Notion API для бенчмарков:
+GET databases/{id}, POST databases/{id}/query и GET blocks/{id}/children
+с пагинацией по курсору.
+
+Страницы генерируются детерминированно по номеру и не хранятся в памяти,
+даты распределены по диапазону монотонно, поэтому фильтр по дате
+сводится к бинарному поиску по номерам страниц.
+"""
+
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlparse
+
+
+class SyntheticDatabase:
+    def __init__(self, pages: int = 1000, start_date: str = "2024-01-01", days: int = 365,
+                 title_segments: int = 1, url_type: str = "url",
+                 extra_properties: int = 0, extra_text_size: int = 200,
+                 last_edited_time: str = "2024-06-01T00:00:00.000Z",
+                 blocks_per_page: int = 0,
+                 url_base: str = "https://example.com/articles"):
+        """
+        Описание синтетической базы данных
+
+        Args:
+            pages: Число страниц в базе
+            start_date: Дата первой страницы (YYYY-MM-DD)
+            days: На сколько дней растянуты даты страниц
+            title_segments: Число сегментов rich text в названии
+            url_type: Тип поля со ссылкой: url или rich_text
+            extra_properties: Число дополнительных текстовых полей (ширина базы)
+            extra_text_size: Длина текста в каждом дополнительном поле
+            last_edited_time: Значение last_edited_time у всех страниц
+            blocks_per_page: Число блоков верхнего уровня в тексте каждой страницы
+            url_base: Начало ссылок на статьи (например, адрес stub_source_server)
+        """
+        self.pages = pages
+        self.title_segments = title_segments
+        self.url_type = url_type
+        self.extra_properties = extra_properties
+        self.extra_text = "x" * extra_text_size
+        self.last_edited_time = last_edited_time
+        self.blocks_per_page = blocks_per_page
+        self.url_base = url_base.rstrip("/")
+        # Правки отдельных страниц: номер -> {"last_edited_time": ..., "title": ...}
+        self.edits: Dict[int, Dict[str, Any]] = {}
+        # Архивированные страницы: в ответы query не попадают
+        self.archived: Set[int] = set()
+
+        first = date.fromisoformat(start_date)
+        self.dates = [(first + timedelta(days=i * days // max(pages, 1))).isoformat() for i in range(pages)]
+
+    def schema(self, database_id: str) -> Dict[str, Any]:
+        """Ответ GET databases/{id}"""
+        properties = {
+            "Name": {"id": "title", "name": "Name", "type": "title", "title": {}},
+            "URL": {"id": "url", "name": "URL", "type": self.url_type, self.url_type: {}},
+            "Date": {"id": "date", "name": "Date", "type": "date", "date": {}},
+        }
+        for n in range(self.extra_properties):
+            properties[f"Extra {n}"] = {"id": f"x{n}", "name": f"Extra {n}", "type": "rich_text", "rich_text": {}}
+        return {
+            "object": "database",
+            "id": database_id,
+            "title": [{"type": "text", "plain_text": "Synthetic", "text": {"content": "Synthetic"}}],
+            "properties": properties,
+        }
+
+    def edit(self, index: int, last_edited_time: str, title: Optional[str] = None):
+        """Правка страницы с номером index: новое время изменения и (необязательно) название"""
+        edit = self.edits.setdefault(index, {})
+        edit["last_edited_time"] = last_edited_time
+        if title is not None:
+            edit["title"] = title
+
+    def archive(self, index: int):
+        """Архивирование страницы с номером index"""
+        self.archived.add(index)
+
+    @staticmethod
+    def _text(content: str, link: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "type": "text",
+            "plain_text": content,
+            "href": link,
+            "text": {"content": content, "link": {"url": link} if link else None},
+        }
+
+    def page(self, index: int, properties: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Страница с номером index (properties - оставить только эти поля)"""
+        url = f"{self.url_base}/{index}"
+        edit = self.edits.get(index, {})
+        title = ([self._text(edit["title"])] if "title" in edit
+                 else [self._text(f"Article {index} part {s} ") for s in range(self.title_segments)])
+        props = {
+            "Name": {"id": "title", "type": "title", "title": title},
+            "URL": ({"id": "url", "type": "url", "url": url} if self.url_type == "url"
+                    else {"id": "url", "type": "rich_text", "rich_text": [self._text(url, url)]}),
+            "Date": {"id": "date", "type": "date", "date": {"start": self.dates[index], "end": None}},
+        }
+        for n in range(self.extra_properties):
+            props[f"Extra {n}"] = {"id": f"x{n}", "type": "rich_text", "rich_text": [self._text(self.extra_text)]}
+        if properties is not None:
+            props = {name: value for name, value in props.items()
+                     if name in properties or value["id"] in properties}
+
+        page_id = f"{index:08x}-0000-4000-8000-{index:012x}"
+        return {
+            "object": "page",
+            "id": page_id,
+            "created_time": "2024-01-01T00:00:00.000Z",
+            "last_edited_time": edit.get("last_edited_time", self.last_edited_time),
+            "archived": False,
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+            "properties": props,
+        }
+
+    def _block(self, block_id: str, block_type: str, content: str, has_children: bool = False) -> Dict[str, Any]:
+        return {
+            "object": "block",
+            "id": block_id,
+            "type": block_type,
+            "has_children": has_children,
+            "last_edited_time": self.last_edited_time,
+            block_type: {"rich_text": [self._text(content)]},
+        }
+
+    def block_children(self, block_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Дочерние блоки страницы или блока (None - блок не найден)
+
+        Текст страницы с номером index - чередование заголовков, абзацев и
+        пунктов списка; у каждого пункта списка есть вложенный абзац.
+        ID блоков кодируют номер страницы и номер блока.
+        """
+        parts = block_id.split("-")
+        try:
+            index = int(parts[0], 16)
+        except ValueError:
+            return None
+        if index >= self.pages or len(parts) != 5:
+            return None
+
+        tail = parts[4]
+        if parts[1] == "0000":
+            blocks = []
+            for n in range(self.blocks_per_page):
+                child_id = f"{index:08x}-b{n:03x}-4000-8000-{tail}"
+                if n % 4 == 0:
+                    blocks.append(self._block(child_id, "heading_2", f"Section {n // 4}"))
+                elif n % 4 == 2:
+                    blocks.append(self._block(child_id, "bulleted_list_item", f"Item {n}", has_children=True))
+                else:
+                    blocks.append(self._block(child_id, "paragraph", f"Paragraph {n} of article {index}"))
+            return blocks
+        if parts[1].startswith("b"):
+            n = int(parts[1][1:], 16)
+            return [self._block(f"{index:08x}-c{n:03x}-4000-8000-{tail}", "paragraph", f"Nested {n}")]
+        return []
+
+    def _matching(self, filter_data: Dict[str, Any]):
+        """Номера страниц (по возрастанию), подходящих под фильтр по дате и времени изменения"""
+        low, high = 0, self.pages
+        edited_after = None
+        conditions = filter_data.get("and", [filter_data]) if filter_data else []
+        for condition in conditions:
+            date_filter = condition.get("date") or {}
+            if "on_or_after" in date_filter:
+                low = max(low, bisect.bisect_left(self.dates, date_filter["on_or_after"][:10]))
+            if "on_or_before" in date_filter:
+                high = min(high, bisect.bisect_right(self.dates, date_filter["on_or_before"][:10]))
+            edited = condition.get("last_edited_time") or {}
+            if "on_or_after" in edited:
+                edited_after = edited["on_or_after"]
+        if edited_after is None or edited_after <= self.last_edited_time:
+            matching = range(low, max(low, high))
+        else:
+            # Позже общей отметки изменены только правленые страницы
+            matching = sorted(index for index, edit in self.edits.items()
+                              if low <= index < high and edit["last_edited_time"] >= edited_after)
+        if self.archived:
+            matching = [index for index in matching if index not in self.archived]
+        return matching
+
+    def query(self, body: Dict[str, Any], properties: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Ответ POST databases/{id}/query (курсор - номер первой страницы ответа)"""
+        matching = self._matching(body.get("filter") or {})
+        page_size = min(int(body.get("page_size", 100)), 100)
+        position = bisect.bisect_left(matching, int(body.get("start_cursor") or 0))
+        selected = matching[position:position + page_size]
+        has_more = position + page_size < len(matching)
+        return {
+            "object": "list",
+            "results": [self.page(i, properties) for i in selected],
+            "has_more": has_more,
+            "next_cursor": str(matching[position + page_size]) if has_more else None,
+        }
+
+
+class StubNotionServer:
+    def __init__(self, database: SyntheticDatabase, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 0.05,
+                 seed: int = 0, database_id: Optional[str] = None, truncate_responses: int = 0):
+        """
+        HTTP-сервер поверх синтетической базы
+
+        Args:
+            database: Синтетическая база данных
+            host: Адрес для прослушивания
+            port: Порт (0 - выбрать свободный)
+            latency: Искусственная задержка каждого ответа в секундах
+            throttle_rate: Доля запросов, на которые отвечать 429
+            retry_after: Значение заголовка Retry-After в ответах 429
+            seed: Зерно генератора для воспроизводимой инъекции 429
+            database_id: ID базы данных (для других ID - 404; None - отвечать для любого ID)
+            truncate_responses: Сколько первых ответов на query оборвать на середине тела
+        """
+        self.database = database
+        self.database_id = database_id
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.truncate_responses = truncate_responses
+        self.stats = {"requests": 0, "throttled": 0, "truncated": 0, "bytes_sent": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def known_database(self, database_id: str) -> bool:
+        """Есть ли база данных с таким ID"""
+        return self.database_id is None or database_id == self.database_id
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None,
+                      truncate: bool = False):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if truncate:
+                    # Половина тела при полном Content-Length и закрытие соединения
+                    body = body[:len(body) // 2]
+                    self.close_connection = True
+                self.wfile.write(body)
+                with server._lock:
+                    server.stats["bytes_sent"] += len(body)
+
+            def _truncated(self) -> bool:
+                with server._lock:
+                    truncate = server.stats["truncated"] < server.truncate_responses
+                    if truncate:
+                        server.stats["truncated"] += 1
+                return truncate
+
+            def _throttled(self) -> bool:
+                with server._lock:
+                    server.stats["requests"] += 1
+                    throttled = server._random.random() < server.throttle_rate
+                    if throttled:
+                        server.stats["throttled"] += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if throttled:
+                    self._send(429, {"object": "error", "status": 429, "code": "rate_limited",
+                                     "message": "Rate limited"},
+                               {"Retry-After": str(server.retry_after)})
+                return throttled
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                path = parsed.path.rstrip("/").split("/")
+                if path[-1] == "__stats":
+                    with server._lock:
+                        stats = dict(server.stats)
+                    self._send(200, stats)
+                    return
+                if self._throttled():
+                    return
+                if len(path) >= 2 and path[-2] == "databases" and server.known_database(path[-1]):
+                    self._send(200, server.database.schema(path[-1]))
+                elif len(path) >= 3 and path[-3] == "blocks" and path[-1] == "children":
+                    blocks = server.database.block_children(path[-2])
+                    if blocks is None:
+                        self._send(404, {"object": "error", "status": 404, "code": "object_not_found"})
+                        return
+                    params = parse_qs(parsed.query)
+                    page_size = min(int(params.get("page_size", ["100"])[0]), 100)
+                    start = int(params.get("start_cursor", ["0"])[0])
+                    end = min(len(blocks), start + page_size)
+                    has_more = end < len(blocks)
+                    self._send(200, {"object": "list", "results": blocks[start:end], "has_more": has_more,
+                                     "next_cursor": str(end) if has_more else None})
+                else:
+                    self._send(404, {"object": "error", "status": 404, "code": "object_not_found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self._throttled():
+                    return
+                parsed = urlparse(self.path)
+                path = parsed.path.rstrip("/").split("/")
+                if path[-1] == "query" and server.known_database(path[-2]):
+                    properties = parse_qs(parsed.query).get("filter_properties")
+                    self._send(200, server.database.query(body, properties), truncate=self._truncated())
+                else:
+                    self._send(404, {"object": "error", "status": 404, "code": "object_not_found"})
+
+        return Handler
+
+    def start(self) -> "StubNotionServer":
+        """Запуск сервера в фоновом потоке"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Остановка сервера"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    """Запуск stub-сервера из командной строки"""
+    parser = argparse.ArgumentParser(description="Stub-сервер Notion API с синтетическими страницами")
+    parser.add_argument("--port", type=int, default=8765, help="Порт (по умолчанию: 8765)")
+    parser.add_argument("--pages", type=int, default=1000, help="Число страниц")
+    parser.add_argument("--title-segments", type=int, default=1, help="Сегментов rich text в названии")
+    parser.add_argument("--url-type", choices=("url", "rich_text"), default="url", help="Тип поля URL")
+    parser.add_argument("--extra-properties", type=int, default=0, help="Дополнительных текстовых полей")
+    parser.add_argument("--blocks-per-page", type=int, default=0, help="Блоков в тексте каждой страницы")
+    parser.add_argument("--url-base", default="https://example.com/articles", help="Начало ссылок на статьи")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа в секундах")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Доля ответов 429")
+    args = parser.parse_args()
+
+    database = SyntheticDatabase(args.pages, title_segments=args.title_segments,
+                                 url_type=args.url_type, extra_properties=args.extra_properties,
+                                 blocks_per_page=args.blocks_per_page, url_base=args.url_base)
+    server = StubNotionServer(database, port=args.port, latency=args.latency,
+                              throttle_rate=args.throttle_rate)
+    print(f"Stub Notion API: {server.base_url} ({args.pages} страниц)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
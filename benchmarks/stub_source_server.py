@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Локальный stub-сервер исходных статей для проверки --fetch-sources:
+GET /articles/{n} отдает HTML с ETag и Last-Modified и отвечает 304 на
+условные запросы. Часть статей перенаправляется (301) или отсутствует (404).
+
+Вместе с stub_notion_server (--url-base http://127.0.0.1:PORT/articles)
+позволяет проверить загрузку исходных статей без доступа в интернет.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+LAST_MODIFIED = "Sat, 01 Jun 2024 00:00:00 GMT"
+
+
+class StubSourceServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 body_size: int = 20000, version: int = 1):
+        """
+        HTTP-сервер с синтетическими статьями
+
+        Статьи с номером n % 50 == 7 перенаправляются на /moved/{n},
+        с n % 50 == 13 - отсутствуют (404).
+
+        Args:
+            host: Адрес для прослушивания
+            port: Порт (0 - выбрать свободный)
+            latency: Задержка каждого ответа в секундах
+            body_size: Примерный размер статьи в байтах
+            version: Версия содержимого (смена версии меняет ETag и тело)
+        """
+        self.latency = latency
+        self.body_size = body_size
+        self.version = version
+        self.stats = {"requests": 0, "not_modified": 0, "bytes_sent": 0, "max_in_flight": 0}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def article(self, index: int) -> bytes:
+        """HTML статьи с номером index"""
+        paragraph = f"<p>Article {index}, version {self.version}. </p>\n"
+        return (f"<html><head><title>Article {index}</title></head><body>\n" +
+                paragraph * max(1, self.body_size // len(paragraph)) +
+                "</body></html>\n").encode("utf-8")
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None,
+                      content_type: str = "text/html; charset=utf-8"):
+                self.send_response(status)
+                if status != 304:
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(body)
+                with server._lock:
+                    server.stats["bytes_sent"] += len(body)
+
+            def do_GET(self):
+                path = self.path.split("?")[0].rstrip("/").split("/")
+                if path[-1] == "__stats":
+                    with server._lock:
+                        stats = dict(server.stats)
+                    self._send(200, json.dumps(stats).encode("utf-8"), content_type="application/json")
+                    return
+
+                with server._lock:
+                    server.stats["requests"] += 1
+                    server._in_flight += 1
+                    server.stats["max_in_flight"] = max(server.stats["max_in_flight"], server._in_flight)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    self._respond(path)
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+
+            def _respond(self, path):
+                if len(path) < 2 or path[-2] not in ("articles", "moved") or not path[-1].isdigit():
+                    self._send(404, b"not found")
+                    return
+                index = int(path[-1])
+                if path[-2] == "articles" and index % 50 == 7:
+                    self._send(301, b"", {"Location": f"/moved/{index}"})
+                    return
+                if index % 50 == 13:
+                    self._send(404, b"not found")
+                    return
+
+                etag = f'"v{server.version}-{index}"'
+                headers = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.stats["not_modified"] += 1
+                    self._send(304, headers=headers)
+                    return
+                self._send(200, server.article(index), headers)
+
+        return Handler
+
+    def start(self) -> "StubSourceServer":
+        """Запуск сервера в фоновом потоке"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Остановка сервера"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    """Запуск stub-сервера из командной строки"""
+    parser = argparse.ArgumentParser(description="Stub-сервер исходных статей с ETag и условными запросами")
+    parser.add_argument("--port", type=int, default=8766, help="Порт (по умолчанию: 8766)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа в секундах")
+    parser.add_argument("--body-size", type=int, default=20000, help="Размер статьи в байтах")
+    parser.add_argument("--version", type=int, default=1, help="Версия содержимого статей")
+    args = parser.parse_args()
+
+    server = StubSourceServer(port=args.port, latency=args.latency, body_size=args.body_size,
+                              version=args.version)
+    print(f"Stub исходных статей: {server.base_url}/articles/N")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
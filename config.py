@@ -15,3 +15,34 @@ DATABASE_ID = ""
 DEFAULT_START_DATE = "2025-10-01"
 DEFAULT_END_DATE = "2025-10-03"
 DEFAULT_OUTPUT_FILE = "notion_articles_urls.txt"
+
+# Явное сопоставление полей базы данных (None - определить автоматически по схеме)
+PROPERTY_MAPPING = {
+    "title": None,  # Поле с названием статьи (тип Title или Text)
+    "url": None,    # Поле со ссылкой на статью (тип URL или Text)
+    "date": None,   # Поле даты для фильтрации (по умолчанию "Date")
+}
+
+# Дополнительные условия фильтра Notion API (объединяются с фильтром по дате через "and")
+# Формат условий: https://developers.notion.com/reference/post-database-query-filter
+QUERY_FILTERS = [
+    # {"property": "Tags", "multi_select": {"contains": "ML"}},
+    # {"property": "Status", "status": {"equals": "Done"}},
+    # {"property": "Name", "title": {"contains": "OpenAI"}},
+]
+
+# Сортировки результатов (по умолчанию порядок определяет Notion)
+QUERY_SORTS = [
+    # {"property": "Date", "direction": "descending"},
+]
+
+# Базы данных для пакетной выгрузки (run_batch.py)
+# Необязательные ключи: "token", "api_url", "property_mapping", "filters" и "sorts" для отдельной базы
+DATABASES = [
+    # {
+    #     "database_id": "",
+    #     "start_date": "2025-10-01",
+    #     "end_date": "2025-10-03",
+    #     "output": "ml_articles.csv",
+    # },
+]
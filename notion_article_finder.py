@@ -1,150 +1,622 @@
 #!/usr/bin/env python3
 """
 Скрипт для поиска статей в Notion Database по дате и сохранения их URL-ов в файл.
+
+Сетевые модули (requests, транспорт, загрузка исходных статей) импортируются
+только перед первым запросом: --help и проверка аргументов работают без них.
 """
 
+from __future__ import annotations
+
 import os
-import requests
+import sys
+import time
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple, Union
 import argparse
 import json
+from urllib.parse import unquote
+
+from notion_blocks import BODY_FORMATS, ArticleBodyExporter
+from notion_cache import ResponseCache
+from notion_checkpoint import RESUMABLE_FORMATS, ExportCheckpoint
+from notion_index import CHANGE_CHANGED, CHANGE_DUPLICATE, CHANGE_NEW, CHANGE_REMOVED, ExportIndex
+from notion_exporters import (CSV_COLUMNS, EXPORT_COLUMNS, EXPORT_FORMATS, SOURCE_COLUMNS, CsvExporter,
+                               JsonlExporter, create_exporter, export_path)
+from notion_json import iter_query_results, loads, require_incremental
+from notion_lazy import lazy_import
+from notion_mirror import NotionMirror
+from notion_records import NO_URL, ArticleRecord
+from notion_search import SEARCH_INDEX_PATH, BodyIndexer, SearchIndex, open_search_index
+
+if TYPE_CHECKING:
+    from notion_sources import SourceFetcher
+    from notion_transport import NotionTransport, RateLimiter, SharedRateLimiter
+
+# Загружается при первом обращении (обработка ошибок запросов к API)
+requests = lazy_import("requests")
+
+
+SHARD_GRANULARITIES = ("day", "week", "month")
+
+# Возможные названия полей с названием и URL статьи
+TITLE_FIELD_CANDIDATES = ['Name', 'Title', 'Название', 'Заголовок', 'title', 'name']
+URL_FIELD_CANDIDATES = ['URL', 'url', 'Url', 'Ссылка', 'ссылка']
+
+NO_TITLE = "Без названия"
+
+# Максимальный размер страницы ответа databases/{id}/query
+MAX_PAGE_SIZE = 100
+
+# Условия фильтра, задаваемые в командной строке как ПОЛЕ=ЗНАЧЕНИЕ
+FILTER_CONDITIONS = {
+    "tag": ("multi_select", "contains"),
+    "select": ("select", "equals"),
+    "status": ("status", "equals"),
+    "contains": ("rich_text", "contains"),
+}
+
+# Типы полей, для которых текстовый фильтр задается по ключу типа поля
+TEXT_FILTER_TYPES = ("title", "rich_text", "url", "email", "phone_number")
+
+
+def rich_text_to_plain(rich_text: List[Dict[str, Any]]) -> str:
+    """Склеивание всех сегментов rich text в одну строку"""
+    return "".join(
+        segment.get('plain_text') or (segment.get('text') or {}).get('content', '')
+        for segment in rich_text
+    )
+
 
+def rich_text_link(rich_text: List[Dict[str, Any]]) -> Optional[str]:
+    """Первая ссылка среди сегментов rich text"""
+    for segment in rich_text:
+        url = ((segment.get('text') or {}).get('link') or {}).get('url')
+        if url:
+            return url
+    return None
 
-class NotionArticleFinder:
-    def __init__(self, notion_token: str, database_id: str):
+
+def parse_filter_condition(kind: str, spec: str) -> Dict[str, Any]:
+    """
+    Условие фильтра Notion из аргумента командной строки вида ПОЛЕ=ЗНАЧЕНИЕ
+    
+    Args:
+        kind: Вид условия: tag, select, status или contains
+        spec: Строка ПОЛЕ=ЗНАЧЕНИЕ
+        
+    Returns:
+        Условие фильтра для тела запроса databases/{id}/query
+    """
+    property_name, separator, value = spec.partition("=")
+    if not separator or not property_name:
+        raise ValueError(f"Условие фильтра должно иметь вид ПОЛЕ=ЗНАЧЕНИЕ: {spec}")
+    filter_type, operator = FILTER_CONDITIONS[kind]
+    return {"property": property_name, filter_type: {operator: value}}
+
+
+def parse_sort(spec: str) -> Dict[str, str]:
+    """
+    Сортировка Notion из аргумента командной строки вида ПОЛЕ[:asc|desc]
+    
+    Поля created_time и last_edited_time сортируются по времени страницы.
+    """
+    name, _, direction = spec.rpartition(":")
+    if not name or direction not in ("asc", "desc"):
+        name, direction = spec, "asc"
+    direction = "ascending" if direction == "asc" else "descending"
+    if name in ("created_time", "last_edited_time"):
+        return {"timestamp": name, "direction": direction}
+    return {"property": name, "direction": direction}
+
+
+def split_date_range(start_date: str, end_date: str, granularity: str = "week") -> List[Tuple[str, str]]:
+    """
+    Разбиение диапазона дат на непересекающиеся поддиапазоны
+    
+    Args:
+        start_date: Начальная дата в формате YYYY-MM-DD
+        end_date: Конечная дата в формате YYYY-MM-DD
+        granularity: Размер поддиапазона: day, week или month
+        
+    Returns:
+        Список пар (начало, конец) в формате YYYY-MM-DD, включительно
+    """
+    if granularity not in SHARD_GRANULARITIES:
+        raise ValueError(f"Неизвестный размер шарда: {granularity}")
+    
+    current = datetime.strptime(start_date, "%Y-%m-%d").date()
+    last = datetime.strptime(end_date, "%Y-%m-%d").date()
+    shards = []
+    
+    while current <= last:
+        if granularity == "day":
+            next_start = current + timedelta(days=1)
+        elif granularity == "week":
+            next_start = current + timedelta(days=7)
+        else:
+            next_start = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+        
+        shard_end = min(next_start - timedelta(days=1), last)
+        shards.append((current.isoformat(), shard_end.isoformat()))
+        current = next_start
+    
+    return shards
+
+
+class BaseArticleFinder:
+    """
+    Общая логика поиска статей без сетевого ввода-вывода: формирование запросов,
+    разбор ответов, извлечение данных и сохранение в файл.
+    Используется синхронным и асинхронным клиентами.
+    """
+    
+    # Название поля даты, по которому фильтруются статьи
+    date_property = "Date"
+    
+    def __init__(self, notion_token: str, database_id: str,
+                 property_mapping: Optional[Dict[str, Optional[str]]] = None,
+                 keep_raw: bool = False,
+                 filters: Optional[List[Dict[str, Any]]] = None,
+                 sorts: Optional[List[Dict[str, Any]]] = None):
         """
         Инициализация клиента Notion API
         
         Args:
             notion_token: Токен доступа к Notion API
             database_id: ID базы данных "Обзор рынка технологии машинного обучения"
+            property_mapping: Явное сопоставление полей {"title", "url", "date"} с полями базы
+            keep_raw: Сохранять исходные страницы Notion в raw_pages при выполнении run
+            filters: Дополнительные условия фильтра Notion (объединяются с фильтром по дате через and)
+            sorts: Сортировки Notion для запроса по датам
         """
+        from notion_transport import NOTION_API_URL, notion_headers
+        
         self.notion_token = notion_token
         self.database_id = database_id
-        self.base_url = "https://api.notion.com/v1"
-        self.headers = {
-            "Authorization": f"Bearer {notion_token}",
-            "Content-Type": "application/json",
-            "Notion-Version": "2022-06-28"
-        }
+        self.base_url = NOTION_API_URL
+        self.headers = notion_headers(notion_token)
+        self.property_mapping = {k: v for k, v in (property_mapping or {}).items() if v}
+        if self.property_mapping.get('date'):
+            self.date_property = self.property_mapping['date']
+        # Экстрактор, собранный по схеме базы данных (см. compile_extractor)
+        self.extractor: Optional[Callable[[Dict[str, Any]], ArticleRecord]] = None
+        # По умолчанию исходный JSON страниц отбрасывается сразу после извлечения полей
+        self.keep_raw = keep_raw
+        self.raw_pages: List[Dict[str, Any]] = []
+        self.filters = list(filters or [])
+        self.sorts = list(sorts or [])
+        # ID полей, которые нужны экстрактору (заполняется по схеме в compile_extractor)
+        self.projected_properties: Optional[List[str]] = None
+        self.property_types: Dict[str, str] = {}
+        # Последняя ошибка API или записи файла при выгрузке (None - выгрузка без ошибок)
+        self.error: Optional[str] = None
     
-    def search_articles_by_date(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    @property
+    def database_path(self) -> str:
+        """Путь к описанию базы данных относительно базового URL API"""
+        return f"databases/{self.database_id}"
+    
+    @property
+    def query_path(self) -> str:
+        """Путь запроса к базе данных относительно базового URL API"""
+        return f"databases/{self.database_id}/query"
+    
+    @property
+    def query_params(self) -> Optional[Dict[str, List[str]]]:
         """
-        Поиск статей в базе данных по дате
+        Параметры строки запроса databases/{id}/query: filter_properties
+        ограничивает ответ полями, которые читает экстрактор
+        """
+        if not self.projected_properties:
+            return None
+        return {"filter_properties": self.projected_properties}
+    
+    def pushdown_filters(self) -> List[Dict[str, Any]]:
+        """
+        Дополнительные условия фильтра для запроса
+        
+        Текстовое условие (rich_text) для полей типа title, url и т.п. задается
+        по ключу типа поля, если схема базы данных уже известна.
+        """
+        conditions = []
+        for condition in self.filters:
+            property_type = self.property_types.get(condition.get("property"))
+            if "rich_text" in condition and property_type in TEXT_FILTER_TYPES and property_type != "rich_text":
+                condition = dict(condition)
+                condition[property_type] = condition.pop("rich_text")
+            conditions.append(condition)
+        return conditions
+    
+    def build_date_filter(self, start_date: str, end_date: str, sort_by_date: bool = False) -> Dict[str, Any]:
+        """
+        Формирование тела запроса с фильтром по дате
         
         Args:
             start_date: Начальная дата в формате YYYY-MM-DD
             end_date: Конечная дата в формате YYYY-MM-DD
+            sort_by_date: Сортировать результаты по дате по возрастанию
             
         Returns:
-            Список найденных статей
+            Тело запроса к databases/{id}/query
         """
-        url = f"{self.base_url}/databases/{self.database_id}/query"
-        
-        # Формируем фильтр по дате
         filter_data = {
             "filter": {
                 "and": [
                     {
-                        "property": "Date",
+                        "property": self.date_property,
                         "date": {
                             "on_or_after": start_date
                         }
                     },
                     {
-                        "property": "Date", 
+                        "property": self.date_property, 
                         "date": {
                             "on_or_before": end_date
                         }
                     }
-                ]
-            }
+                ] + self.pushdown_filters()
+            },
+            "page_size": MAX_PAGE_SIZE
         }
         
-        all_results = []
-        has_more = True
-        start_cursor = None
+        # Для слияния шардов сортировка по дате (по возрастанию) должна быть первой
+        sorts = list(self.sorts)
+        if sort_by_date:
+            sorts = [{"property": self.date_property, "direction": "ascending"}] + [
+                sort for sort in sorts if sort.get("property") != self.date_property
+            ]
+        if sorts:
+            filter_data["sorts"] = sorts
         
-        while has_more:
-            if start_cursor:
-                filter_data["start_cursor"] = start_cursor
+        return filter_data
+    
+    def build_edited_since_filter(self, since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Формирование тела запроса страниц, измененных начиная с отметки времени
+        
+        Args:
+            since: Отметка last_edited_time в формате ISO 8601 (None - все страницы)
             
-            try:
-                response = requests.post(url, headers=self.headers, json=filter_data)
-                response.raise_for_status()
-                
-                data = response.json()
-                all_results.extend(data.get("results", []))
-                
-                has_more = data.get("has_more", False)
-                start_cursor = data.get("next_cursor")
-                
-            except requests.exceptions.RequestException as e:
-                print(f"Ошибка при запросе к Notion API: {e}")
-                return []
+        Returns:
+            Тело запроса к databases/{id}/query с сортировкой по last_edited_time
+        """
+        query = {
+            "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+            "page_size": MAX_PAGE_SIZE
+        }
         
-        return all_results
+        if since:
+            query["filter"] = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {
+                    "on_or_after": since
+                }
+            }
+        
+        return query
     
-    def extract_articles_info(self, articles: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    def build_watch_filter(self, since: Optional[str] = None, start_date: Optional[str] = None,
+                           end_date: Optional[str] = None) -> Dict[str, Any]:
         """
-        Извлечение информации о статьях (название, URL статьи и Notion URL)
+        Тело запроса для режима наблюдения: страницы, созданные или измененные
+        начиная с отметки времени, с учетом диапазона дат и дополнительных фильтров
         
         Args:
-            articles: Список статей из Notion
+            since: Отметка last_edited_time в формате ISO 8601 (None - все страницы)
+            start_date: Начальная дата статьи в формате YYYY-MM-DD (необязательно)
+            end_date: Конечная дата статьи в формате YYYY-MM-DD (необязательно)
             
         Returns:
-            Список словарей с информацией о статьях
+            Тело запроса к databases/{id}/query с сортировкой по last_edited_time
         """
-        articles_info = []
+        query = self.build_edited_since_filter(since)
+        conditions = [query["filter"]] if "filter" in query else []
+        if start_date:
+            conditions.append({"property": self.date_property, "date": {"on_or_after": start_date}})
+        if end_date:
+            conditions.append({"property": self.date_property, "date": {"on_or_before": end_date}})
+        conditions.extend(self.pushdown_filters())
         
-        for article in articles:
-            # Получаем Notion URL страницы
-            page_id = article["id"]
-            notion_url = f"https://notion.so/{page_id.replace('-', '')}"
+        if len(conditions) == 1:
+            query["filter"] = conditions[0]
+        elif conditions:
+            query["filter"] = {"and": conditions}
+        return query
+    
+    @staticmethod
+    def parse_query_response(data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Разбор ответа databases/{id}/query
+        
+        Args:
+            data: Декодированный JSON ответа
+            
+        Returns:
+            Пара (страницы ответа, курсор следующей страницы или None)
+        """
+        next_cursor = data.get("next_cursor") if data.get("has_more", False) else None
+        return data.get("results", []), next_cursor
+    
+    def page_date(self, page: Dict[str, Any]) -> str:
+        """Начальная дата страницы из поля даты (пустая строка, если даты нет)"""
+        date_value = page.get('properties', {}).get(self.date_property, {}).get('date') or {}
+        return date_value.get('start') or ""
+    
+    def merge_shards(self, streams: List[Iterable[Dict[str, Any]]],
+                     starts: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Слияние отсортированных по дате шардов в один поток (k-way merge)
+        
+        Args:
+            streams: Потоки страниц шардов, каждый отсортирован по дате
+            starts: Начальные даты шардов по возрастанию; если заданы, поток шарда
+                открывается, только когда более ранние страницы уже выданы (см. _merge_in_order)
+            
+        Yields:
+            Страницы в порядке возрастания даты без повторов по id
+        """
+        seen_ids = set()
+        merged = heapq.merge(*streams, key=self.page_date) if starts is None else self._merge_in_order(streams, starts)
+        
+        for page in merged:
+            if page["id"] in seen_ids:
+                continue
+            seen_ids.add(page["id"])
+            yield page
+    
+    def _merge_in_order(self, streams: List[Iterable[Dict[str, Any]]], starts: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Ленивое слияние шардов с известными начальными датами
+        
+        heapq.merge сразу запрашивает первую страницу каждого шарда. С ограниченными
+        очередями это взаимная блокировка: запущенные шарды ждут места в очереди,
+        а слияние ждет шард, для которого нет свободного потока. Здесь шард
+        открывается, только когда наименьшая дата среди открытых не раньше его начала.
+        """
+        iterators = [iter(stream) for stream in streams]
+        heap: List[Tuple[str, int, Dict[str, Any]]] = []
+        next_shard = 0
+        
+        def push(index: int):
+            for page in iterators[index]:
+                heapq.heappush(heap, (self.page_date(page), index, page))
+                return
+        
+        while True:
+            while next_shard < len(iterators) and (not heap or heap[0][0] >= starts[next_shard]):
+                push(next_shard)
+                next_shard += 1
+            if not heap:
+                return
+            _, index, page = heapq.heappop(heap)
+            yield page
+            push(index)
+    
+    @staticmethod
+    def merge_record_shards(streams: List[Iterable[ArticleRecord]]) -> Iterator[ArticleRecord]:
+        """
+        Слияние отсортированных по дате шардов записей (аналог merge_shards)
+        
+        Args:
+            streams: Потоки записей шардов, каждый отсортирован по дате
+            
+        Yields:
+            Записи в порядке возрастания даты без повторов по ID страницы
+        """
+        seen_ids = set()
+        
+        for record in heapq.merge(*streams, key=lambda record: record.date):
+            if record.page_id in seen_ids:
+                continue
+            seen_ids.add(record.page_id)
+            yield record
+    
+    def _resolve_property(self, schema_properties: Dict[str, Any], kind: str,
+                          candidates: List[str], allowed_types: Tuple[str, ...]) -> Optional[Tuple[str, str]]:
+        """
+        Выбор поля базы данных по схеме: явное сопоставление из настроек,
+        затем известные названия, затем первое поле подходящего типа
+        
+        Returns:
+            Пара (название поля, тип поля) или None, если поле не найдено
+        """
+        explicit = self.property_mapping.get(kind)
+        if explicit:
+            if explicit not in schema_properties:
+                raise ValueError(f"Поле '{explicit}' ({kind}) не найдено в базе данных")
+            return explicit, schema_properties[explicit].get('type')
+        
+        for name in candidates:
+            if schema_properties.get(name, {}).get('type') in allowed_types:
+                return name, schema_properties[name]['type']
+        
+        for name, info in schema_properties.items():
+            if info.get('type') == allowed_types[0]:
+                return name, info['type']
+        
+        return None
+    
+    def compile_extractor(self, schema_properties: Dict[str, Any]) -> Callable[[Dict[str, Any]], ArticleRecord]:
+        """
+        Сборка экстрактора под конкретную схему базы данных
+        
+        Названия и типы полей определяются один раз, после чего экстрактор
+        применяется ко всем страницам без перебора вариантов названий.
+        
+        Args:
+            schema_properties: Описание полей из ответа GET databases/{id}
+            
+        Returns:
+            Функция, возвращающая информацию о статье для страницы Notion
+        """
+        title_field = self._resolve_property(schema_properties, 'title', TITLE_FIELD_CANDIDATES,
+                                             ('title', 'rich_text'))
+        url_field = self._resolve_property(schema_properties, 'url', URL_FIELD_CANDIDATES,
+                                           ('url', 'rich_text'))
+        
+        self.property_types = {name: prop.get('type') for name, prop in schema_properties.items()}
+        # Запрашиваем у API только поля, которые читает экстрактор
+        # (ID в схеме уже закодированы для URL, а requests кодирует параметры сам)
+        used_fields = [field[0] for field in (title_field, url_field) if field] + [self.date_property]
+        self.projected_properties = [unquote(schema_properties[name]['id']) for name in used_fields
+                                     if schema_properties.get(name, {}).get('id')] or None
+        
+        def no_value(properties):
+            return None
+        
+        get_title = no_value
+        if title_field:
+            title_name, title_type = title_field
             
-            # Получаем название статьи
-            title = "Без названия"
+            def get_title(properties):
+                return rich_text_to_plain((properties.get(title_name) or {}).get(title_type) or [])
+        
+        get_url = no_value
+        if url_field:
+            url_name, url_type = url_field
+            if url_type == 'url':
+                def get_url(properties):
+                    return (properties.get(url_name) or {}).get('url')
+            elif url_type in ('rich_text', 'title'):
+                def get_url(properties):
+                    rich_text = (properties.get(url_name) or {}).get(url_type) or []
+                    return rich_text_link(rich_text) or rich_text_to_plain(rich_text)
+        
+        date_name = self.date_property
+        
+        def extractor(article):
             properties = article.get('properties', {})
+            return ArticleRecord(
+                get_title(properties) or NO_TITLE,
+                get_url(properties) or NO_URL,
+                article['id'],
+                ((properties.get(date_name) or {}).get('date') or {}).get('start') or "",
+                article.get('last_edited_time', "")
+            )
+        
+        return extractor
+    
+    def extract_article_info(self, article: Dict[str, Any]) -> ArticleRecord:
+        """
+        Извлечение информации об одной статье (название, URL статьи и Notion URL,
+        а также ID страницы, дата и время последнего изменения)
+        
+        Если экстрактор уже собран по схеме базы данных, используется он,
+        иначе поля ищутся по известным названиям.
+        
+        Args:
+            article: Страница из Notion
             
-            # Ищем поле с названием статьи (обычно это title или Name)
-            for field_name in ['Name', 'Title', 'Название', 'Заголовок', 'title', 'name']:
-                if field_name in properties:
-                    field_value = properties[field_name]
-                    if field_value.get('type') == 'title' and field_value.get('title'):
-                        title = field_value['title'][0].get('text', {}).get('content', 'Без названия')
-                        break
-                    elif field_value.get('type') == 'rich_text' and field_value.get('rich_text'):
-                        title = field_value['rich_text'][0].get('text', {}).get('content', 'Без названия')
-                        break
-                    elif field_value.get('type') == 'text' and field_value.get('text'):
-                        title = field_value['text'][0].get('content', 'Без названия')
+        Returns:
+            Запись с информацией о статье (поддерживает доступ как к словарю)
+        """
+        if self.extractor is not None:
+            return self.extractor(article)
+        
+        # ID страницы (из него строится Notion URL)
+        page_id = article["id"]
+        
+        # Получаем название статьи
+        title = NO_TITLE
+        properties = article.get('properties', {})
+        
+        # Ищем поле с названием статьи (обычно это title или Name)
+        for field_name in TITLE_FIELD_CANDIDATES:
+            if field_name in properties:
+                field_value = properties[field_name]
+                if field_value.get('type') == 'title' and field_value.get('title'):
+                    title = rich_text_to_plain(field_value['title']) or NO_TITLE
+                    break
+                elif field_value.get('type') == 'rich_text' and field_value.get('rich_text'):
+                    title = rich_text_to_plain(field_value['rich_text']) or NO_TITLE
+                    break
+                elif field_value.get('type') == 'text' and field_value.get('text'):
+                    title = field_value['text'][0].get('content', NO_TITLE)
+                    break
+        
+        # Получаем URL статьи из поля URL
+        article_url = NO_URL
+        for field_name in URL_FIELD_CANDIDATES:
+            if field_name in properties:
+                field_value = properties[field_name]
+                if field_value.get('type') == 'url' and field_value.get('url'):
+                    article_url = field_value['url']
+                    break
+                elif field_value.get('type') == 'rich_text' and field_value.get('rich_text'):
+                    rich_text = field_value['rich_text']
+                    link = rich_text_link(rich_text) or rich_text_to_plain(rich_text)
+                    if link:
+                        article_url = link
                         break
+        
+        return ArticleRecord(title, article_url, page_id, self.page_date(article),
+                             article.get('last_edited_time', ""))
+    
+    def extract_articles_info(self, articles: List[Dict[str, Any]]) -> List[ArticleRecord]:
+        """
+        Извлечение информации о статьях (название, URL статьи и Notion URL)
+        
+        Args:
+            articles: Список статей из Notion
             
-            # Получаем URL статьи из поля URL
-            article_url = "Нет URL"
-            for field_name in ['URL', 'url', 'Url', 'Ссылка', 'ссылка']:
-                if field_name in properties:
-                    field_value = properties[field_name]
-                    if field_value.get('type') == 'url' and field_value.get('url'):
-                        article_url = field_value['url']
-                        break
-                    elif field_value.get('type') == 'rich_text' and field_value.get('rich_text'):
-                        rich_text = field_value['rich_text']
-                        if rich_text and rich_text[0].get('text', {}).get('link', {}).get('url'):
-                            article_url = rich_text[0]['text']['link']['url']
-                            break
-                        elif rich_text and rich_text[0].get('text', {}).get('content'):
-                            article_url = rich_text[0]['text']['content']
-                            break
-            
-            articles_info.append({
-                'title': title,
-                'article_url': article_url,
-                'notion_url': notion_url
-            })
+        Returns:
+            Список записей с информацией о статьях
+        """
+        return [self.extract_article_info(article) for article in articles]
+    
+    def iter_articles_info(self, articles: Iterable[Dict[str, Any]]) -> Iterator[ArticleRecord]:
+        """
+        Потоковое извлечение информации о статьях по мере поступления страниц
         
-        return articles_info
+        Args:
+            articles: Поток статей из Notion
+            
+        Yields:
+            Записи с информацией о статьях
+        """
+        for article in articles:
+            yield self.extract_article_info(article)
+    
+    CSV_HEADER = "Название статьи,URL статьи,Notion URL\n"
+    
+    @staticmethod
+    def csv_path(output_file: str) -> str:
+        """Приведение имени выходного файла к расширению .csv"""
+        if not output_file.endswith('.csv'):
+            output_file = output_file.replace('.txt', '.csv')
+        return output_file
+    
+    @staticmethod
+    def format_csv_row(article: Dict[str, str]) -> str:
+        """
+        Формирование строки CSV для одной статьи
+        
+        Args:
+            article: Информация о статье (название, URL статьи, Notion URL)
+            
+        Returns:
+            Строка CSV с переводом строки
+        """
+        # Экранируем кавычки и запятые в названии
+        title = article['title'].replace('"', '""')
+        if ',' in title or '"' in title:
+            title = f'"{title}"'
+        
+        # Экранируем URL
+        article_url = article['article_url'].replace('"', '""')
+        if ',' in article_url or '"' in article_url:
+            article_url = f'"{article_url}"'
+        
+        notion_url = article['notion_url'].replace('"', '""')
+        if ',' in notion_url or '"' in notion_url:
+            notion_url = f'"{notion_url}"'
+        
+        return f"{title},{article_url},{notion_url}\n"
     
     def save_articles_to_file(self, articles_info: List[Dict[str, str]], output_file: str):
         """
@@ -153,41 +625,500 @@ class NotionArticleFinder:
         Args:
             articles_info: Список информации о статьях (название, URL статьи, Notion URL)
             output_file: Путь к выходному файлу
+            
+        Returns:
+            True, если файл записан
         """
         try:
             # Определяем расширение файла
-            if not output_file.endswith('.csv'):
-                output_file = output_file.replace('.txt', '.csv')
+            output_file = self.csv_path(output_file)
             
             with open(output_file, 'w', encoding='utf-8') as f:
                 # Записываем заголовки CSV
-                f.write("Название статьи,URL статьи,Notion URL\n")
+                f.write(self.CSV_HEADER)
                 
                 # Записываем данные
                 for article in articles_info:
-                    # Экранируем кавычки и запятые в названии
-                    title = article['title'].replace('"', '""')
-                    if ',' in title or '"' in title:
-                        title = f'"{title}"'
-                    
-                    # Экранируем URL
-                    article_url = article['article_url'].replace('"', '""')
-                    if ',' in article_url or '"' in article_url:
-                        article_url = f'"{article_url}"'
-                    
-                    notion_url = article['notion_url'].replace('"', '""')
-                    if ',' in notion_url or '"' in notion_url:
-                        notion_url = f'"{notion_url}"'
-                    
-                    f.write(f"{title},{article_url},{notion_url}\n")
+                    f.write(self.format_csv_row(article))
             
             print(f"Статьи успешно сохранены в CSV файл: {output_file}")
             print(f"Найдено статей: {len(articles_info)}")
+            return True
             
         except IOError as e:
             print(f"Ошибка при сохранении файла: {e}")
+            self.error = f"Ошибка при сохранении файла: {e}"
+            return False
+    
+    def save_articles_stream(self, articles_info: Iterable[Dict[str, str]], output_file: str,
+                             flush_every: int = 100) -> int:
+        """
+        Потоковая запись информации о статьях в CSV файл построчно
+        
+        Строки пишутся по мере поступления и периодически сбрасываются на диск,
+        поэтому в памяти не накапливается весь результат.
+        
+        Args:
+            articles_info: Поток информации о статьях
+            output_file: Путь к выходному файлу
+            flush_every: Сбрасывать буфер на диск каждые N строк
+            
+        Returns:
+            Число записанных статей
+        """
+        output_file = self.csv_path(output_file)
+        written = 0
+        
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(self.CSV_HEADER)
+            
+            for article in articles_info:
+                f.write(self.format_csv_row(article))
+                written += 1
+                if written % flush_every == 0:
+                    f.flush()
+        
+        return written
+    
+    def output_path(self, output_file: str, export_format: str = "csv") -> str:
+        """Путь к выходному файлу с расширением выбранного формата"""
+        if export_format == "csv":
+            return self.csv_path(output_file)
+        return export_path(output_file, export_format)
+    
+    @staticmethod
+    def export_columns(export_format: str, with_sources: bool = False) -> Optional[Tuple[str, ...]]:
+        """
+        Колонки выгрузки для формата
+        
+        Returns:
+            None для прежнего csv без загрузки исходных статей, иначе список колонок
+            (с колонками статуса, итогового URL и размера при with_sources)
+        """
+        if not with_sources:
+            return None if export_format == "csv" else EXPORT_COLUMNS
+        base = CSV_COLUMNS if export_format == "csv" else EXPORT_COLUMNS
+        return base + SOURCE_COLUMNS
+    
+    @classmethod
+    def delta_columns(cls, export_format: str, with_sources: bool = False) -> Tuple[str, ...]:
+        """Колонки выгрузки изменений: колонки формата и колонка change"""
+        return (cls.export_columns(export_format, with_sources) or CSV_COLUMNS) + ("change",)
+    
+    @staticmethod
+    def delta_rows(changes: Iterable[Tuple[ArticleRecord, str]], columns: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        """Строки выгрузки изменений из пар (запись, тип изменения)"""
+        return [dict({column: record.get(column) for column in columns[:-1]}, change=change)
+                for record, change in changes]
+    
+    def save_articles_export(self, articles_info: Iterable[Dict[str, str]], output_file: str,
+                             export_format: str, columns: Optional[Tuple[str, ...]] = None) -> int:
+        """
+        Запись информации о статьях через экспортер формата (csv.gz, csv.zst, jsonl, parquet, arrow)
+        
+        Формат csv с явным списком колонок пишется через модуль csv.
+        
+        Args:
+            articles_info: Список или поток информации о статьях
+            output_file: Путь к выходному файлу (расширение приводится к формату)
+            export_format: Формат выгрузки
+            columns: Колонки выгрузки (по умолчанию: все колонки записи)
+            
+        Returns:
+            Число записанных статей
+        """
+        columns = columns or EXPORT_COLUMNS
+        if export_format == "csv":
+            exporter = CsvExporter(self.csv_path(output_file), columns)
+        else:
+            exporter = create_exporter(export_format, output_file, columns)
+        with exporter:
+            return exporter.write_all(articles_info)
+    
+    def save_articles(self, articles_info: List[Dict[str, str]], output_file: str,
+                      export_format: str = "csv", columns: Optional[Tuple[str, ...]] = None):
+        """
+        Сохранение информации о статьях в выбранном формате
+        
+        Формат csv сохраняет прежний вид файла (три колонки), остальные
+        форматы включают все колонки выгрузки.
+        
+        Args:
+            articles_info: Список информации о статьях
+            output_file: Путь к выходному файлу
+            export_format: Формат выгрузки (по умолчанию: csv)
+            columns: Колонки выгрузки (None - колонки формата по умолчанию)
+            
+        Returns:
+            True, если файл записан
+        """
+        if export_format == "csv" and columns is None:
+            return self.save_articles_to_file(articles_info, output_file)
+        
+        output_file = self.output_path(output_file, export_format)
+        try:
+            self.save_articles_export(articles_info, output_file, export_format, columns)
+            print(f"Статьи успешно сохранены в файл ({export_format}): {output_file}")
+            print(f"Найдено статей: {len(articles_info)}")
+            return True
+        except (IOError, ImportError) as e:
+            print(f"Ошибка при сохранении файла: {e}")
+            self.error = f"Ошибка при сохранении файла: {e}"
+            return False
+
+
+class NotionArticleFinder(BaseArticleFinder):
+    def __init__(self, notion_token: str, database_id: str,
+                 transport: Optional[NotionTransport] = None,
+                 cache: Optional[ResponseCache] = None,
+                 refresh_cache: bool = False,
+                 property_mapping: Optional[Dict[str, Optional[str]]] = None,
+                 keep_raw: bool = False,
+                 incremental_json: bool = False,
+                 filters: Optional[List[Dict[str, Any]]] = None,
+                 sorts: Optional[List[Dict[str, Any]]] = None,
+                 rate_limiter: Optional[Union[RateLimiter, SharedRateLimiter]] = None):
+        """
+        Инициализация клиента Notion API
+        
+        Args:
+            notion_token: Токен доступа к Notion API
+            database_id: ID базы данных "Обзор рынка технологии машинного обучения"
+            transport: Транспорт для запросов к API (по умолчанию создается свой)
+            cache: Дисковый кэш ответов API (по умолчанию не используется)
+            refresh_cache: Не читать из кэша, но сохранять в него свежие ответы
+            property_mapping: Явное сопоставление полей {"title", "url", "date"} с полями базы
+            keep_raw: Сохранять исходные страницы Notion в raw_pages при выполнении run
+            incremental_json: Разбирать ответы API инкрементально (нужен пакет ijson)
+            filters: Дополнительные условия фильтра Notion, передаваемые в запрос
+            sorts: Сортировки Notion для запроса по датам
+            rate_limiter: Ограничитель частоты для своего транспорта (если transport не задан)
+        """
+        super().__init__(notion_token, database_id, property_mapping, keep_raw, filters, sorts)
+        if transport is None:
+            from notion_transport import NotionTransport
+            transport = NotionTransport(notion_token, rate_limiter=rate_limiter)
+        self.transport = transport
+        self.metrics = self.transport.metrics
+        self.cache = cache
+        self.refresh_cache = refresh_cache
+        if incremental_json:
+            require_incremental()
+        self.incremental_json = incremental_json
+    
+    def resolve_extractor(self):
+        """
+        Однократное получение схемы базы данных и сборка экстрактора полей
+        
+        Если схему получить не удалось, извлечение работает по известным названиям полей.
+        """
+        if self.extractor is not None:
+            return
+        
+        try:
+            schema = loads(self.transport.get(self.database_path).content)
+        except requests.exceptions.RequestException as e:
+            print(f"Не удалось получить схему базы данных ({e}), поля будут определяться по названиям")
+            return
+        
+        self.extractor = self.compile_extractor(schema.get('properties', {}))
+    
+    def fetch_query_page(self, query: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Один запрос databases/{id}/query с учетом кэша
+        
+        Args:
+            query: Тело запроса (включая start_cursor)
+            use_cache: Читать и сохранять ответ в кэше (False - для запросов с фильтром
+                по времени изменения: их ответ из кэша пропустил бы свежие правки)
+            
+        Returns:
+            Декодированный ответ API
+        """
+        data = self._cached_query_page(query) if use_cache else None
+        if data is not None:
+            return data
+        
+        response = self.transport.post(self.query_path, json=query, params=self.query_params)
+        with self.metrics.stage("decode"):
+            data = loads(response.content)
+        
+        if self.cache and use_cache:
+            self.cache.put(self.database_id, query, data, self.query_params)
+        return data
+    
+    def _cached_query_page(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Ответ на запрос из кэша (None, если кэш отключен, обновляется или записи нет)"""
+        if self.cache and not self.refresh_cache:
+            return self.cache.get(self.database_id, query, self.query_params)
+        return None
+    
+    def stream_query_page(self, query: Dict[str, Any], meta: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Один запрос databases/{id}/query с инкрементальным разбором ответа
+        
+        Страницы выдаются по одной, пока тело ответа еще читается из сети.
+        Если включен кэш, ответ собирается и сохраняется после прочтения.
+        Оборванный ответ запрашивается повторно, пока из него не выдано ни
+        одной страницы; после этого обрыв выбрасывается как RequestException.
+        
+        Args:
+            query: Тело запроса (включая start_cursor)
+            meta: Словарь, в который записываются has_more и next_cursor
+            
+        Yields:
+            Страницы из ответа API
+        """
+        from notion_transport import StreamBody
+        
+        attempt = 0
+        while True:
+            collected = [] if self.cache is not None else None
+            yielded = 0
+            meta.clear()
+            # Ошибки самого запроса повторяет транспорт, здесь - только обрыв тела
+            response = self.transport.post(self.query_path, json=query, params=self.query_params, stream=True)
+            try:
+                with response:
+                    response.raw.decode_content = True
+                    for page in iter_query_results(StreamBody(response.raw), meta):
+                        if collected is not None:
+                            collected.append(page)
+                        yielded += 1
+                        yield page
+                break
+            except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError):
+                self.transport.metrics.record_error()
+                if yielded or attempt >= self.transport.max_retries:
+                    raise
+                self.transport.wait_before_retry(attempt)
+                attempt += 1
+        
+        if collected is not None:
+            self.cache.put(self.database_id, query, {
+                "object": "list",
+                "results": collected,
+                "has_more": meta.get("has_more", False),
+                "next_cursor": meta.get("next_cursor"),
+            }, self.query_params)
+    
+    def iter_query(self, query: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Обход всех страниц по запросу с выдачей по одной
+        
+        При incremental_json ответы разбираются потоково, иначе
+        декодируются целиком (см. query_pages).
+        
+        Args:
+            query: Тело запроса (фильтр, сортировка)
+            
+        Yields:
+            Страницы из ответов API
+        """
+        if not self.incremental_json:
+            for results in self.query_pages(query):
+                yield from results
+            return
+        
+        query = dict(query)
+        
+        while True:
+            data = self._cached_query_page(query)
+            if data is not None:
+                results, next_cursor = self.parse_query_response(data)
+                yield from results
+            else:
+                meta: Dict[str, Any] = {}
+                yield from self.stream_query_page(query, meta)
+                next_cursor = meta.get("next_cursor") if meta.get("has_more") else None
+            
+            if not next_cursor:
+                break
+            query["start_cursor"] = next_cursor
+    
+    def query_pages(self, query: Dict[str, Any], use_cache: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Постраничный запрос к базе данных с обходом курсоров
+        
+        Args:
+            query: Тело запроса (фильтр, сортировка)
+            use_cache: Использовать кэш ответов (см. fetch_query_page)
+            
+        Yields:
+            Список страниц из очередного ответа API
+        """
+        for results, _ in self.query_responses(query, use_cache):
+            yield results
+    
+    def query_responses(self, query: Dict[str, Any],
+                        use_cache: bool = True) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        Постраничный запрос с выдачей курсора следующего ответа
+        
+        Args:
+            query: Тело запроса (фильтр, сортировка; start_cursor - продолжить с курсора)
+            use_cache: Использовать кэш ответов (см. fetch_query_page)
+            
+        Yields:
+            Пары (страницы очередного ответа API, курсор следующего ответа или None)
+        """
+        query = dict(query)
+        
+        while True:
+            results, next_cursor = self.parse_query_response(self.fetch_query_page(query, use_cache))
+            yield results, next_cursor
+            
+            if not next_cursor:
+                break
+            query["start_cursor"] = next_cursor
+    
+    def iter_articles_by_date(self, start_date: str, end_date: str) -> Iterator[Dict[str, Any]]:
+        """
+        Потоковый поиск статей по дате: страницы выдаются по мере получения
+        очередного ответа API, в памяти держится не больше одной страницы ответа
+        
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            
+        Yields:
+            Найденные статьи
+        """
+        yield from self.iter_query(self.build_date_filter(start_date, end_date))
+    
+    def search_articles_by_date(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """
+        Поиск статей в базе данных по дате
+        
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            
+        Returns:
+            Список найденных статей
+        """
+        all_results = []
+        
+        try:
+            for results in self.query_pages(self.build_date_filter(start_date, end_date)):
+                all_results.extend(results)
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при запросе к Notion API: {e}")
+            self.error = f"Ошибка при запросе к Notion API: {e}"
+            return []
+        
+        return all_results
     
-    def run(self, start_date: str, end_date: str, output_file: str = "notion_articles_urls.txt"):
+    def search_article_records(self, start_date: str, end_date: str, shard: Optional[str] = None,
+                               max_workers: int = 4) -> List[ArticleRecord]:
+        """
+        Поиск статей с извлечением полей сразу по мере получения ответов API
+        
+        В отличие от search_articles_by_date исходный JSON страниц не накапливается:
+        каждая страница ответа превращается в компактные записи и отбрасывается.
+        
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            shard: Размер шарда (day, week, month) для параллельного поиска
+            max_workers: Число параллельных запросов в режиме шардирования
+            
+        Returns:
+            Список записей о найденных статьях
+        """
+        if shard:
+            pages = self.search_articles_sharded(start_date, end_date, shard, max_workers)
+        else:
+            pages = self.iter_articles_by_date(start_date, end_date)
+        
+        try:
+            return list(self.iter_articles_info(pages))
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при запросе к Notion API: {e}")
+            self.error = f"Ошибка при запросе к Notion API: {e}"
+            return []
+    
+    def _start_shard(self, executor: ThreadPoolExecutor, start_date: str, end_date: str,
+                     stop: threading.Event) -> Iterator[Dict[str, Any]]:
+        """
+        Запуск запроса одного шарда в пуле и потоковая выдача его страниц
+        
+        Страницы передаются из рабочего потока через очередь размером в один
+        ответ API: шард, который слияние еще не читает, ждет места в очереди,
+        а не копит все свои страницы в памяти. После stop рабочий поток
+        перестает ждать и завершается.
+        """
+        pages = queue.Queue(maxsize=MAX_PAGE_SIZE)
+        done = object()
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def worker():
+            if stop.is_set():
+                return
+            try:
+                for page in self.iter_query(self.build_date_filter(start_date, end_date, sort_by_date=True)):
+                    if not put(page):
+                        return
+            except BaseException as e:
+                put(e)
+            finally:
+                put(done)
+        
+        def drain():
+            while True:
+                item = pages.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        
+        executor.submit(worker)
+        return drain()
+    
+    def search_articles_sharded(self, start_date: str, end_date: str,
+                                granularity: str = "week", max_workers: int = 4) -> Iterator[Dict[str, Any]]:
+        """
+        Параллельный поиск статей с разбиением диапазона дат на шарды
+        
+        Каждый шард запрашивается в отдельном потоке с сортировкой по дате,
+        результаты сливаются в порядке дат (k-way merge) и дедуплицируются по id.
+        
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            granularity: Размер шарда: day, week или month
+            max_workers: Максимальное число одновременных запросов
+            
+        Yields:
+            Найденные статьи в порядке возрастания даты
+        """
+        shards = split_date_range(start_date, end_date, granularity)
+        
+        stop = threading.Event()
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                streams = [self._start_shard(executor, shard_start, shard_end, stop)
+                           for shard_start, shard_end in shards]
+                yield from self.merge_shards(streams, [shard_start for shard_start, _ in shards])
+            finally:
+                # Слияние прервано (ошибка API или потребитель остановился): потоки не ждут очередь
+                stop.set()
+    
+    def run(self, start_date: str, end_date: str, output_file: str = "notion_articles_urls.txt",
+            shard: Optional[str] = None, max_workers: int = 4, stream: bool = False,
+            export_format: str = "csv", bodies: Optional[ArticleBodyExporter] = None,
+            sources: Optional[SourceFetcher] = None, delta: Optional[ExportIndex] = None,
+            search_index: Optional[SearchIndex] = None):
         """
         Основной метод для выполнения поиска и сохранения информации о статьях
         
@@ -195,31 +1126,606 @@ class NotionArticleFinder:
             start_date: Начальная дата в формате YYYY-MM-DD
             end_date: Конечная дата в формате YYYY-MM-DD
             output_file: Путь к выходному файлу
+            shard: Размер шарда (day, week, month) для параллельного поиска
+            max_workers: Число параллельных запросов в режиме шардирования
+            stream: Потоковый режим: статьи пишутся в файл по мере получения
+            export_format: Формат выгрузки (csv, csv.gz, csv.zst, jsonl, parquet, arrow)
+            bodies: Выгрузка текста статей (None - только список статей)
+            sources: Загрузка исходных статей по URL (None - без проверки ссылок)
+            delta: Индекс прошлых выгрузок; в файл пишутся только новые, измененные и удаленные статьи
+            search_index: Полнотекстовый индекс, пополняемый найденными статьями
+            
+        Returns:
+            Число найденных статей (при ошибке API или записи файла текст ошибки - в self.error)
         """
+        self.error = None
         print(f"Поиск статей с {start_date} по {end_date}...")
+        with self.metrics.stage("schema"):
+            self.resolve_extractor()
+        
+        if stream:
+            if shard:
+                articles = self.search_articles_sharded(start_date, end_date, shard, max_workers)
+            else:
+                articles = self.iter_articles_by_date(start_date, end_date)
+            with self.metrics.stage("stream"):
+                return self.run_stream(articles, output_file, export_format, bodies, sources, search_index)
         
-        # Поиск статей
-        articles = self.search_articles_by_date(start_date, end_date)
+        if shard:
+            print(f"Параллельный поиск: шарды по {shard}, потоков: {max_workers}")
         
-        if not articles:
+        if self.keep_raw:
+            # Поиск статей с сохранением исходных страниц
+            with self.metrics.stage("search"):
+                if shard:
+                    try:
+                        articles = list(self.search_articles_sharded(start_date, end_date, shard, max_workers))
+                    except requests.exceptions.RequestException as e:
+                        print(f"Ошибка при запросе к Notion API: {e}")
+                        self.error = f"Ошибка при запросе к Notion API: {e}"
+                        articles = []
+                else:
+                    articles = self.search_articles_by_date(start_date, end_date)
+            self.raw_pages = articles
+            
+            # Извлечение информации о статьях (название и URL)
+            with self.metrics.stage("extract"):
+                articles_info = self.extract_articles_info(articles)
+        else:
+            # Поиск статей: поля извлекаются из каждой страницы ответа сразу после получения
+            with self.metrics.stage("search"):
+                articles_info = self.search_article_records(start_date, end_date, shard, max_workers)
+        
+        if not articles_info:
             print("Статьи не найдены или произошла ошибка при поиске.")
-            return
+            return 0
         
-        # Извлечение информации о статьях (название и URL)
-        articles_info = self.extract_articles_info(articles)
+        if sources is not None:
+            articles_info = self.fetch_sources(articles_info, sources)
         
         # Сохранение в файл
-        self.save_articles_to_file(articles_info, output_file)
+        if delta is not None:
+            self.export_delta(articles_info, output_file, export_format, delta, start_date, end_date,
+                              sources is not None)
+        else:
+            with self.metrics.stage("write"):
+                self.save_articles(articles_info, output_file, export_format,
+                                   self.export_columns(export_format, sources is not None))
+        if self.error:
+            # Файл не записан, текст ошибки - в self.error
+            return 0
+        
+        if bodies is not None:
+            self.export_bodies(articles_info, bodies)
+        if search_index is not None:
+            self.index_articles(articles_info, search_index, bodies)
+        return len(articles_info)
+    
+    def run_stream(self, articles: Iterable[Dict[str, Any]], output_file: str,
+                   export_format: str = "csv", bodies: Optional[ArticleBodyExporter] = None,
+                   sources: Optional[SourceFetcher] = None, search_index: Optional[SearchIndex] = None):
+        """
+        Потоковая выгрузка: каждая страница ответа сразу извлекается и пишется в файл
+        
+        При ошибке API уже записанные строки остаются в файле.
+        
+        Args:
+            articles: Поток статей из Notion
+            output_file: Путь к выходному файлу
+            export_format: Формат выгрузки (по умолчанию: csv)
+            bodies: Выгрузка текста статей; статьи ставятся в очередь по мере получения
+            sources: Загрузка исходных статей; идет параллельно, порядок строк сохраняется
+            search_index: Полнотекстовый индекс; с bodies статьи индексируются после выгрузки текста
+            
+        Returns:
+            Число записанных статей
+        """
+        output_file = self.output_path(output_file, export_format)
+        columns = self.export_columns(export_format, sources is not None)
+        counter = [0]
+        indexer = BodyIndexer(search_index, bodies) if bodies is not None and search_index is not None else None
+        
+        def counted(rows):
+            for row in rows:
+                counter[0] += 1
+                if indexer is not None:
+                    # Статья индексируется, когда ее текст сохранен
+                    indexer.submit(row)
+                elif bodies is not None:
+                    bodies.submit(row)
+                elif search_index is not None:
+                    search_index.add(row)
+                yield row
+        
+        rows = self.iter_articles_info(articles)
+        if sources is not None:
+            rows = sources.iter_fetch(rows)
+        
+        try:
+            if columns is None:
+                self.save_articles_stream(counted(rows), output_file)
+            else:
+                self.save_articles_export(counted(rows), output_file, export_format, columns)
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при запросе к Notion API: {e}")
+            print(f"Записано статей до ошибки: {counter[0]} ({output_file})")
+            self.error = f"Ошибка при запросе к Notion API: {e}"
+            return counter[0]
+        except (IOError, ImportError) as e:
+            print(f"Ошибка при сохранении файла: {e}")
+            self.error = f"Ошибка при сохранении файла: {e}"
+            return counter[0]
+        
+        if not counter[0]:
+            print("Статьи не найдены.")
+        if export_format == "csv":
+            print(f"Статьи успешно сохранены в CSV файл: {output_file}")
+        else:
+            print(f"Статьи успешно сохранены в файл ({export_format}): {output_file}")
+        print(f"Найдено статей: {counter[0]}")
+        
+        if sources is not None:
+            self.report_sources(sources.stats)
+        if bodies is not None:
+            self.report_bodies(bodies.wait(), bodies.output_dir)
+        if indexer is not None:
+            indexer.finish()
+        if search_index is not None:
+            # Статьи уже добавлены по мере получения: запись остатка и итоги
+            self.index_articles((), search_index)
+        return counter[0]
+    
+    def run_checkpointed(self, start_date: str, end_date: str, output_file: str,
+                         checkpoint: ExportCheckpoint, resume: bool = False, export_format: str = "csv",
+                         bodies: Optional[ArticleBodyExporter] = None,
+                         sources: Optional[SourceFetcher] = None,
+                         search_index: Optional[SearchIndex] = None) -> int:
+        """
+        Потоковая выгрузка с контрольной точкой после каждого ответа API
+        
+        Строки очередного ответа записываются и сбрасываются на диск, затем
+        в контрольную точку сохраняются курсор следующего ответа, число строк
+        и длина файла. При ошибке API прогресс не теряется: с resume=True
+        выгрузка продолжается с сохраненного курсора и дописывает файл.
+        
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            output_file: Путь к выходному файлу
+            checkpoint: Контрольная точка выгрузки
+            resume: Продолжить выгрузку из контрольной точки
+            export_format: Формат выгрузки (csv или jsonl)
+            bodies: Выгрузка текста статей; статьи ставятся в очередь по мере получения
+            sources: Загрузка исходных статей по URL
+            search_index: Полнотекстовый индекс, пополняемый записанными статьями
+            
+        Returns:
+            Общее число записанных статей (включая записанные до продолжения)
+        """
+        if export_format not in RESUMABLE_FORMATS:
+            print(f"Ошибка: контрольные точки поддерживаются только для форматов {', '.join(RESUMABLE_FORMATS)}")
+            return 0
+        
+        self.error = None
+        print(f"Поиск статей с {start_date} по {end_date}...")
+        with self.metrics.stage("schema"):
+            self.resolve_extractor()
+        
+        output_file = self.output_path(output_file, export_format)
+        query = self.build_date_filter(start_date, end_date)
+        columns = self.export_columns(export_format, sources is not None)
+        export_key = (self.database_id, query, self.query_params, output_file, export_format, columns)
+        
+        appending = False
+        if resume:
+            state = checkpoint.load()
+            if state is None:
+                print(f"Контрольная точка {checkpoint.path} не найдена, выгрузка начнется заново")
+            elif not checkpoint.matches(*export_key):
+                print("Контрольная точка относится к другой выгрузке (фильтр, поля или файл отличаются), "
+                      "выгрузка начнется заново")
+            elif not os.path.exists(output_file) or os.path.getsize(output_file) < state["offset"]:
+                print(f"Файл {output_file} короче сохраненного прогресса, выгрузка начнется заново")
+            else:
+                appending = True
+        
+        if appending:
+            # Строки, записанные после последней контрольной точки, будут получены повторно
+            os.truncate(output_file, state["offset"])
+            written = state["rows"]
+            if state.get("done"):
+                print(f"Все ответы API уже записаны ({written} статей), выгрузка завершается без запросов")
+            else:
+                if state["cursor"]:
+                    query["start_cursor"] = state["cursor"]
+                print(f"Продолжение выгрузки: уже записано статей: {written}")
+        else:
+            checkpoint.start(*export_key)
+            written = 0
+        finished = appending and state.get("done", False)
+        indexer = BodyIndexer(search_index, bodies) if bodies is not None and search_index is not None else None
+        
+        if columns is None:
+            # Прежний формат csv: три колонки, строки через \n
+            exporter = CsvExporter(output_file, CSV_COLUMNS, append=appending, lineterminator="\n")
+        elif export_format == "csv":
+            exporter = CsvExporter(output_file, columns, append=appending)
+        else:
+            exporter = JsonlExporter(output_file, columns, append=appending)
+        
+        try:
+            with exporter, self.metrics.stage("stream"):
+                if not appending:
+                    checkpoint.save(None, 0, exporter.sync())
+                responses = iter(()) if finished else self.query_responses(query)
+                for results, next_cursor in responses:
+                    rows = self.iter_articles_info(results)
+                    if sources is not None:
+                        rows = sources.iter_fetch(rows)
+                    for row in rows:
+                        exporter.write(row)
+                        written += 1
+                        if indexer is not None:
+                            # Статья индексируется, когда ее текст сохранен
+                            indexer.submit(row)
+                        elif bodies is not None:
+                            bodies.submit(row)
+                        elif search_index is not None:
+                            search_index.add(row)
+                    checkpoint.save(next_cursor, written, exporter.sync(), done=next_cursor is None)
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при запросе к Notion API: {e}")
+            print(f"Записано статей до ошибки: {written} ({output_file})")
+            print(f"Прогресс сохранен в {checkpoint.path}, для продолжения запустите с --resume")
+            self.error = f"Ошибка при запросе к Notion API: {e}"
+            return written
+        except (IOError, ImportError) as e:
+            print(f"Ошибка при сохранении файла: {e}")
+            self.error = f"Ошибка при сохранении файла: {e}"
+            return written
+        
+        checkpoint.clear()
+        print(f"Статьи успешно сохранены в файл ({export_format}): {output_file}")
+        print(f"Найдено статей: {written}")
+        
+        if sources is not None:
+            self.report_sources(sources.stats)
+        if bodies is not None:
+            self.report_bodies(bodies.wait(), bodies.output_dir)
+        if indexer is not None:
+            indexer.finish()
+        if search_index is not None:
+            # Статьи уже добавлены по мере получения: запись остатка и итоги
+            self.index_articles((), search_index)
+        return written
+    
+    def export_delta(self, articles_info: List[ArticleRecord], output_file: str, export_format: str,
+                     index: ExportIndex, start_date: str, end_date: str, with_sources: bool = False) -> int:
+        """
+        Дельта-выгрузка относительно прошлых запусков
+        
+        В файл пишутся только новые и измененные статьи и статьи из индекса с датой
+        в диапазоне, которых больше нет в результатах; колонка change содержит
+        new, changed или removed. Статьи со ссылкой, уже выгруженной под другой
+        страницей, считаются дублями и пропускаются. Индекс обновляется после
+        успешной записи файла.
+        
+        Args:
+            articles_info: Найденные статьи
+            output_file: Путь к выходному файлу
+            export_format: Формат выгрузки
+            index: Индекс прошлых выгрузок
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            with_sources: Добавить колонки загрузки исходных статей
+            
+        Returns:
+            Число строк в дельта-файле
+        """
+        with self.metrics.stage("delta"):
+            changes, counts = index.diff(articles_info)
+            removed = index.removed(start_date, end_date, {record.page_id for record in articles_info})
+            counts[CHANGE_REMOVED] = len(removed)
+            changes.extend((record, CHANGE_REMOVED) for record in removed)
+        
+        print(f"Изменения относительно прошлых выгрузок: новых {counts[CHANGE_NEW]}, "
+              f"измененных {counts[CHANGE_CHANGED]}, удаленных {counts[CHANGE_REMOVED]}, "
+              f"дублей по URL {counts[CHANGE_DUPLICATE]}, без изменений {counts[None]}")
+        if not changes:
+            print("Изменений нет, файл не записывается.")
+            return 0
+        
+        columns = self.delta_columns(export_format, with_sources)
+        rows = self.delta_rows(changes, columns)
+        with self.metrics.stage("write"):
+            saved = self.save_articles(rows, output_file, export_format, columns)
+        if saved:
+            index.update([record for record, change in changes if change != CHANGE_REMOVED], removed)
+        return len(rows)
+    
+    def fetch_sources(self, articles_info: List[ArticleRecord], sources: SourceFetcher) -> List[ArticleRecord]:
+        """
+        Параллельная загрузка исходных статей по их URL
+        
+        Args:
+            articles_info: Записи о статьях
+            sources: Загрузчик исходных статей
+            
+        Returns:
+            Те же записи с заполненными статусом, итоговым URL и размером
+        """
+        print(f"Загрузка исходных статей: {len(articles_info)}...")
+        with self.metrics.stage("sources"):
+            articles_info = list(sources.iter_fetch(articles_info))
+        self.report_sources(sources.stats)
+        return articles_info
+    
+    @staticmethod
+    def report_sources(stats: Dict[str, int]):
+        """Итоги загрузки исходных статей"""
+        print(f"Исходные статьи: загружено {stats['fetched']}, не изменились {stats['not_modified']}, "
+              f"ошибок {stats['errors']}, без URL {stats['skipped']}, "
+              f"получено {stats['bytes'] / (1024 * 1024):.1f} МБ")
+    
+    def export_bodies(self, articles_info: List[ArticleRecord], bodies: ArticleBodyExporter):
+        """
+        Параллельная выгрузка текста найденных статей
+        
+        Args:
+            articles_info: Записи о статьях
+            bodies: Выгрузка текста статей
+        """
+        print(f"Выгрузка текста статей: {len(articles_info)}...")
+        with self.metrics.stage("bodies"):
+            stats = bodies.export_all(articles_info)
+        self.report_bodies(stats, bodies.output_dir)
+    
+    @staticmethod
+    def report_bodies(stats: Dict[str, int], output_dir: str):
+        """Итоги выгрузки текста статей"""
+        print(f"Текст статей сохранен в {output_dir}: загружено {stats['fetched']}, "
+              f"из кэша {stats['cached']}, ошибок {stats['errors']}")
+    
+    def index_articles(self, articles_info: Iterable[ArticleRecord], search_index: SearchIndex,
+                       bodies: Optional[ArticleBodyExporter] = None):
+        """
+        Пополнение полнотекстового индекса (неизмененные статьи не переиндексируются)
+        
+        Args:
+            articles_info: Записи о статьях
+            search_index: Полнотекстовый индекс
+            bodies: Выгрузка текста статей; текст берется из сохраненных файлов
+        """
+        with self.metrics.stage("index"):
+            for record in articles_info:
+                search_index.add(record, bodies.article_text(record) if bodies is not None else None)
+            search_index.flush()
+        stats = search_index.stats
+        print(f"Поисковый индекс {search_index.db_path}: статей {stats['indexed']}, "
+              f"добавлено или изменено {stats['changed']}")
+    
+    def run_sync(self, start_date: str, end_date: str, output_file: str, mirror: NotionMirror,
+                 export_format: str = "csv", bodies: Optional[ArticleBodyExporter] = None,
+                 sources: Optional[SourceFetcher] = None, delta: Optional[ExportIndex] = None,
+                 search_index: Optional[SearchIndex] = None, reconcile: Optional[bool] = None):
+        """
+        Инкрементальная синхронизация с локальным зеркалом и выгрузка из него
+        
+        Из API запрашиваются только страницы, измененные после прошлой синхронизации,
+        а выборка по датам выполняется по индексу в локальной базе.
+        
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            output_file: Путь к выходному файлу
+            mirror: Локальное зеркало базы данных
+            export_format: Формат выгрузки (по умолчанию: csv)
+            bodies: Выгрузка текста статей (None - только список статей)
+            sources: Загрузка исходных статей по URL (None - без проверки ссылок)
+            delta: Индекс прошлых выгрузок; в файл пишутся только новые, измененные и удаленные статьи
+            search_index: Полнотекстовый индекс, пополняемый выгруженными статьями
+            reconcile: Полная сверка зеркала с API (None - раз в RECONCILE_DAYS дней)
+            
+        Returns:
+            Число сохраненных статей
+        """
+        self.error = None
+        print(f"Синхронизация с зеркалом {mirror.db_path}...")
+        with self.metrics.stage("schema"):
+            self.resolve_extractor()
+        
+        try:
+            with self.metrics.stage("sync"):
+                synced = mirror.sync(self, reconcile)
+            print(f"Получено новых или измененных страниц: {synced}")
+            if mirror.removed:
+                print(f"Удалено из зеркала архивированных или удаленных страниц: {mirror.removed}")
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при запросе к Notion API: {e}")
+            print("Выгрузка будет выполнена из последнего состояния зеркала.")
+        
+        print(f"Выборка статей с {start_date} по {end_date} из зеркала...")
+        with self.metrics.stage("mirror_query"):
+            articles_info = mirror.query_by_date(self.database_id, start_date, end_date)
+        
+        if not articles_info:
+            print("Статьи не найдены.")
+            return 0
+        
+        if sources is not None:
+            articles_info = self.fetch_sources(articles_info, sources)
+        
+        if delta is not None:
+            self.export_delta(articles_info, output_file, export_format, delta, start_date, end_date,
+                              sources is not None)
+        else:
+            with self.metrics.stage("write"):
+                self.save_articles(articles_info, output_file, export_format,
+                                   self.export_columns(export_format, sources is not None))
+        if self.error:
+            # Файл не записан, текст ошибки - в self.error
+            return 0
+        
+        if bodies is not None:
+            self.export_bodies(articles_info, bodies)
+        if search_index is not None:
+            self.index_articles(articles_info, search_index, bodies)
+        return len(articles_info)
+
+
+def search_main(argv: List[str]):
+    """Подкоманда search: поиск по локальному индексу без запросов к Notion API"""
+    parser = argparse.ArgumentParser(prog="notion_article_finder.py search",
+                                     description="Полнотекстовый поиск по выгруженным статьям")
+    parser.add_argument("query", nargs="+", help="Слова для поиска или запрос FTS5 (\"фраза\", слово*, OR, NOT)")
+    parser.add_argument("--index", default=SEARCH_INDEX_PATH,
+                        help=f"Полнотекстовый индекс (по умолчанию: {SEARCH_INDEX_PATH})")
+    parser.add_argument("--database-id", help="Искать только статьи этой базы данных")
+    parser.add_argument("--start-date", help="Только статьи с датой не раньше (YYYY-MM-DD)")
+    parser.add_argument("--end-date", help="Только статьи с датой не позже (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=20, help="Максимум результатов (по умолчанию: 20)")
+    parser.add_argument("--json", action="store_true", help="Вывести результаты в JSON Lines")
+    args = parser.parse_args(argv)
+    
+    try:
+        for value in (args.start_date, args.end_date):
+            if value:
+                datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        print("Ошибка: Неверный формат даты. Используйте YYYY-MM-DD")
+        return
+    if not os.path.exists(args.index):
+        print(f"Ошибка: индекс {args.index} не найден. Он создается при выгрузке статей")
+        return
+    
+    started = time.perf_counter()
+    with SearchIndex(args.index, args.database_id) as search_index:
+        try:
+            results = search_index.search(" ".join(args.query), limit=args.limit,
+                                          start_date=args.start_date, end_date=args.end_date)
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            return
+        total = len(search_index)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    if args.json:
+        for result in results:
+            print(json.dumps(result, ensure_ascii=False))
+        return
+    
+    print(f"Найдено: {len(results)} (статей в индексе: {total}, {elapsed_ms:.1f} мс)")
+    for number, result in enumerate(results, 1):
+        print(f"\n{number}. {result['title'] or 'Без названия'} ({result['date'][:10]})")
+        if result["article_url"]:
+            print(f"   {result['article_url']}")
+        print(f"   {result['notion_url']}")
+        snippet = " ".join((result["snippet"] or "").split())
+        if snippet:
+            print(f"   {snippet}")
 
 
 def main():
     """Главная функция с настройкой аргументов командной строки"""
-    parser = argparse.ArgumentParser(description="Поиск статей в Notion Database по дате")
+    # Подкоманда search не требует токена и не обращается к API
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        search_main(sys.argv[2:])
+        return
+    
+    parser = argparse.ArgumentParser(description="Поиск статей в Notion Database по дате "
+                                                 "(поиск по выгруженным статьям: search ЗАПРОС)")
     parser.add_argument("--token", required=True, help="Notion API токен")
     parser.add_argument("--database-id", required=True, help="ID базы данных Notion")
     parser.add_argument("--start-date", required=True, help="Начальная дата (YYYY-MM-DD)")
     parser.add_argument("--end-date", required=True, help="Конечная дата (YYYY-MM-DD)")
     parser.add_argument("--output", default="notion_articles_urls.txt", help="Выходной файл")
+    parser.add_argument("--shard", choices=SHARD_GRANULARITIES,
+                        help="Разбить диапазон дат на шарды и запрашивать их параллельно")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Число параллельных запросов в режиме --shard (по умолчанию: 4)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Потоковый режим: писать статьи в файл по мере получения страниц API")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Сохранять контрольную точку после каждого ответа API (форматы csv и jsonl)")
+    parser.add_argument("--checkpoint-file",
+                        help="Файл контрольной точки (по умолчанию: <выходной файл>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Продолжить прерванную выгрузку с сохраненного курсора и дописать выходной файл")
+    parser.add_argument("--incremental-json", action="store_true",
+                        help="Разбирать ответы API инкрементально, по одной странице (нужен пакет ijson)")
+    parser.add_argument("--format", dest="export_format", default="csv",
+                        choices=("csv",) + tuple(EXPORT_FORMATS),
+                        help="Формат выгрузки: csv (по умолчанию), csv.gz, csv.zst, jsonl, parquet, arrow")
+    parser.add_argument("--bodies", metavar="DIR",
+                        help="Выгрузить текст каждой найденной статьи (дерево блоков) в файлы в каталоге DIR")
+    parser.add_argument("--bodies-format", choices=BODY_FORMATS, default="md",
+                        help="Формат файлов статей для --bodies: md, json или both (по умолчанию: md)")
+    parser.add_argument("--bodies-workers", type=int, default=4,
+                        help="Число статей, загружаемых одновременно в --bodies (по умолчанию: 4)")
+    parser.add_argument("--blocks-cache", default=".notion_blocks",
+                        help="Каталог кэша блоков статей для --bodies (по умолчанию: .notion_blocks)")
+    parser.add_argument("--delta", action="store_true",
+                        help="Записать только новые, измененные и удаленные статьи относительно прошлых выгрузок")
+    parser.add_argument("--index", default="notion_export_index.sqlite3",
+                        help="Индекс выгруженных статей для --delta (по умолчанию: notion_export_index.sqlite3)")
+    parser.add_argument("--search-index", default=SEARCH_INDEX_PATH,
+                        help="Локальный полнотекстовый индекс статей, пополняемый при каждой выгрузке "
+                             f"(по умолчанию: {SEARCH_INDEX_PATH})")
+    parser.add_argument("--no-search-index", action="store_true",
+                        help="Не пополнять полнотекстовый индекс")
+    parser.add_argument("--fetch-sources", action="store_true",
+                        help="Загрузить исходные статьи по URL и добавить колонки: статус, итоговый URL, размер")
+    parser.add_argument("--sources-workers", type=int, default=16,
+                        help="Число одновременных загрузок для --fetch-sources (по умолчанию: 16)")
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="Максимум одновременных соединений к одному сайту (по умолчанию: 4)")
+    parser.add_argument("--sources-cache", default=".source_cache",
+                        help="Каталог кэша исходных статей для --fetch-sources (по умолчанию: .source_cache)")
+    parser.add_argument("--sources-timeout", type=float, default=30,
+                        help="Таймаут загрузки одной исходной статьи в секундах (по умолчанию: 30)")
+    parser.add_argument("--rate", type=float,
+                        help="Ограничение запросов к API в секунду (по умолчанию без ограничения, с --bodies: 3)")
+    parser.add_argument("--shared-rate", action="store_true",
+                        help="Общий лимит --rate (по умолчанию 3 запроса/с) для всех процессов с этим токеном "
+                             "на этом компьютере")
+    parser.add_argument("--rate-state", metavar="FILE",
+                        help="Файл состояния общего лимита (по умолчанию: свой для токена во временном каталоге)")
+    parser.add_argument("--sync", action="store_true",
+                        help="Инкрементально синхронизировать локальное зеркало SQLite и выгрузить статьи из него")
+    parser.add_argument("--mirror", default="notion_mirror.sqlite3",
+                        help="Путь к локальному зеркалу для --sync (по умолчанию: notion_mirror.sqlite3)")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="Полная сверка зеркала с API при --sync: удалить страницы, которых больше нет в базе "
+                             "(без флага выполняется раз в 7 дней)")
+    parser.add_argument("--title-property", help="Поле с названием статьи (по умолчанию определяется по схеме)")
+    parser.add_argument("--url-property", help="Поле со ссылкой на статью (по умолчанию определяется по схеме)")
+    parser.add_argument("--date-property", help="Поле даты для фильтрации (по умолчанию: Date)")
+    parser.add_argument("--mapping", metavar="FILE",
+                        help="Сопоставление полей, сохраненное debug_notion.py (например, notion_mapping.json)")
+    parser.add_argument("--filter", action="append", default=[], metavar="JSON",
+                        help="Дополнительное условие фильтра Notion API в JSON (можно указать несколько раз)")
+    parser.add_argument("--tag", action="append", default=[], metavar="ПОЛЕ=ЗНАЧЕНИЕ",
+                        help="Только статьи с тегом (multi_select contains)")
+    parser.add_argument("--select", action="append", default=[], metavar="ПОЛЕ=ЗНАЧЕНИЕ",
+                        help="Только статьи с выбранным значением (select equals)")
+    parser.add_argument("--status", action="append", default=[], metavar="ПОЛЕ=ЗНАЧЕНИЕ",
+                        help="Только статьи со статусом (status equals)")
+    parser.add_argument("--contains", action="append", default=[], metavar="ПОЛЕ=ТЕКСТ",
+                        help="Только статьи, у которых текстовое поле содержит ТЕКСТ")
+    parser.add_argument("--sort", action="append", default=[], metavar="ПОЛЕ[:asc|desc]",
+                        help="Сортировка результатов (created_time и last_edited_time - по времени страницы)")
+    parser.add_argument("--metrics-json", help="Сохранить метрики выполнения в JSON файл")
+    parser.add_argument("--metrics-prom", help="Сохранить метрики в текстовый файл Prometheus (textfile collector)")
+    parser.add_argument("--profile", help="Профилировать выполнение (cProfile) и сохранить статистику pstats в файл")
+    parser.add_argument("--no-cache", action="store_true", help="Не использовать дисковый кэш ответов API")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Игнорировать сохраненные ответы и обновить кэш свежими данными")
+    parser.add_argument("--cache-dir", default=".notion_cache",
+                        help="Каталог дискового кэша (по умолчанию: .notion_cache)")
+    parser.add_argument("--cache-ttl", type=float, default=3600,
+                        help="Время жизни записей кэша в секундах (по умолчанию: 3600)")
+    parser.add_argument("--cache-max-mb", type=float, default=100,
+                        help="Максимальный размер кэша в мегабайтах (по умолчанию: 100)")
     
     args = parser.parse_args()
     
@@ -231,9 +1737,145 @@ def main():
         print("Ошибка: Неверный формат даты. Используйте YYYY-MM-DD")
         return
     
+    # Дополнительные фильтры и сортировки, передаваемые в запрос к API
+    try:
+        filters = [json.loads(condition) for condition in args.filter]
+        for kind in FILTER_CONDITIONS:
+            filters.extend(parse_filter_condition(kind, spec) for spec in getattr(args, kind))
+        sorts = [parse_sort(spec) for spec in args.sort]
+    except ValueError as e:
+        print(f"Ошибка в условиях фильтра: {e}")
+        return
+    if args.sync and (filters or sorts):
+        print("Внимание: в режиме --sync фильтры и сортировки не применяются, зеркало хранит всю базу")
+    
+    use_checkpoint = args.checkpoint or args.resume
+    if args.delta and (args.stream or use_checkpoint):
+        print("Внимание: дельта-выгрузка выполняется без --stream и --checkpoint")
+        args.stream = use_checkpoint = False
+    if use_checkpoint:
+        if args.export_format not in RESUMABLE_FORMATS:
+            print(f"Ошибка: --checkpoint и --resume поддерживаются только для форматов {', '.join(RESUMABLE_FORMATS)}")
+            return
+        if args.sync or args.shard:
+            print("Внимание: контрольные точки не используются с --sync и --shard")
+            use_checkpoint = False
+    
+    if args.incremental_json:
+        try:
+            require_incremental()
+        except ImportError as e:
+            print(f"Ошибка: {e}")
+            return
+    
+    # Аргументы проверены: импорт сетевых модулей
+    from notion_sources import SourceFetcher
+    from notion_transport import NotionTransport, SharedRateLimiter, make_rate_limiter
+    
     # Создание и запуск поисковика
-    finder = NotionArticleFinder(args.token, args.database_id)
-    finder.run(args.start_date, args.end_date, args.output)
+    rate = args.rate if args.rate is not None else (3.0 if args.bodies else None)
+    try:
+        rate_limiter = make_rate_limiter(args.token, rate, args.shared_rate, args.rate_state)
+    except (RuntimeError, OSError) as e:
+        print(f"Ошибка: {e}")
+        return
+    transport = NotionTransport(args.token, pool_size=max(10, args.workers, args.bodies_workers),
+                                rate_limiter=rate_limiter)
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(args.cache_dir, ttl=args.cache_ttl,
+                              max_bytes=int(args.cache_max_mb * 1024 * 1024))
+    property_mapping = {
+        "title": args.title_property,
+        "url": args.url_property,
+        "date": args.date_property
+    }
+    if args.mapping:
+        from notion_profile import load_property_mapping
+        saved = load_property_mapping(args.mapping, args.database_id)
+        if saved is None:
+            print(f"Внимание: {args.mapping} не найден или относится к другой базе данных, "
+                  "поля определяются по схеме")
+        else:
+            # Явно заданные --*-property важнее сохраненного сопоставления
+            property_mapping = {**saved, **{k: v for k, v in property_mapping.items() if v}}
+    finder = NotionArticleFinder(args.token, args.database_id, transport=transport,
+                                 cache=cache, refresh_cache=args.refresh,
+                                 property_mapping=property_mapping,
+                                 incremental_json=args.incremental_json,
+                                 filters=filters, sorts=sorts)
+    checkpoint = None
+    if use_checkpoint:
+        checkpoint = ExportCheckpoint(args.checkpoint_file or ExportCheckpoint.default_path(
+            finder.output_path(args.output, args.export_format)))
+    # В режиме --sync фильтры не применяются, индекс ведется для всей базы
+    delta = ExportIndex(args.index, args.database_id, None if args.sync else filters) if args.delta else None
+    search_index = None if args.no_search_index else open_search_index(args.search_index, args.database_id)
+    bodies = None
+    if args.bodies:
+        bodies = ArticleBodyExporter(transport, args.bodies, body_format=args.bodies_format,
+                                     cache_dir=None if args.no_cache else args.blocks_cache,
+                                     max_workers=args.bodies_workers, refresh=args.refresh)
+    sources = None
+    if args.fetch_sources:
+        sources = SourceFetcher(args.sources_cache, max_workers=args.sources_workers,
+                                per_host=args.per_host,
+                                timeout=(min(5.0, args.sources_timeout), args.sources_timeout),
+                                refresh=args.refresh)
+    
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    try:
+        with finder.metrics.stage("total"):
+            if args.sync:
+                with NotionMirror(args.mirror) as mirror:
+                    finder.run_sync(args.start_date, args.end_date, args.output, mirror,
+                                    export_format=args.export_format, bodies=bodies, sources=sources,
+                                    delta=delta, search_index=search_index,
+                                    reconcile=True if args.reconcile else None)
+            elif checkpoint:
+                finder.run_checkpointed(args.start_date, args.end_date, args.output, checkpoint,
+                                        resume=args.resume, export_format=args.export_format,
+                                        bodies=bodies, sources=sources, search_index=search_index)
+            else:
+                finder.run(args.start_date, args.end_date, args.output,
+                           shard=args.shard, max_workers=args.workers, stream=args.stream,
+                           export_format=args.export_format, bodies=bodies, sources=sources,
+                           delta=delta, search_index=search_index)
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        return
+    finally:
+        if bodies:
+            bodies.close()
+        if sources:
+            sources.close()
+        if delta:
+            delta.close()
+        if search_index is not None:
+            search_index.close()
+        if isinstance(rate_limiter, SharedRateLimiter):
+            print(rate_limiter.summary())
+            rate_limiter.close()
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Профиль сохранен в {args.profile} (просмотр: python3 -m pstats {args.profile})")
+    
+    if args.metrics_json:
+        finder.metrics.write_json(args.metrics_json)
+        print(f"Метрики сохранены в {args.metrics_json}")
+    if args.metrics_prom:
+        finder.metrics.write_prometheus(args.metrics_prom)
+        print(f"Метрики Prometheus сохранены в {args.metrics_prom}")
+    
+    if cache:
+        stats = cache.stats()
+        print(f"Кэш: попаданий {stats['hits']}, промахов {stats['misses']}, размер {stats['bytes']} байт")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Асинхронный клиент для поиска статей в Notion Database на asyncio и httpx.
+Требует установленного httpx: pip3 install httpx
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from notion_article_finder import BaseArticleFinder, split_date_range
+from notion_json import loads
+from notion_metrics import Metrics
+from notion_records import ArticleRecord
+from notion_transport import NOTION_API_URL, RETRY_STATUS_CODES, notion_headers, retry_delay
+
+
+class AsyncNotionTransport:
+    def __init__(self, notion_token: str,
+                 base_url: str = NOTION_API_URL,
+                 timeout: Union[float, Tuple[float, float]] = (10.0, 60.0),
+                 max_retries: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 max_concurrency: int = 4,
+                 metrics: Optional[Metrics] = None):
+        """
+        Инициализация асинхронного транспорта
+
+        Args:
+            notion_token: Токен доступа к Notion API
+            base_url: Базовый URL Notion API
+            timeout: Таймаут запроса в секундах (connect, read) или одно число
+            max_retries: Максимальное число повторов одного запроса
+            backoff_base: Базовая задержка экспоненциального backoff в секундах
+            backoff_max: Максимальная задержка между повторами в секундах
+            max_concurrency: Максимальное число одновременных запросов
+            metrics: Сборщик метрик (по умолчанию создается свой)
+        """
+        self.max_retries = max_retries
+        self.metrics = metrics or Metrics()
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+        if isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+            timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/") + "/",
+            headers=notion_headers(notion_token),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency,
+                                max_keepalive_connections=max_concurrency)
+        )
+
+    async def request(self, method: str, path: str, raise_for_status: bool = True,
+                      **kwargs: Any) -> httpx.Response:
+        """
+        Выполнение запроса к Notion API с повторами
+
+        Args:
+            method: HTTP метод
+            path: Путь относительно базового URL (или полный URL)
+            raise_for_status: Выбрасывать исключение при ошибочном статусе ответа
+            **kwargs: Дополнительные аргументы для httpx.AsyncClient.request
+
+        Returns:
+            Ответ сервера
+        """
+        path = path.lstrip("/")
+
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with self.semaphore:
+                    started = time.perf_counter()
+                    response = await self.client.request(method, path, **kwargs)
+                    latency = time.perf_counter() - started
+            except httpx.TransportError:
+                self.metrics.record_error()
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                self.metrics.record_request(latency, len(response.content), response.status_code)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    if raise_for_status:
+                        response.raise_for_status()
+                    return response
+
+            retry_after = response.headers.get("Retry-After") if response is not None else None
+            delay = retry_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+            self.metrics.record_retry(delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, path: str, **kwargs: Any) -> httpx.Response:
+        """GET запрос к Notion API"""
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        """POST запрос к Notion API"""
+        return await self.request("POST", path, **kwargs)
+
+    async def aclose(self):
+        """Закрытие пула соединений"""
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+
+class AsyncNotionArticleFinder(BaseArticleFinder):
+    def __init__(self, notion_token: str, database_id: str,
+                 transport: Optional[AsyncNotionTransport] = None,
+                 max_concurrency: int = 4,
+                 property_mapping: Optional[Dict[str, Optional[str]]] = None,
+                 keep_raw: bool = False,
+                 filters: Optional[List[Dict[str, Any]]] = None,
+                 sorts: Optional[List[Dict[str, Any]]] = None):
+        """
+        Инициализация асинхронного клиента Notion API
+
+        Args:
+            notion_token: Токен доступа к Notion API
+            database_id: ID базы данных Notion
+            transport: Асинхронный транспорт (по умолчанию создается свой)
+            max_concurrency: Максимальное число одновременных запросов
+            property_mapping: Явное сопоставление полей {"title", "url", "date"} с полями базы
+            keep_raw: Сохранять исходные страницы Notion в raw_pages при выполнении run
+            filters: Дополнительные условия фильтра Notion, передаваемые в запрос
+            sorts: Сортировки Notion для запроса по датам
+        """
+        super().__init__(notion_token, database_id, property_mapping, keep_raw, filters, sorts)
+        self.transport = transport or AsyncNotionTransport(notion_token, max_concurrency=max_concurrency)
+        self.metrics = self.transport.metrics
+
+    async def resolve_extractor(self):
+        """
+        Однократное получение схемы базы данных и сборка экстрактора полей
+
+        Если схему получить не удалось, извлечение работает по известным названиям полей.
+        """
+        if self.extractor is not None:
+            return
+
+        try:
+            response = await self.transport.get(self.database_path)
+        except httpx.HTTPError as e:
+            print(f"Не удалось получить схему базы данных ({e}), поля будут определяться по названиям")
+            return
+
+        self.extractor = self.compile_extractor(loads(response.content).get('properties', {}))
+
+    async def query_pages(self, query: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Постраничный запрос к базе данных с обходом курсоров
+
+        Args:
+            query: Тело запроса (фильтр, сортировка)
+
+        Yields:
+            Список страниц из очередного ответа API
+        """
+        query = dict(query)
+
+        while True:
+            response = await self.transport.post(self.query_path, json=query, params=self.query_params)
+            results, next_cursor = self.parse_query_response(loads(response.content))
+            yield results
+
+            if not next_cursor:
+                break
+            query["start_cursor"] = next_cursor
+
+    async def _fetch_all(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Загрузка всех страниц по запросу"""
+        all_results = []
+        async for results in self.query_pages(query):
+            all_results.extend(results)
+        return all_results
+
+    async def _fetch_records(self, query: Dict[str, Any]) -> List[ArticleRecord]:
+        """Загрузка всех страниц по запросу с извлечением полей из каждого ответа API"""
+        records = []
+        async for results in self.query_pages(query):
+            records.extend(self.iter_articles_info(results))
+        return records
+
+    async def search_articles_by_date(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """
+        Поиск статей в базе данных по дате
+
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+
+        Returns:
+            Список найденных статей
+        """
+        try:
+            return await self._fetch_all(self.build_date_filter(start_date, end_date))
+        except httpx.HTTPError as e:
+            print(f"Ошибка при запросе к Notion API: {e}")
+            self.error = f"Ошибка при запросе к Notion API: {e}"
+            return []
+
+    async def search_articles_sharded(self, start_date: str, end_date: str,
+                                      granularity: str = "week") -> List[Dict[str, Any]]:
+        """
+        Параллельный поиск статей с разбиением диапазона дат на шарды
+
+        Число одновременных запросов ограничено семафором транспорта.
+
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            granularity: Размер шарда: day, week или month
+
+        Returns:
+            Найденные статьи в порядке возрастания даты
+        """
+        shards = await asyncio.gather(*[
+            self._fetch_all(self.build_date_filter(shard_start, shard_end, sort_by_date=True))
+            for shard_start, shard_end in split_date_range(start_date, end_date, granularity)
+        ])
+        return list(self.merge_shards(shards))
+
+    async def search_article_records(self, start_date: str, end_date: str,
+                                     shard: Optional[str] = None) -> List[ArticleRecord]:
+        """
+        Поиск статей с извлечением полей сразу по мере получения ответов API
+        (исходный JSON страниц не накапливается)
+
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            shard: Размер шарда (day, week, month) для параллельного поиска
+
+        Returns:
+            Список записей о найденных статьях
+        """
+        try:
+            if not shard:
+                return await self._fetch_records(self.build_date_filter(start_date, end_date))
+            shards = await asyncio.gather(*[
+                self._fetch_records(self.build_date_filter(shard_start, shard_end, sort_by_date=True))
+                for shard_start, shard_end in split_date_range(start_date, end_date, shard)
+            ])
+        except httpx.HTTPError as e:
+            print(f"Ошибка при запросе к Notion API: {e}")
+            self.error = f"Ошибка при запросе к Notion API: {e}"
+            return []
+        return list(self.merge_record_shards(shards))
+
+    async def run(self, start_date: str, end_date: str, output_file: str = "notion_articles_urls.txt",
+                  shard: Optional[str] = None, export_format: str = "csv"):
+        """
+        Основной метод для выполнения поиска и сохранения информации о статьях
+
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            output_file: Путь к выходному файлу
+            shard: Размер шарда (day, week, month) для параллельного поиска
+            export_format: Формат выгрузки (csv, csv.gz, csv.zst, jsonl, parquet, arrow)
+
+        Returns:
+            Число найденных статей (при ошибке API или записи файла текст ошибки - в self.error)
+        """
+        self.error = None
+        print(f"Поиск статей с {start_date} по {end_date}...")
+        await self.resolve_extractor()
+
+        if not self.keep_raw:
+            articles_info = await self.search_article_records(start_date, end_date, shard)
+            if not articles_info:
+                print("Статьи не найдены или произошла ошибка при поиске.")
+                return 0
+        else:
+            # Поиск статей с сохранением исходных страниц
+            if shard:
+                try:
+                    articles = await self.search_articles_sharded(start_date, end_date, shard)
+                except httpx.HTTPError as e:
+                    print(f"Ошибка при запросе к Notion API: {e}")
+                    self.error = f"Ошибка при запросе к Notion API: {e}"
+                    articles = []
+            else:
+                articles = await self.search_articles_by_date(start_date, end_date)
+            self.raw_pages = articles
+
+            if not articles:
+                print("Статьи не найдены или произошла ошибка при поиске.")
+                return 0
+
+            # Извлечение информации о статьях (название и URL)
+            articles_info = self.extract_articles_info(articles)
+
+        # Запись файла не должна блокировать цикл событий
+        await asyncio.to_thread(self.save_articles, articles_info, output_file, export_format)
+        if self.error:
+            # Файл не записан, текст ошибки - в self.error
+            return 0
+        return len(articles_info)
+
+    async def aclose(self):
+        """Закрытие транспорта"""
+        await self.transport.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
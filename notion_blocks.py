@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Выгрузка текста статей: дерево блоков страницы (blocks/{id}/children)
+загружается рекурсивно с обходом пагинации и сохраняется в Markdown и/или JSON.
+
+Страницы обрабатываются параллельно в пуле потоков, частота запросов
+ограничивается транспортом. Загруженные блоки кэшируются на диске вместе
+с last_edited_time страницы: неизмененные статьи повторно не запрашиваются.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from notion_json import loads
+from notion_records import NO_URL, ArticleRecord
+
+if TYPE_CHECKING:
+    from notion_transport import NotionTransport
+
+
+BODY_FORMATS = ("md", "json", "both")
+
+# Префиксы строк для простых текстовых блоков
+TEXT_BLOCK_PREFIXES = {
+    "paragraph": "",
+    "heading_1": "# ",
+    "heading_2": "## ",
+    "heading_3": "### ",
+    "bulleted_list_item": "- ",
+    "quote": "> ",
+    "toggle": "- ",
+}
+
+# Пункты списков: идут без пустых строк между собой, вложенные блоки сдвигаются
+LIST_BLOCK_TYPES = ("bulleted_list_item", "numbered_list_item", "to_do", "toggle")
+
+# Блоки со ссылкой на файл или внешний ресурс
+MEDIA_BLOCK_TYPES = ("image", "video", "audio", "file", "pdf", "bookmark", "embed", "link_preview")
+
+
+def rich_text_to_markdown(rich_text: List[Dict[str, Any]]) -> str:
+    """Rich text Notion в Markdown с учетом оформления и ссылок"""
+    parts = []
+    for segment in rich_text:
+        text = segment.get("plain_text", "")
+        if not text:
+            continue
+        annotations = segment.get("annotations") or {}
+        if annotations.get("code"):
+            text = f"`{text}`"
+        if annotations.get("bold"):
+            text = f"**{text}**"
+        if annotations.get("italic"):
+            text = f"*{text}*"
+        if annotations.get("strikethrough"):
+            text = f"~~{text}~~"
+        if segment.get("href"):
+            text = f"[{text}]({segment['href']})"
+        parts.append(text)
+    return "".join(parts)
+
+
+def _media_url(value: Dict[str, Any]) -> str:
+    """Ссылка медиа-блока (файл Notion, внешний файл или закладка)"""
+    if "url" in value:
+        return value["url"] or ""
+    return (value.get(value.get("type", "")) or {}).get("url", "")
+
+
+def blocks_to_markdown(blocks: List[Dict[str, Any]], depth: int = 0) -> str:
+    """
+    Преобразование дерева блоков в Markdown
+
+    Блоки разделяются пустой строкой, соседние пункты списков и строки
+    таблицы идут подряд.
+
+    Args:
+        blocks: Блоки с вложенными дочерними блоками в ключе children
+        depth: Уровень вложенности (для отступов списков)
+
+    Returns:
+        Текст в формате Markdown
+    """
+    indent = "  " * depth
+    parts = []
+    previous_type = None
+    number = 0
+
+    for block in blocks:
+        block_type = block.get("type", "")
+        value = block.get(block_type) or {}
+        text = rich_text_to_markdown(value.get("rich_text") or [])
+        number = number + 1 if block_type == "numbered_list_item" else 0
+        lines = []
+
+        if block_type in TEXT_BLOCK_PREFIXES:
+            lines.append(f"{indent}{TEXT_BLOCK_PREFIXES[block_type]}{text}")
+        elif block_type == "numbered_list_item":
+            lines.append(f"{indent}{number}. {text}")
+        elif block_type == "to_do":
+            lines.append(f"{indent}- [{'x' if value.get('checked') else ' '}] {text}")
+        elif block_type == "callout":
+            icon = (value.get("icon") or {}).get("emoji", "")
+            lines.append(f"{indent}> {icon} {text}".rstrip())
+        elif block_type == "code":
+            lines.append(f"{indent}```{value.get('language', '')}")
+            lines.extend(f"{indent}{line}" for line in text.split("\n"))
+            lines.append(f"{indent}```")
+        elif block_type == "equation":
+            lines.append(f"{indent}$$ {value.get('expression', '')} $$")
+        elif block_type == "divider":
+            lines.append(f"{indent}---")
+        elif block_type in MEDIA_BLOCK_TYPES:
+            caption = rich_text_to_markdown(value.get("caption") or []) or block_type
+            prefix = "!" if block_type == "image" else ""
+            lines.append(f"{indent}{prefix}[{caption}]({_media_url(value)})")
+        elif block_type == "child_page":
+            lines.append(f"{indent}**{value.get('title', '')}**")
+        elif block_type == "table_row":
+            cells = [rich_text_to_markdown(cell) for cell in value.get("cells") or []]
+            lines.append(f"{indent}| " + " | ".join(cells) + " |")
+            if block.get("_header"):
+                lines.append(f"{indent}|" + " --- |" * len(cells))
+
+        children = block.get("children") or []
+        if block_type == "table" and children:
+            if value.get("has_column_header"):
+                children = [dict(children[0], _header=True)] + children[1:]
+            lines.append(blocks_to_markdown(children, depth))
+        elif children and block_type != "table_row":
+            # Вложенные блоки списков сдвигаются, остальные идут следом без отступа
+            nested = depth + 1 if block_type in LIST_BLOCK_TYPES else depth
+            lines.append(blocks_to_markdown(children, nested))
+
+        if not lines:
+            continue
+        if parts:
+            tight = (block_type == previous_type == "table_row" or
+                     (block_type in LIST_BLOCK_TYPES and previous_type in LIST_BLOCK_TYPES))
+            parts.append("\n" if tight else "\n\n")
+        parts.append("\n".join(lines))
+        previous_type = block_type
+
+    return "".join(parts)
+
+
+class ArticleBodyExporter:
+    def __init__(self, transport: NotionTransport, output_dir: str,
+                 body_format: str = "md",
+                 cache_dir: Optional[str] = ".notion_blocks",
+                 max_workers: int = 4,
+                 refresh: bool = False):
+        """
+        Параллельная выгрузка текста статей
+
+        Args:
+            transport: Транспорт для запросов к API (ограничение частоты задается в нем)
+            output_dir: Каталог для файлов статей
+            body_format: Формат файлов: md, json или both
+            cache_dir: Каталог кэша блоков (None - без кэша)
+            max_workers: Число статей, загружаемых одновременно
+            refresh: Не читать блоки из кэша, но сохранять в него свежие
+        """
+        if body_format not in BODY_FORMATS:
+            raise ValueError(f"Неизвестный формат текста статей: {body_format}")
+
+        self.transport = transport
+        self.output_dir = output_dir
+        self.body_format = body_format
+        self.cache_dir = cache_dir
+        self.refresh = refresh
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures: List[Future] = []
+        self.stats = {"fetched": 0, "cached": 0, "errors": 0, "blocks": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(output_dir, exist_ok=True)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def fetch_children(self, block_id: str) -> List[Dict[str, Any]]:
+        """
+        Рекурсивная загрузка дочерних блоков с обходом пагинации
+
+        Args:
+            block_id: ID страницы или блока
+
+        Returns:
+            Блоки; у блоков с has_children вложенные блоки лежат в ключе children
+        """
+        blocks = []
+        params = {"page_size": 100}
+
+        while True:
+            data = loads(self.transport.get(f"blocks/{block_id}/children", params=params).content)
+            blocks.extend(data.get("results", []))
+            if not data.get("has_more") or not data.get("next_cursor"):
+                break
+            params["start_cursor"] = data["next_cursor"]
+
+        for block in blocks:
+            # Дочерние страницы выгружаются как отдельные статьи, внутрь не заходим
+            if block.get("has_children") and block.get("type") != "child_page":
+                block["children"] = self.fetch_children(block["id"])
+
+        return blocks
+
+    def _cache_path(self, page_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{page_id.replace('-', '')}.json")
+
+    def load_cached(self, record: ArticleRecord) -> Optional[List[Dict[str, Any]]]:
+        """Блоки из кэша, если страница не менялась с момента загрузки"""
+        if not self.cache_dir or self.refresh or not record.last_edited_time:
+            return None
+        try:
+            with open(self._cache_path(record.page_id), "rb") as f:
+                entry = loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if entry.get("last_edited_time") != record.last_edited_time:
+            return None
+        return entry.get("blocks")
+
+    def _write_atomic(self, path: str, content: str):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def save_cached(self, record: ArticleRecord, blocks: List[Dict[str, Any]]):
+        """Сохранение блоков в кэш вместе с last_edited_time страницы"""
+        if not self.cache_dir or not record.last_edited_time:
+            return
+        self._write_atomic(self._cache_path(record.page_id), json.dumps(
+            {"last_edited_time": record.last_edited_time, "blocks": blocks}, ensure_ascii=False
+        ))
+
+    def article_path(self, record: ArticleRecord, extension: str) -> str:
+        """Путь к файлу статьи: <каталог>/<ID страницы без дефисов>.<расширение>"""
+        return os.path.join(self.output_dir, f"{record.page_id.replace('-', '')}.{extension}")
+
+    def write_article(self, record: ArticleRecord, blocks: List[Dict[str, Any]]):
+        """Запись статьи в Markdown и/или JSON"""
+        if self.body_format in ("md", "both"):
+            header = [f"# {record.title}", ""]
+            if record.article_url and record.article_url != NO_URL:
+                header.append(f"Источник: {record.article_url}  ")
+            header.extend([f"Notion: {record.notion_url}  ", f"Дата: {record.date}", ""])
+            self._write_atomic(self.article_path(record, "md"),
+                               "\n".join(header) + "\n" + blocks_to_markdown(blocks) + "\n")
+        if self.body_format in ("json", "both"):
+            self._write_atomic(self.article_path(record, "json"), json.dumps(
+                {**record.to_dict(), "blocks": blocks}, ensure_ascii=False, indent=2
+            ))
+
+    def article_text(self, record: ArticleRecord) -> Optional[str]:
+        """Текст выгруженной статьи в Markdown без заголовка (None, если статья не выгружалась)"""
+        try:
+            if self.body_format == "md":
+                with open(self.article_path(record, "md"), encoding="utf-8") as f:
+                    text = f.read()
+                # Заголовок: название, пустая строка, источник/Notion/дата, пустая строка
+                parts = text.split("\n\n", 2)
+                return parts[2] if len(parts) == 3 else text
+            with open(self.article_path(record, "json"), "rb") as f:
+                return blocks_to_markdown(loads(f.read()).get("blocks", []))
+        except (OSError, ValueError):
+            return None
+
+    def export(self, record: ArticleRecord) -> Tuple[str, int]:
+        """
+        Выгрузка текста одной статьи
+
+        Returns:
+            Пара (источник: cached, fetched или error, число блоков верхнего уровня)
+        """
+        blocks = self.load_cached(record)
+        source = "cached"
+        if blocks is None:
+            try:
+                blocks = self.fetch_children(record.page_id)
+            except Exception as e:
+                print(f"Ошибка при загрузке текста статьи {record.notion_url}: {e}")
+                with self._lock:
+                    self.stats["errors"] += 1
+                return "error", 0
+            source = "fetched"
+
+        try:
+            if source == "fetched":
+                self.save_cached(record, blocks)
+            self.write_article(record, blocks)
+        except OSError as e:
+            print(f"Ошибка при записи текста статьи {record.notion_url}: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            return "error", 0
+        with self._lock:
+            self.stats[source] += 1
+            self.stats["blocks"] += len(blocks)
+        return source, len(blocks)
+
+    def submit(self, record: ArticleRecord) -> Future:
+        """Постановка статьи в очередь на выгрузку (без ожидания)"""
+        future = self.executor.submit(self.export, record)
+        self.futures.append(future)
+        return future
+
+    def export_all(self, records: List[ArticleRecord]) -> Dict[str, int]:
+        """Выгрузка текста всех статей с ожиданием завершения"""
+        for record in records:
+            self.submit(record)
+        return self.wait()
+
+    def wait(self) -> Dict[str, int]:
+        """Ожидание завершения всех поставленных выгрузок"""
+        for future in self.futures:
+            future.result()
+        self.futures = []
+        return dict(self.stats)
+
+    def close(self):
+        """Ожидание выгрузок и остановка пула потоков"""
+        self.wait()
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
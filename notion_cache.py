@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Дисковый кэш ответов databases/{id}/query с TTL и LRU-вытеснением по размеру.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from notion_json import loads
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: str = ".notion_cache", ttl: float = 3600.0,
+                 max_bytes: int = 100 * 1024 * 1024):
+        """
+        Инициализация кэша
+
+        Args:
+            cache_dir: Каталог для файлов кэша
+            ttl: Время жизни записи в секундах
+            max_bytes: Максимальный суммарный размер кэша на диске в байтах
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    @staticmethod
+    def make_key(database_id: str, query: Dict[str, Any], params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Ключ записи: ID базы, канонизированное тело запроса, курсор и параметры URL
+
+        Args:
+            database_id: ID базы данных Notion
+            query: Тело запроса (может содержать start_cursor)
+            params: Параметры строки запроса (например, filter_properties)
+        """
+        body = {k: v for k, v in query.items() if k != "start_cursor"}
+        parts = [database_id, body, query.get("start_cursor")]
+        if params:
+            parts.append(params)
+        canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and entry.name.endswith(".json")]
+
+    def get(self, database_id: str, query: Dict[str, Any],
+            params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Получение ответа из кэша
+
+        Returns:
+            Декодированный ответ API или None, если записи нет или она устарела
+        """
+        path = self._path(self.make_key(database_id, query, params))
+        try:
+            with open(path, "rb") as f:
+                entry = loads(f.read())
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Время доступа хранится в mtime файла и используется для LRU-вытеснения
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return entry["data"]
+
+    def put(self, database_id: str, query: Dict[str, Any], data: Dict[str, Any],
+            params: Optional[Dict[str, Any]] = None):
+        """Сохранение ответа API в кэш с последующим вытеснением старых записей"""
+        path = self._path(self.make_key(database_id, query, params))
+        payload = json.dumps({"created": time.time(), "data": data}, ensure_ascii=False)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._size += os.path.getsize(path) - old_size
+
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _remove(self, path: str):
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            self._size -= size
+
+    def evict(self):
+        """Удаление давно не использованных записей, пока кэш не уложится в лимит"""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self._size <= self.max_bytes:
+                break
+            self._remove(entry.path)
+
+    def clear(self):
+        """Полная очистка кэша"""
+        for entry in self._entries():
+            self._remove(entry.path)
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики попаданий и промахов и текущий размер кэша"""
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._size}
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Запись и воспроизведение HTTP-сессий с Notion API (кассеты) для тестов без сети.
+
+В режиме записи запросы транспорта уходят в API как обычно, а пары
+"запрос - ответ" сохраняются в JSON-файл кассеты. В режиме воспроизведения
+ответы берутся из кассеты: запрос сопоставляется по методу, пути
+относительно базового URL, параметрам и телу. Одинаковые запросы получают
+записанные ответы по порядку, поэтому пагинация (разные курсоры) и повторы
+после 429/5xx воспроизводятся так же, как были записаны.
+
+Заголовки запросов (в том числе токен) в кассету не попадают.
+"""
+
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from notion_transport import RETRY_STATUS_CODES
+
+
+CASSETTE_VERSION = 1
+
+# Заголовки ответа, которые сохраняются в кассете
+RECORDED_HEADERS = ("Content-Type", "Retry-After", "ETag", "Last-Modified", "Location")
+
+
+class CassetteError(Exception):
+    """Запрос, которого нет в кассете (или кассета не найдена)"""
+
+
+class CassetteAdapter(HTTPAdapter):
+    def __init__(self, cassette: "Cassette", **kwargs: Any):
+        """
+        Адаптер requests: запись ответов сети в кассету или ответы из нее
+
+        Args:
+            cassette: Кассета
+            **kwargs: Аргументы HTTPAdapter (размер пула для режима записи)
+        """
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        if self.cassette.recording:
+            response = super().send(request, **kwargs)
+            try:
+                content = response.content
+            finally:
+                response.close()
+            data = self.cassette.record(request, response.status_code, response.reason,
+                                        response.headers, content)
+        else:
+            data = self.cassette.play(request)
+
+        body = self.cassette.response_body(data)
+        headers = dict(data.get("headers") or {})
+        headers["Content-Length"] = str(len(body))
+        # Тело отдается через raw, как из сети: работают и .content, и stream=True
+        raw = HTTPResponse(body=io.BytesIO(body), headers=headers, status=data["status"],
+                           reason=data.get("reason"), preload_content=False, decode_content=False)
+        return self.build_response(request, raw)
+
+
+class Cassette:
+    def __init__(self, path: str, record: bool = False, meta: Optional[Dict[str, Any]] = None):
+        """
+        Кассета с записанной сессией
+
+        Args:
+            path: Путь к JSON-файлу кассеты
+            record: Записывать новую сессию (иначе - воспроизводить существующую)
+            meta: Дополнительные сведения о записи (например, ID базы данных)
+
+        Raises:
+            CassetteError: Кассета для воспроизведения не найдена или повреждена
+        """
+        self.path = path
+        self.recording = record
+        self.meta: Dict[str, Any] = dict(meta or {})
+        self.interactions: List[Dict[str, Any]] = []
+        self.base_url = ""
+        self.played = 0
+        self.played_retryable = 0
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if not record:
+            self.load()
+
+    def load(self):
+        """Загрузка кассеты и разбор ответов по запросам"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CassetteError(f"Не удалось прочитать кассету {self.path}: {e}")
+        if data.get("version") != CASSETTE_VERSION:
+            raise CassetteError(f"Неподдерживаемая версия кассеты {self.path}: {data.get('version')}")
+
+        self.meta = data.get("meta") or {}
+        self.interactions = data.get("interactions") or []
+        self._queues = {}
+        for interaction in self.interactions:
+            self._queues.setdefault(interaction["request"]["key"], deque()).append(interaction["response"])
+
+    def save(self):
+        """Атомарная запись кассеты на диск"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": CASSETTE_VERSION, "meta": self.meta, "interactions": self.interactions},
+                      f, ensure_ascii=False, indent=1)
+            f.write("\n")
+        os.replace(tmp_path, self.path)
+
+    def install(self, transport):
+        """Подключение кассеты к сессии NotionTransport"""
+        self.base_url = transport.base_url
+        adapter = CassetteAdapter(self)
+        transport.session.mount("https://", adapter)
+        transport.session.mount("http://", adapter)
+
+    def request_key(self, request) -> str:
+        """Ключ сопоставления: метод, путь относительно базового URL, параметры и тело"""
+        url = request.url
+        if self.base_url and url.startswith(self.base_url):
+            url = url[len(self.base_url):]
+        parts = urlsplit(url)
+        path = parts.path.lstrip("/") if self.base_url else parts.path
+        query = sorted(parse_qsl(parts.query, keep_blank_values=True))
+
+        body: Any = request.body
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", "replace")
+        if body:
+            try:
+                body = json.loads(body)
+            except ValueError:
+                pass
+        return json.dumps([request.method, path, query, body], ensure_ascii=False, sort_keys=True)
+
+    def record(self, request, status: int, reason: Optional[str], headers, content: bytes) -> Dict[str, Any]:
+        """Сохранение пары "запрос - ответ" в записываемой кассете"""
+        data: Dict[str, Any] = {
+            "status": status,
+            "reason": reason,
+            "headers": {name: headers[name] for name in RECORDED_HEADERS if name in headers},
+        }
+        try:
+            data["json"] = json.loads(content) if content else None
+        except ValueError:
+            data["text"] = content.decode("utf-8", "replace")
+
+        key = self.request_key(request)
+        method, path, query, body = json.loads(key)
+        with self._lock:
+            self.interactions.append({
+                "request": {"key": key, "method": method, "path": path, "query": query, "body": body},
+                "response": data,
+            })
+        return data
+
+    def play(self, request) -> Dict[str, Any]:
+        """
+        Записанный ответ на запрос
+
+        Одинаковые запросы получают ответы в порядке записи; когда они
+        закончились, повторяется последний успешный ответ (тесты могут
+        выполняться в другом порядке или по отдельности).
+
+        Raises:
+            CassetteError: Такого запроса в кассете нет
+        """
+        key = self.request_key(request)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                data = queue.popleft()
+                if data["status"] not in RETRY_STATUS_CODES:
+                    self._last[key] = data
+            elif key in self._last:
+                data = self._last[key]
+            else:
+                raise CassetteError(f"Запрос не записан в кассете {self.path}: {request.method} {request.url}")
+            self.played += 1
+            if data["status"] in RETRY_STATUS_CODES:
+                self.played_retryable += 1
+        return data
+
+    @staticmethod
+    def response_body(data: Dict[str, Any]) -> bytes:
+        """Тело ответа в байтах"""
+        if "text" in data:
+            return data["text"].encode("utf-8")
+        if data.get("json") is None:
+            return b""
+        return json.dumps(data["json"], ensure_ascii=False).encode("utf-8")
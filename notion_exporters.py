@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Экспортеры информации о статьях в разные форматы: CSV со сжатием gzip/zstd
+(через стандартный модуль csv), JSONL, Parquet и Arrow IPC.
+
+Строки накапливаются в буфере и записываются пачками, поэтому экспортер
+подходит и для потоковой выгрузки. Parquet и Arrow требуют пакета pyarrow,
+сжатие zstd - пакета zstandard.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from notion_records import ARTICLE_FIELDS, SOURCE_FIELDS
+
+
+# Колонки выгрузки и их заголовки в CSV
+EXPORT_COLUMNS: Tuple[str, ...] = ARTICLE_FIELDS
+COLUMN_HEADERS: Dict[str, str] = {
+    "title": "Название статьи",
+    "article_url": "URL статьи",
+    "notion_url": "Notion URL",
+    "page_id": "ID страницы",
+    "date": "Дата",
+    "last_edited_time": "Изменено",
+    "source_status": "Статус",
+    "source_final_url": "Итоговый URL",
+    "source_size": "Размер",
+    "change": "Изменение",
+}
+
+# Колонки прежнего формата csv (три колонки без сжатия)
+CSV_COLUMNS: Tuple[str, ...] = ("title", "article_url", "notion_url")
+
+# Колонки со статусом загрузки исходной статьи (добавляются при --fetch-sources)
+SOURCE_COLUMNS: Tuple[str, ...] = SOURCE_FIELDS
+
+# Типы колонок в Parquet/Arrow (остальные колонки - строки)
+COLUMN_TYPES: Dict[str, str] = {
+    "source_status": "int32",
+    "source_size": "int64",
+}
+
+
+class ArticleExporter:
+    """Базовый экспортер: буферизует строки и записывает их пачками"""
+
+    def __init__(self, path: str, columns: Iterable[str] = EXPORT_COLUMNS, batch_size: int = 1000):
+        """
+        Args:
+            path: Путь к выходному файлу
+            columns: Колонки выгрузки (ключи словарей с информацией о статьях)
+            batch_size: Число строк в одной пачке записи
+        """
+        self.path = path
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self.written = 0
+        self._buffer: List[Dict[str, str]] = []
+
+    def write(self, article: Dict[str, str]):
+        """Добавление одной статьи (запись на диск - при заполнении пачки)"""
+        self._buffer.append(article)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_all(self, articles: Iterable[Dict[str, str]]) -> int:
+        """Запись всех статей из потока, возвращает общее число записанных строк"""
+        for article in articles:
+            self.write(article)
+        self.flush()
+        return self.written
+
+    def flush(self):
+        """Запись накопленной пачки"""
+        if self._buffer:
+            self.write_batch(self._buffer)
+            self.written += len(self._buffer)
+            self._buffer = []
+
+    def write_batch(self, rows: List[Dict[str, str]]):
+        """Запись пачки строк (реализуется в наследниках)"""
+        raise NotImplementedError
+
+    def sync(self) -> int:
+        """
+        Запись буфера и сброс файла на диск (для построчных форматов без сжатия)
+
+        Returns:
+            Длина файла в байтах после записанных строк
+        """
+        self.flush()
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self):
+        """Запись остатка буфера и закрытие файла"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvExporter(ArticleExporter):
+    """CSV через стандартный модуль csv, без сжатия или со сжатием gzip/zstd"""
+
+    def __init__(self, path: str, columns: Iterable[str] = EXPORT_COLUMNS, batch_size: int = 1000,
+                 compression: Optional[str] = None, append: bool = False, lineterminator: str = "\r\n"):
+        """
+        Args:
+            compression: Сжатие: None, gzip или zstd
+            append: Дописывать в существующий файл без заголовка (только без сжатия)
+            lineterminator: Конец строки CSV
+        """
+        super().__init__(path, columns, batch_size)
+        self.compression = compression
+        self._raw = None
+        if append and compression is not None:
+            raise ValueError("Дописывание поддерживается только для CSV без сжатия")
+        if compression == "gzip":
+            self._file = gzip.open(path, "wt", encoding="utf-8", newline="")
+        elif compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("Для сжатия zstd установите пакет zstandard: pip install zstandard")
+            self._raw = open(path, "wb")
+            stream = zstandard.ZstdCompressor().stream_writer(self._raw)
+            self._file = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        elif compression is None:
+            self._file = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        else:
+            raise ValueError(f"Неизвестный тип сжатия: {compression}")
+
+        self._writer = csv.writer(self._file, lineterminator=lineterminator)
+        if not append:
+            self._writer.writerow([COLUMN_HEADERS.get(column, column) for column in self.columns])
+
+    def write_batch(self, rows: List[Dict[str, str]]):
+        self._writer.writerows([[row.get(column, "") for column in self.columns] for row in rows])
+
+    def close(self):
+        super().close()
+        self._file.close()
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+
+
+class JsonlExporter(ArticleExporter):
+    """JSON Lines: один объект статьи на строку"""
+
+    def __init__(self, path: str, columns: Iterable[str] = EXPORT_COLUMNS, batch_size: int = 1000,
+                 append: bool = False):
+        super().__init__(path, columns, batch_size)
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write_batch(self, rows: List[Dict[str, str]]):
+        self._file.write("".join(
+            json.dumps({column: row.get(column, "") for column in self.columns}, ensure_ascii=False) + "\n"
+            for row in rows
+        ))
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+
+def _import_pyarrow():
+    """Отложенный импорт pyarrow (нужен только для Parquet и Arrow)"""
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise ImportError("Для форматов parquet и arrow установите пакет pyarrow: pip install pyarrow")
+
+
+class _ArrowTableExporter(ArticleExporter):
+    """Общая часть колоночных экспортеров: каждая пачка становится группой строк"""
+
+    def __init__(self, path: str, columns: Iterable[str] = EXPORT_COLUMNS, batch_size: int = 10000):
+        super().__init__(path, columns, batch_size)
+        self._pa = _import_pyarrow()
+        self.schema = self._pa.schema([
+            (column, getattr(self._pa, COLUMN_TYPES.get(column, "string"))()) for column in self.columns
+        ])
+        self._writer = self._open_writer()
+
+    def _open_writer(self):
+        raise NotImplementedError
+
+    def write_batch(self, rows: List[Dict[str, str]]):
+        batch = self._pa.RecordBatch.from_pydict(
+            {column: [row.get(column) for row in rows] for column in self.columns}, schema=self.schema
+        )
+        self._writer.write_batch(batch)
+
+    def close(self):
+        super().close()
+        self._writer.close()
+
+
+class ParquetExporter(_ArrowTableExporter):
+    """Parquet со сжатием zstd"""
+
+    def _open_writer(self):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.path, self.schema, compression="zstd")
+
+
+class ArrowExporter(_ArrowTableExporter):
+    """Arrow IPC (Feather v2)"""
+
+    def _open_writer(self):
+        return self._pa.ipc.new_file(self.path, self.schema)
+
+
+# Форматы выгрузки: (расширение файла, фабрика экспортера)
+EXPORT_FORMATS: Dict[str, Tuple[str, Any]] = {
+    "csv.gz": (".csv.gz", lambda path, columns: CsvExporter(path, columns, compression="gzip")),
+    "csv.zst": (".csv.zst", lambda path, columns: CsvExporter(path, columns, compression="zstd")),
+    "jsonl": (".jsonl", JsonlExporter),
+    "parquet": (".parquet", ParquetExporter),
+    "arrow": (".arrow", ArrowExporter),
+}
+
+
+def export_path(output_file: str, fmt: str) -> str:
+    """Замена расширения .txt/.csv выходного файла на расширение формата"""
+    extension = EXPORT_FORMATS[fmt][0]
+    if output_file.endswith(extension):
+        return output_file
+    root, ext = os.path.splitext(output_file)
+    if ext in (".txt", ".csv"):
+        output_file = root
+    return output_file + extension
+
+
+def create_exporter(fmt: str, output_file: str, columns: Iterable[str] = EXPORT_COLUMNS) -> ArticleExporter:
+    """
+    Создание экспортера по имени формата
+
+    Args:
+        fmt: Формат (csv.gz, csv.zst, jsonl, parquet, arrow)
+        output_file: Путь к выходному файлу (расширение приводится к формату)
+        columns: Колонки выгрузки
+
+    Returns:
+        Экспортер, открытый на запись
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
+    return EXPORT_FORMATS[fmt][1](export_path(output_file, fmt), columns)
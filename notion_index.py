@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Индекс выгруженных статей между запусками (SQLite) для дельта-выгрузки.
+
+Для каждой выгруженной страницы хранятся нормализованный article_url и хэш
+выгружаемых полей. При открытии индекс загружается в словари, поэтому
+проверка "новая / изменилась / уже выгружена" выполняется за O(1) и не
+замедляется с ростом индекса до миллионов записей.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from notion_records import ArticleRecord
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exported (
+    database_id TEXT NOT NULL,
+    page_id TEXT NOT NULL,
+    url_key TEXT NOT NULL,
+    title TEXT NOT NULL,
+    article_url TEXT NOT NULL,
+    date TEXT NOT NULL,
+    content_hash BLOB NOT NULL,
+    exported_at REAL NOT NULL,
+    PRIMARY KEY (database_id, page_id)
+) WITHOUT ROWID;
+"""
+
+# Параметры ссылок, не влияющие на содержимое статьи: по точному имени и по префиксу
+TRACKING_PARAMS = frozenset(("fbclid", "gclid", "yclid", "mc_cid", "mc_eid", "ref"))
+TRACKING_PREFIXES = ("utm_",)
+
+# Типы изменений в дельта-выгрузке
+CHANGE_NEW = "new"
+CHANGE_CHANGED = "changed"
+CHANGE_REMOVED = "removed"
+CHANGE_DUPLICATE = "duplicate"
+
+
+def normalize_url(url: str) -> str:
+    """
+    Нормализация ссылки для поиска дублей
+
+    Схема приводится к https, хост - к нижнему регистру, убираются www.,
+    якорь, завершающий слеш и параметры отслеживания (utm_* и т.п.),
+    остальные параметры сортируются.
+    """
+    scheme, separator, rest = url.strip().partition("://")
+    if not separator or scheme.lower() not in ("http", "https"):
+        return url.strip()
+    rest, _, query = rest.split("#", 1)[0].partition("?")
+    host, _, path = rest.partition("/")
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    key = f"https://{host}/{path}".rstrip("/")
+    if query:
+        params = sorted((name, value) for name, value in parse_qsl(query, keep_blank_values=True)
+                        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES))
+        if params:
+            key += "?" + urlencode(params)
+    return key
+
+
+def content_hash(record: ArticleRecord) -> bytes:
+    """Хэш выгружаемых полей статьи (название, ссылка, дата)"""
+    data = "\x1f".join((record.title, record.article_url, record.date))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+
+def index_key(database_id: str, filters: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Ключ набора записей индекса: ID базы данных и отпечаток дополнительных фильтров
+
+    Без фильтров ключ равен ID базы данных. Выгрузки с разными фильтрами
+    ведут отдельные наборы: иначе страницы, не прошедшие новый фильтр,
+    считались бы удаленными.
+    """
+    if not filters:
+        return database_id
+    canonical = json.dumps(filters, sort_keys=True, ensure_ascii=False)
+    return f"{database_id}:{hashlib.blake2b(canonical.encode('utf-8'), digest_size=8).hexdigest()}"
+
+
+class ExportIndex:
+    def __init__(self, db_path: str, database_id: str, filters: Optional[List[Dict[str, Any]]] = None):
+        """
+        Открытие (или создание) индекса и загрузка записей базы данных в память
+
+        Args:
+            db_path: Путь к файлу индекса SQLite
+            database_id: ID базы данных Notion (у каждой базы свой набор записей)
+            filters: Дополнительные условия фильтра выгрузки (у каждого набора фильтров свои записи)
+        """
+        self.db_path = db_path
+        self.database_id = database_id
+        # Значение колонки database_id: ID базы данных с отпечатком фильтров
+        self.key = index_key(database_id, filters)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+        # page_id -> (хэш полей, дата, нормализованный URL); нормализованный URL -> page_id
+        self.pages: Dict[str, Tuple[bytes, str, str]] = {}
+        self.urls: Dict[str, str] = {}
+        for page_id, url_key, digest, date in self.conn.execute(
+            "SELECT page_id, url_key, content_hash, date FROM exported WHERE database_id = ?", (self.key,)
+        ):
+            self.pages[page_id] = (digest, date, url_key)
+            self.urls[url_key] = page_id
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def classify(self, record: ArticleRecord) -> Optional[str]:
+        """
+        Сравнение статьи с индексом
+
+        Returns:
+            new - статьи нет в индексе, changed - изменились выгружаемые поля,
+            duplicate - та же ссылка уже выгружена под другой страницей,
+            None - статья уже выгружена без изменений
+        """
+        known = self.pages.get(record.page_id)
+        if known is None:
+            url_key = normalize_url(record.article_url)
+            owner = self.urls.get(url_key)
+            if owner is not None and url_key.startswith("https://"):
+                return CHANGE_DUPLICATE
+            return CHANGE_NEW
+        if known[0] != content_hash(record):
+            return CHANGE_CHANGED
+        return None
+
+    def diff(self, records: Iterable[ArticleRecord]) -> Tuple[List[Tuple[ArticleRecord, str]], Dict[Optional[str], int]]:
+        """
+        Новые и измененные статьи из набора, дубли по ссылке внутри набора тоже отбрасываются
+
+        Returns:
+            Пары (запись, new или changed) и счетчики по типам (None - без изменений)
+        """
+        counts: Dict[Optional[str], int] = {CHANGE_NEW: 0, CHANGE_CHANGED: 0, CHANGE_DUPLICATE: 0, None: 0}
+        changes = []
+        batch_urls = set()
+
+        for record in records:
+            change = self.classify(record)
+            if change == CHANGE_NEW:
+                url_key = normalize_url(record.article_url)
+                if url_key in batch_urls and url_key.startswith("https://"):
+                    change = CHANGE_DUPLICATE
+                batch_urls.add(url_key)
+            counts[change] += 1
+            if change in (CHANGE_NEW, CHANGE_CHANGED):
+                changes.append((record, change))
+
+        return changes, counts
+
+    def removed(self, start_date: str, end_date: str, seen: Set[str]) -> List[ArticleRecord]:
+        """
+        Статьи из индекса с датой в диапазоне, которых нет в текущей выгрузке
+
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            seen: ID страниц текущей выгрузки
+        """
+        missing = [page_id for page_id, (_, date, _) in self.pages.items()
+                   if start_date <= date[:10] <= end_date and page_id not in seen]
+        records = []
+        for page_id in missing:
+            row = self.conn.execute(
+                "SELECT title, article_url, page_id, date FROM exported WHERE database_id = ? AND page_id = ?",
+                (self.key, page_id)
+            ).fetchone()
+            records.append(ArticleRecord(*row))
+        return records
+
+    def update(self, records: Iterable[ArticleRecord], removed: Iterable[ArticleRecord] = ()):
+        """
+        Сохранение выгруженных статей и удаление пропавших (одной транзакцией)
+
+        Args:
+            records: Новые и измененные статьи
+            removed: Статьи, которых больше нет в базе Notion
+        """
+        now = time.time()
+        rows = []
+        for record in records:
+            digest = content_hash(record)
+            url_key = normalize_url(record.article_url)
+            rows.append((self.key, record.page_id, url_key, record.title,
+                         record.article_url, record.date, digest, now))
+            known = self.pages.get(record.page_id)
+            if known is not None and known[2] != url_key and self.urls.get(known[2]) == record.page_id:
+                # Ссылка страницы изменилась: прежняя свободна для других страниц
+                # (в SQLite url_key строки страницы заменяется при вставке ниже)
+                del self.urls[known[2]]
+            self.pages[record.page_id] = (digest, record.date, url_key)
+            self.urls[url_key] = record.page_id
+        removed_ids = []
+        for record in removed:
+            removed_ids.append((self.key, record.page_id))
+            known = self.pages.pop(record.page_id, None)
+            url_key = known[2] if known is not None else normalize_url(record.article_url)
+            if self.urls.get(url_key) == record.page_id:
+                del self.urls[url_key]
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO exported (database_id, page_id, url_key, title, article_url, date, "
+                "content_hash, exported_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(database_id, page_id) DO UPDATE SET url_key = excluded.url_key, "
+                "title = excluded.title, article_url = excluded.article_url, date = excluded.date, "
+                "content_hash = excluded.content_hash, exported_at = excluded.exported_at",
+                rows
+            )
+            self.conn.executemany("DELETE FROM exported WHERE database_id = ? AND page_id = ?", removed_ids)
+
+    def clear(self):
+        """Удаление всех записей базы данных (с этими фильтрами) из индекса"""
+        with self.conn:
+            self.conn.execute("DELETE FROM exported WHERE database_id = ?", (self.key,))
+        self.pages.clear()
+        self.urls.clear()
+
+    def close(self):
+        """Закрытие соединения с индексом"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
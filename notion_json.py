@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Декодирование JSON ответов Notion API.
+
+Если установлен orjson, он используется вместо стандартного json (быстрее
+разбирает большие ответы). Для инкрементального разбора нужен ijson:
+страницы из results[] выдаются по одной, пока тело ответа еще читается.
+"""
+
+import json
+from typing import Any, BinaryIO, Dict, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: bytes) -> Any:
+    """Декодирование JSON самым быстрым из доступных модулей"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _import_ijson():
+    """Отложенный импорт ijson (нужен только для инкрементального разбора)"""
+    try:
+        import ijson
+        return ijson
+    except ImportError:
+        raise ImportError("Для инкрементального разбора JSON установите пакет ijson: pip install ijson")
+
+
+def require_incremental():
+    """Проверка, что инкрементальный разбор доступен (иначе ImportError)"""
+    _import_ijson()
+
+
+def iter_query_results(stream: BinaryIO, meta: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Инкрементальный разбор ответа databases/{id}/query
+
+    Страницы выдаются по одной по мере чтения results[]; после исчерпания
+    генератора в meta лежат поля has_more и next_cursor.
+
+    Args:
+        stream: Поток с телом ответа (файл или response.raw)
+        meta: Словарь, в который записываются has_more и next_cursor
+
+    Yields:
+        Страницы из results[]
+    """
+    ijson = _import_ijson()
+    builder = None
+
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == "results.item" and event == "end_map":
+                yield builder.value
+                builder = None
+        elif prefix == "results.item" and event == "start_map":
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix in ("has_more", "next_cursor"):
+            meta[prefix] = value
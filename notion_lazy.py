@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Отложенный импорт тяжелых модулей.
+
+Модуль, импортированный через lazy_import, регистрируется сразу, но его код
+выполняется только при первом обращении к атрибуту. Так разбор аргументов
+командной строки и --help не платят за импорт requests и его зависимостей.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Модуль, который загрузится при первом обращении к его атрибутам
+
+    Если модуль уже импортирован, возвращается он сам.
+
+    Args:
+        name: Имя модуля (например, requests)
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"Модуль {name} не найден", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
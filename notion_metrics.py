@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Метрики выполнения выгрузки: число запросов, гистограмма задержек, объем
+полученных данных, повторы, ожидание из-за ограничений частоты и время этапов.
+Выгружаются в JSON или в текстовый файл формата Prometheus (textfile collector).
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+
+# Границы корзин гистограммы задержек запросов в секундах
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Metrics:
+    def __init__(self):
+        """Потокобезопасный набор счетчиков одной выгрузки"""
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.bytes_received = 0
+        self.throttle_wait_seconds = 0.0
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.stages: Dict[str, float] = {}
+
+    def record_request(self, latency: float, bytes_received: int, status_code: int):
+        """
+        Учет одного HTTP-ответа
+
+        Args:
+            latency: Время запроса в секундах
+            bytes_received: Размер тела ответа в байтах
+            status_code: HTTP статус ответа
+        """
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += bytes_received
+            if status_code == 429:
+                self.throttled += 1
+            elif status_code >= 400:
+                self.errors += 1
+            self.latency_count += 1
+            self.latency_sum += latency
+            self.latency_max = max(self.latency_max, latency)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.latency_buckets[i] += 1
+                    break
+
+    def record_error(self):
+        """Учет запроса, завершившегося ошибкой соединения или таймаутом"""
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+
+    def record_retry(self, wait: float):
+        """Учет повтора запроса и времени ожидания перед ним"""
+        with self._lock:
+            self.retries += 1
+            self.throttle_wait_seconds += wait
+
+    def record_wait(self, wait: float):
+        """Учет ожидания ограничителя частоты запросов"""
+        if wait <= 0:
+            return
+        with self._lock:
+            self.throttle_wait_seconds += wait
+
+    def add_stage_time(self, name: str, seconds: float):
+        """Добавление времени к этапу"""
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Контекстный менеджер для замера времени этапа"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - started)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Все метрики в виде словаря"""
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets["+Inf"] = self.latency_count
+
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "bytes_received": self.bytes_received,
+                "throttle_wait_seconds": round(self.throttle_wait_seconds, 6),
+                "latency": {
+                    "count": self.latency_count,
+                    "sum": round(self.latency_sum, 6),
+                    "max": round(self.latency_max, 6),
+                    "buckets": buckets,
+                },
+                "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            }
+
+    def to_prometheus(self, prefix: str = "notion_finder") -> str:
+        """Метрики в текстовом формате Prometheus"""
+        data = self.to_dict()
+        lines = []
+
+        for name, kind, help_text in (
+            ("requests", "counter", "HTTP requests sent to Notion API"),
+            ("errors", "counter", "Failed HTTP requests"),
+            ("retries", "counter", "Retried HTTP requests"),
+            ("throttled", "counter", "Responses with status 429"),
+            ("bytes_received", "counter", "Response body bytes received"),
+            ("throttle_wait_seconds", "counter", "Time spent waiting for backoff and rate limits"),
+        ):
+            lines.append(f"# HELP {prefix}_{name}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_{name}_total {kind}")
+            lines.append(f"{prefix}_{name}_total {data[name]}")
+
+        lines.append(f"# HELP {prefix}_request_duration_seconds Notion API request latency")
+        lines.append(f"# TYPE {prefix}_request_duration_seconds histogram")
+        for bound, count in data["latency"]["buckets"].items():
+            lines.append(f'{prefix}_request_duration_seconds_bucket{{le="{bound}"}} {count}')
+        lines.append(f"{prefix}_request_duration_seconds_sum {data['latency']['sum']}")
+        lines.append(f"{prefix}_request_duration_seconds_count {data['latency']['count']}")
+
+        lines.append(f"# HELP {prefix}_stage_seconds Wall time per export stage")
+        lines.append(f"# TYPE {prefix}_stage_seconds gauge")
+        for name, seconds in data["stages"].items():
+            lines.append(f'{prefix}_stage_seconds{{stage="{name}"}} {seconds}')
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _write_atomic(path: str, content: str):
+        """Атомарная запись файла (чтобы сборщик не прочитал его наполовину)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    def write_json(self, path: str):
+        """Сохранение метрик в JSON"""
+        self._write_atomic(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: str):
+        """Сохранение метрик в текстовый файл Prometheus"""
+        self._write_atomic(path, self.to_prometheus())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Локальное зеркало базы данных Notion в SQLite с инкрементальной синхронизацией
+по last_edited_time.
+
+Notion API не возвращает архивированные и удаленные в корзину страницы, поэтому
+инкрементальный запрос их не видит. Раз в RECONCILE_DAYS дней (или по запросу)
+выполняется полная сверка: запрашиваются все страницы базы, и из зеркала
+удаляются страницы, которых нет в ответе.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from notion_records import ArticleRecord
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id TEXT PRIMARY KEY,
+    database_id TEXT NOT NULL,
+    date TEXT,
+    last_edited_time TEXT NOT NULL,
+    title TEXT NOT NULL,
+    article_url TEXT NOT NULL,
+    notion_url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_database_date ON pages (database_id, date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    database_id TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reconcile_state (
+    database_id TEXT PRIMARY KEY,
+    reconciled_at TEXT NOT NULL
+);
+"""
+
+# Как часто выполнять полную сверку зеркала с API, дней
+RECONCILE_DAYS = 7
+
+
+class NotionMirror:
+    def __init__(self, db_path: str = "notion_mirror.sqlite3"):
+        """
+        Открытие (или создание) локального зеркала
+
+        Args:
+            db_path: Путь к файлу базы SQLite
+        """
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        # Число страниц, удаленных из зеркала при последней синхронизации
+        self.removed = 0
+
+    def get_watermark(self, database_id: str) -> Optional[str]:
+        """Максимальное last_edited_time, полученное при прошлых синхронизациях"""
+        row = self.conn.execute(
+            "SELECT watermark FROM sync_state WHERE database_id = ?", (database_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, database_id: str, watermark: str):
+        """Сохранение отметки last_edited_time после синхронизации"""
+        self.conn.execute(
+            "INSERT INTO sync_state (database_id, watermark, synced_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(database_id) DO UPDATE SET watermark = excluded.watermark, "
+            "synced_at = excluded.synced_at",
+            (database_id, watermark, datetime.now().isoformat(timespec="seconds"))
+        )
+
+    def reconcile_due(self, database_id: str) -> bool:
+        """Пора ли выполнить полную сверку (прошло больше RECONCILE_DAYS дней или сверки не было)"""
+        row = self.conn.execute(
+            "SELECT reconciled_at FROM reconcile_state WHERE database_id = ?", (database_id,)
+        ).fetchone()
+        if row is None:
+            return True
+        return datetime.now() - datetime.fromisoformat(row[0]) > timedelta(days=RECONCILE_DAYS)
+
+    def remove_missing(self, database_id: str, seen: Set[str]) -> int:
+        """
+        Удаление страниц базы, которых не было в полном ответе API
+
+        Returns:
+            Число удаленных страниц
+        """
+        missing = [(page_id,) for page_id, in self.conn.execute(
+            "SELECT id FROM pages WHERE database_id = ?", (database_id,)
+        ) if page_id not in seen]
+        self.conn.executemany("DELETE FROM pages WHERE id = ?", missing)
+        self.conn.execute(
+            "INSERT INTO reconcile_state (database_id, reconciled_at) VALUES (?, ?) "
+            "ON CONFLICT(database_id) DO UPDATE SET reconciled_at = excluded.reconciled_at",
+            (database_id, datetime.now().isoformat(timespec="seconds"))
+        )
+        return len(missing)
+
+    def upsert_pages(self, finder, pages: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Вставка или обновление страниц в зеркале
+
+        Архивированные и удаленные в корзину страницы (если API их вернул)
+        удаляются из зеркала.
+
+        Args:
+            finder: Поисковик, используемый для извлечения полей статьи
+            pages: Страницы из ответа Notion API
+
+        Returns:
+            Максимальное last_edited_time среди страниц (или None для пустого списка)
+        """
+        rows = []
+        deleted = []
+        watermark = None
+        for page in pages:
+            edited = page.get("last_edited_time", "")
+            if watermark is None or edited > watermark:
+                watermark = edited
+            if page.get("archived") or page.get("in_trash"):
+                deleted.append((page["id"],))
+                continue
+            info = finder.extract_article_info(page)
+            rows.append((page["id"], finder.database_id, finder.page_date(page) or None, edited,
+                         info["title"], info["article_url"], info["notion_url"]))
+
+        self.conn.executemany("DELETE FROM pages WHERE id = ?", deleted)
+        self.removed += len(deleted)
+
+        self.conn.executemany(
+            "INSERT INTO pages (id, database_id, date, last_edited_time, title, article_url, notion_url) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET date = excluded.date, "
+            "last_edited_time = excluded.last_edited_time, title = excluded.title, "
+            "article_url = excluded.article_url, notion_url = excluded.notion_url",
+            rows
+        )
+        return watermark
+
+    def sync(self, finder, reconcile: Optional[bool] = None) -> int:
+        """
+        Инкрементальная синхронизация: загружаются только страницы,
+        измененные после сохраненной отметки last_edited_time
+
+        Отметка сохраняется после каждой страницы ответа API, поэтому прерванная
+        синхронизация продолжится с места остановки. При полной сверке
+        запрашиваются все страницы, а после последнего ответа из зеркала
+        удаляются страницы, которых в ответах не было (число - в self.removed).
+
+        Args:
+            finder: NotionArticleFinder для запросов к API
+            reconcile: Полная сверка (None - если пора, см. reconcile_due)
+
+        Returns:
+            Число полученных (новых или измененных) страниц
+        """
+        database_id = finder.database_id
+        watermark = self.get_watermark(database_id)
+        if reconcile is None:
+            reconcile = self.reconcile_due(database_id)
+        seen: Optional[Set[str]] = set() if reconcile else None
+        synced = 0
+        self.removed = 0
+
+        # Запрос с фильтром по last_edited_time не кэшируется: при той же отметке ответ
+        # из кэша не содержал бы страниц, измененных после него
+        query = finder.build_edited_since_filter(None if reconcile else watermark)
+        for results in finder.query_pages(query, use_cache=False):
+            with self.conn:
+                page_watermark = self.upsert_pages(finder, results)
+                if page_watermark and (watermark is None or page_watermark > watermark):
+                    watermark = page_watermark
+                if watermark:
+                    self.set_watermark(database_id, watermark)
+            if seen is not None:
+                seen.update(page["id"] for page in results)
+            synced += len(results)
+
+        if seen is not None:
+            with self.conn:
+                self.removed += self.remove_missing(database_id, seen)
+
+        return synced
+
+    def query_by_date(self, database_id: str, start_date: str, end_date: str) -> List[ArticleRecord]:
+        """
+        Выборка статей из зеркала по диапазону дат (по индексу на поле даты)
+
+        Args:
+            database_id: ID базы данных Notion
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+
+        Returns:
+            Список записей с информацией о статьях в порядке возрастания даты
+        """
+        # Дата может содержать время (YYYY-MM-DDTHH:MM), поэтому сравниваем по префиксу дня
+        cursor = self.conn.execute(
+            "SELECT title, article_url, id, date, last_edited_time FROM pages "
+            "WHERE database_id = ? AND date >= ? AND date < ? || 'U' ORDER BY date, id",
+            (database_id, start_date, end_date)
+        )
+        return [ArticleRecord(*row) for row in cursor]
+
+    def close(self):
+        """Закрытие соединения с базой"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
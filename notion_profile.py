@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Профиль схемы базы данных Notion для подключения новой базы.
+
+Один запрос схемы (GET databases/{id}) дает типы полей, по ним выбираются
+кандидаты на роли названия, ссылки и даты. Затем выборка страниц читается
+по одному ответу API (по 100 страниц) и для каждого поля считаются
+заполненность, несоответствия типу и объем данных на страницу. Выбранное
+сопоставление сохраняется в JSON и используется notion_article_finder.py
+(--mapping) и run_auto.py.
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from notion_article_finder import (TITLE_FIELD_CANDIDATES, URL_FIELD_CANDIDATES, rich_text_link,
+                                   rich_text_to_plain)
+from notion_json import loads
+
+
+# Файл сопоставления полей по умолчанию
+MAPPING_FILE = "notion_mapping.json"
+
+DATE_FIELD_CANDIDATES = [
+    "Дата", "Date", "дата", "date",
+    "Дата создания", "Created", "created",
+    "Дата публикации", "Published", "published",
+    "Время", "Time", "время", "time",
+]
+
+# Роль -> (подходящие типы полей, предпочтительный первым; известные названия)
+ROLES = {
+    "title": (("title", "rich_text"), TITLE_FIELD_CANDIDATES),
+    "url": (("url", "rich_text"), URL_FIELD_CANDIDATES),
+    "date": (("date",), DATE_FIELD_CANDIDATES),
+}
+
+# Доля объема страниц, начиная с которой поле вне сопоставления считается тяжелым
+HEAVY_SHARE = 0.1
+
+
+def is_filled(value: Dict[str, Any]) -> bool:
+    """Есть ли у поля страницы значение (для formula и rollup - вычисленное)"""
+    kind = value.get("type")
+    data = value.get(kind)
+    if kind == "checkbox":
+        return data is not None
+    if kind in ("formula", "rollup") and isinstance(data, dict):
+        data = data.get(data.get("type"))
+    return data not in (None, "", [], {})
+
+
+def role_value_valid(role: str, value: Dict[str, Any]) -> bool:
+    """Подходит ли значение поля своей роли: ссылка - http(s), дата - YYYY-MM-DD"""
+    kind = value.get("type")
+    if role == "url":
+        if kind == "url":
+            text = value.get("url") or ""
+        else:
+            rich_text = value.get(kind) or []
+            text = rich_text_link(rich_text) or rich_text_to_plain(rich_text)
+        return text.strip().lower().startswith(("http://", "https://"))
+    if role == "date":
+        start = (value.get("date") or {}).get("start") or ""
+        try:
+            datetime.strptime(start[:10], "%Y-%m-%d")
+        except ValueError:
+            return False
+    return True
+
+
+def schema_candidates(schema_properties: Dict[str, Any], role: str) -> List[str]:
+    """
+    Поля схемы, подходящие для роли, от наиболее вероятного
+
+    Поле предпочтительного типа подходит с любым названием, остальных
+    типов (например, rich_text для ссылки) - только с известным названием.
+    """
+    types, names = ROLES[role]
+    candidates = []
+    for position, (name, info) in enumerate(schema_properties.items()):
+        kind = info.get("type")
+        if kind not in types:
+            continue
+        known = names.index(name) if name in names else len(names)
+        if kind != types[0] and known == len(names):
+            continue
+        candidates.append(((types.index(kind), known, position), name))
+    return [name for _, name in sorted(candidates)]
+
+
+class SchemaProfiler:
+    def __init__(self, transport, database_id: str, sample_size: int = 200):
+        """
+        Args:
+            transport: NotionTransport для запросов к API
+            database_id: ID базы данных Notion
+            sample_size: Число страниц в выборке (по 100 на запрос)
+        """
+        self.transport = transport
+        self.database_id = database_id
+        self.sample_size = sample_size
+        self.requests = 0
+        self.response_bytes = 0
+
+    def fetch_schema(self) -> Dict[str, Any]:
+        """Схема базы данных (один запрос)"""
+        response = self.transport.get(f"databases/{self.database_id}")
+        self.requests += 1
+        self.response_bytes += len(response.content)
+        return loads(response.content)
+
+    def iter_sample(self) -> Iterator[Dict[str, Any]]:
+        """Страницы выборки по одной; следующий ответ запрашивается, когда разобран предыдущий"""
+        query: Dict[str, Any] = {}
+        remaining = self.sample_size
+        while remaining > 0:
+            query["page_size"] = min(100, remaining)
+            response = self.transport.post(f"databases/{self.database_id}/query", json=query)
+            self.requests += 1
+            self.response_bytes += len(response.content)
+            data = loads(response.content)
+            results = data.get("results", [])
+            yield from results[:remaining]
+            remaining -= len(results)
+            if not data.get("has_more") or not data.get("next_cursor"):
+                break
+            query["start_cursor"] = data["next_cursor"]
+
+    def profile(self) -> Dict[str, Any]:
+        """
+        Схема, выборка страниц и статистика по полям
+
+        Returns:
+            Отчет: поля (тип, заполненность, несоответствия, байты), кандидаты
+            на роли title/url/date и выбранное сопоставление property_mapping
+        """
+        schema = self.fetch_schema()
+        schema_properties = schema.get("properties", {})
+        candidates = {role: schema_candidates(schema_properties, role) for role in ROLES}
+        roles = {name: role for role, names in candidates.items() for name in names}
+
+        stats = {name: {"id": info.get("id"), "type": info.get("type"), "filled": 0, "mismatches": 0,
+                        "role_invalid": 0, "bytes": 0}
+                 for name, info in schema_properties.items()}
+        pages = 0
+        for page in self.iter_sample():
+            pages += 1
+            for name, value in page.get("properties", {}).items():
+                entry = stats.get(name)
+                if entry is None:
+                    continue
+                entry["bytes"] += len(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                if value.get("type") != entry["type"]:
+                    entry["mismatches"] += 1
+                    continue
+                if is_filled(value):
+                    entry["filled"] += 1
+                    role = roles.get(name)
+                    if role and not role_value_valid(role, value):
+                        entry["role_invalid"] += 1
+
+        # Из кандидатов одной роли выбирается наиболее заполненный корректными значениями
+        # (при равенстве - по типу и названию, как в schema_candidates)
+        mapping: Dict[str, Optional[str]] = {}
+        for role, names in candidates.items():
+            usable = [name for name in names if name not in mapping.values()]
+            mapping[role] = max(usable, default=None, key=lambda name: (
+                stats[name]["filled"] - stats[name]["role_invalid"], -usable.index(name)))
+
+        title = rich_text_to_plain(schema.get("title") or []) or "Без названия"
+        return {
+            "database_id": self.database_id,
+            "database_title": title,
+            "profiled_at": datetime.now().isoformat(timespec="seconds"),
+            "pages": pages,
+            "requests": self.requests,
+            "response_bytes": self.response_bytes,
+            "properties": stats,
+            "candidates": candidates,
+            "property_mapping": mapping,
+        }
+
+
+def heavy_properties(report: Dict[str, Any], share: float = HEAVY_SHARE) -> List[Tuple[str, float]]:
+    """Поля вне сопоставления, занимающие не меньше share объема полей страниц"""
+    properties = report["properties"]
+    total = sum(entry["bytes"] for entry in properties.values()) or 1
+    used = set(report["property_mapping"].values())
+    heavy = [(name, entry["bytes"] / total) for name, entry in properties.items()
+             if name not in used and entry["bytes"] / total >= share]
+    return sorted(heavy, key=lambda item: item[1], reverse=True)
+
+
+def print_profile(report: Dict[str, Any]):
+    """Отчет профиля в консоль"""
+    pages = report["pages"]
+    properties = report["properties"]
+    total = sum(entry["bytes"] for entry in properties.values()) or 1
+    roles = {name: role for role, name in report["property_mapping"].items() if name}
+
+    print(f"База данных: {report['database_title']} ({report['database_id']})")
+    print(f"Запросов к API: {report['requests']}, страниц в выборке: {pages}, "
+          f"получено {report['response_bytes'] / 1024:.1f} КБ")
+    print()
+    print(f"{'Поле':<32} {'Тип':<14} {'Заполнено':>9} {'Несоотв.':>9} {'Байт/стр':>9} {'Доля':>6}")
+    for name, entry in sorted(properties.items(), key=lambda item: item[1]["bytes"], reverse=True):
+        label = f"{name} [{roles[name]}]" if name in roles else name
+        filled = f"{entry['filled'] / pages * 100:.1f}%" if pages else "-"
+        mismatches = entry["mismatches"] + entry["role_invalid"]
+        per_page = entry["bytes"] / pages if pages else 0
+        print(f"{label[:32]:<32} {entry['type']:<14} {filled:>9} {mismatches:>9} "
+              f"{per_page:>9.0f} {entry['bytes'] / total * 100:>5.1f}%")
+
+    print()
+    for role, names in report["candidates"].items():
+        chosen = report["property_mapping"][role]
+        others = [name for name in names if name != chosen]
+        line = f"{role}: {chosen or 'не найдено'}"
+        if others:
+            line += f" (другие кандидаты: {', '.join(others)})"
+        print(line)
+
+    heavy = heavy_properties(report)
+    if heavy:
+        print("\nТяжелые поля, которые не нужны для выгрузки:")
+        for name, share in heavy:
+            print(f"  - {name} ({properties[name]['type']}): {share * 100:.0f}% объема страницы")
+
+
+def save_mapping(report: Dict[str, Any], path: str = MAPPING_FILE):
+    """Атомарное сохранение сопоставления полей вместе с профилем"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_property_mapping(path: str = MAPPING_FILE, database_id: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """
+    Сопоставление полей из файла профиля
+
+    Args:
+        path: Файл, сохраненный save_mapping
+        database_id: Если задан, файл другой базы данных не используется
+
+    Returns:
+        {"title", "url", "date"} -> название поля или None (нет файла, другая база)
+    """
+    try:
+        with open(path, "rb") as f:
+            report = loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if database_id and report.get("database_id") != database_id:
+        return None
+    return {role: name for role, name in (report.get("property_mapping") or {}).items() if name}
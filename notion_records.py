@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Компактная запись с информацией о статье.
+
+Вместо словаря на каждую статью хранится объект со __slots__: у него нет
+собственного __dict__, Notion URL вычисляется из ID страницы, а повторяющиеся
+значения даты интернируются. Для совместимости запись поддерживает доступ
+как к словарю: record['title'], record.get('article_url'), dict(record).
+"""
+
+import sys
+from typing import Any, Dict, Iterator, Tuple
+
+
+# Поля записи в порядке колонок выгрузки
+ARTICLE_FIELDS: Tuple[str, ...] = ("title", "article_url", "notion_url", "page_id", "date", "last_edited_time")
+
+# Результаты загрузки исходной статьи (заполняются только при --fetch-sources)
+SOURCE_FIELDS: Tuple[str, ...] = ("source_status", "source_final_url", "source_size")
+
+# Все поля, доступные через record[...] и record.get(...)
+RECORD_FIELDS: Tuple[str, ...] = ARTICLE_FIELDS + SOURCE_FIELDS
+
+# Значение article_url, если в странице нет поля URL
+NO_URL = "Нет URL"
+
+
+class ArticleRecord:
+    __slots__ = ("title", "article_url", "page_id", "date", "last_edited_time",
+                 "source_status", "source_final_url", "source_size")
+
+    def __init__(self, title: str, article_url: str, page_id: str,
+                 date: str = "", last_edited_time: str = ""):
+        """
+        Args:
+            title: Название статьи
+            article_url: URL статьи
+            page_id: ID страницы Notion
+            date: Дата статьи из поля даты (YYYY-MM-DD или с временем)
+            last_edited_time: Время последнего изменения страницы
+        """
+        self.title = title
+        self.article_url = article_url
+        self.page_id = page_id
+        # У многих статей одна и та же дата, поэтому строка хранится в одном экземпляре
+        self.date = sys.intern(date) if date else ""
+        self.last_edited_time = last_edited_time
+        self.source_status = None
+        self.source_final_url = None
+        self.source_size = None
+
+    @property
+    def notion_url(self) -> str:
+        """Ссылка на страницу в Notion"""
+        return f"https://notion.so/{self.page_id.replace('-', '')}"
+
+    def __getitem__(self, key: str) -> str:
+        if key not in RECORD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Значение поля или default, как у dict.get"""
+        if key not in RECORD_FIELDS:
+            return default
+        return getattr(self, key)
+
+    def keys(self) -> Tuple[str, ...]:
+        return ARTICLE_FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ARTICLE_FIELDS)
+
+    def __len__(self) -> int:
+        return len(ARTICLE_FIELDS)
+
+    def to_dict(self) -> Dict[str, str]:
+        """Запись в виде обычного словаря"""
+        return {field: getattr(self, field) for field in ARTICLE_FIELDS}
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ArticleRecord):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ArticleRecord(title={self.title!r}, article_url={self.article_url!r}, page_id={self.page_id!r})"
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Локальный полнотекстовый индекс выгруженных статей (SQLite FTS5).
+
+Индекс пополняется при каждой выгрузке теми же записями, что пишутся в
+выходной файл (название, ссылки, дата и текст статьи, если он выгружался
+с --bodies). Неизмененные статьи не переиндексируются. Поиск выполняется
+локально, без запросов к Notion API:
+
+    python3 notion_article_finder.py search "машинное обучение"
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Tuple
+
+from notion_records import ArticleRecord
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from notion_blocks import ArticleBodyExporter
+
+
+# Индекс по умолчанию (общий для notion_article_finder.py и run_auto.py)
+SEARCH_INDEX_PATH = "notion_search.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    page_id TEXT NOT NULL UNIQUE,
+    database_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    article_url TEXT NOT NULL,
+    notion_url TEXT NOT NULL,
+    date TEXT NOT NULL,
+    body TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_date ON articles (database_id, date);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, body, article_url,
+    content='articles', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, body, article_url)
+    VALUES (new.id, new.title, new.body, new.article_url);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, body, article_url)
+    VALUES ('delete', old.id, old.title, old.body, old.article_url);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, body, article_url)
+    VALUES ('delete', old.id, old.title, old.body, old.article_url);
+    INSERT INTO articles_fts (rowid, title, body, article_url)
+    VALUES (new.id, new.title, new.body, new.article_url);
+END;
+"""
+
+# Строка обновляется (и переиндексируется) только если поля изменились;
+# без текста статьи (выгрузка без --bodies) сохраняется прежний текст
+UPSERT = """
+INSERT INTO articles (page_id, database_id, title, article_url, notion_url, date, body, indexed_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (page_id) DO UPDATE SET
+    database_id = excluded.database_id, title = excluded.title, article_url = excluded.article_url,
+    notion_url = excluded.notion_url, date = excluded.date,
+    body = COALESCE(excluded.body, articles.body), indexed_at = excluded.indexed_at
+WHERE articles.title IS NOT excluded.title OR articles.article_url IS NOT excluded.article_url
+    OR articles.notion_url IS NOT excluded.notion_url OR articles.date IS NOT excluded.date
+    OR articles.database_id IS NOT excluded.database_id
+    OR (excluded.body IS NOT NULL AND articles.body IS NOT excluded.body)
+"""
+
+# Веса колонок при ранжировании bm25: совпадение в названии важнее, чем в тексте
+RANK_WEIGHTS = (10.0, 1.0, 2.0)
+
+# Операторы FTS5: запрос с ними передается как есть
+QUERY_OPERATORS = re.compile(r'["*():^]|\b(AND|OR|NOT|NEAR)\b')
+
+
+def match_query(text: str) -> str:
+    """
+    Запрос FTS5 из строки поиска
+
+    Обычные слова ищутся все сразу (AND) и экранируются, чтобы символы
+    вроде "-" или "+" не считались синтаксисом; запрос с операторами
+    FTS5 (кавычки, *, AND/OR/NOT, NEAR, поле:) передается без изменений.
+    """
+    text = text.strip()
+    if QUERY_OPERATORS.search(text):
+        return text
+    return " ".join(f'"{word}"' for word in text.split())
+
+
+def open_search_index(db_path: str, database_id: str) -> Optional[SearchIndex]:
+    """
+    Открытие индекса для пополнения при выгрузке
+
+    Недоступный индекс (SQLite без FTS5, каталог только для чтения) не
+    прерывает выгрузку: выводится предупреждение, и возвращается None.
+    """
+    try:
+        return SearchIndex(db_path, database_id)
+    except sqlite3.Error as e:
+        print(f"Внимание: поисковый индекс {db_path} недоступен ({e}), статьи не индексируются")
+        return None
+
+
+class SearchIndex:
+    def __init__(self, db_path: str, database_id: Optional[str] = None, batch_size: int = 1000):
+        """
+        Открытие (или создание) полнотекстового индекса
+
+        Args:
+            db_path: Путь к файлу индекса SQLite
+            database_id: ID базы данных Notion (для записи; при поиске - фильтр, None - все базы)
+            batch_size: Число статей, записываемых одной транзакцией
+        """
+        self.db_path = db_path
+        self.database_id = database_id
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(db_path)
+        try:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+        except sqlite3.Error:
+            self.conn.close()
+            raise
+        self._pending: List[tuple] = []
+        self.stats = {"indexed": 0, "changed": 0}
+        # Индекс отключается после ошибки записи: выгрузка продолжается без него
+        self.disabled = False
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def add(self, record: ArticleRecord, body: Optional[str] = None):
+        """
+        Добавление статьи в очередь на индексацию (запись пакетами по batch_size)
+
+        Args:
+            record: Запись о статье
+            body: Текст статьи (None - оставить прежний текст, если он был)
+        """
+        if self.disabled:
+            return
+        self._pending.append((record.page_id, self.database_id or "", record.title, record.article_url,
+                              record.notion_url, record.date, body, time.time()))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Запись накопленных статей одной транзакцией"""
+        if not self._pending:
+            return
+        try:
+            with self.conn:
+                # rowcount executemany - сумма по строкам: неизмененные статьи не считаются
+                changed = self.conn.executemany(UPSERT, self._pending).rowcount
+        except sqlite3.Error as e:
+            print(f"Внимание: ошибка записи в поисковый индекс {self.db_path} ({e}), индексация отключена")
+            self.disabled = True
+            self._pending = []
+            return
+        self.stats["indexed"] += len(self._pending)
+        self.stats["changed"] += max(changed, 0)
+        self._pending = []
+
+    def update(self, records: List[ArticleRecord], bodies: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+        """
+        Индексация набора статей
+
+        Args:
+            records: Записи о статьях
+            bodies: Тексты статей по page_id (необязательно)
+
+        Returns:
+            Счетчики за сеанс: обработано статей и из них добавлено или изменено
+        """
+        bodies = bodies or {}
+        for record in records:
+            self.add(record, bodies.get(record.page_id))
+        self.flush()
+        return dict(self.stats)
+
+    def search(self, text: str, limit: int = 20, start_date: Optional[str] = None,
+               end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Поиск статей с ранжированием bm25
+
+        Args:
+            text: Строка поиска (слова или запрос FTS5)
+            limit: Максимум результатов
+            start_date: Только статьи с датой не раньше (YYYY-MM-DD)
+            end_date: Только статьи с датой не позже (YYYY-MM-DD)
+
+        Returns:
+            Статьи от наиболее релевантной: поля записи, score и фрагмент текста с совпадением
+
+        Raises:
+            ValueError: Синтаксическая ошибка в запросе FTS5
+        """
+        sql = [
+            "SELECT a.page_id, a.title, a.article_url, a.notion_url, a.date, "
+            f"bm25(articles_fts, {', '.join(map(str, RANK_WEIGHTS))}) AS score, "
+            "snippet(articles_fts, 1, '[', ']', '...', 16) AS snippet "
+            "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+            "WHERE articles_fts MATCH ?"
+        ]
+        params: List[Any] = [match_query(text)]
+        if self.database_id:
+            sql.append("AND a.database_id = ?")
+            params.append(self.database_id)
+        if start_date:
+            sql.append("AND a.date >= ?")
+            params.append(start_date)
+        if end_date:
+            # Дата может содержать время: сравниваются только YYYY-MM-DD
+            sql.append("AND substr(a.date, 1, 10) <= ?")
+            params.append(end_date)
+        sql.append("ORDER BY score LIMIT ?")
+        params.append(limit)
+
+        try:
+            rows = self.conn.execute(" ".join(sql), params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"некорректный поисковый запрос ({e})") from None
+
+        columns = ("page_id", "title", "article_url", "notion_url", "date", "score", "snippet")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def close(self):
+        """Запись оставшихся статей и закрытие индекса"""
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class BodyIndexer:
+    def __init__(self, search_index: SearchIndex, bodies: ArticleBodyExporter, max_pending: int = 100):
+        """
+        Индексация статей по мере выгрузки их текста (--bodies)
+
+        Статья ставится в очередь выгрузки текста и попадает в индекс, когда
+        текст сохранен. В памяти держится не больше max_pending статей: при
+        переполнении ожидается самая старая выгрузка.
+
+        Args:
+            search_index: Полнотекстовый индекс
+            bodies: Выгрузка текста статей
+            max_pending: Максимум статей, ожидающих индексации (около одного ответа API)
+        """
+        self.search_index = search_index
+        self.bodies = bodies
+        self.max_pending = max_pending
+        self.pending: Deque[Tuple[ArticleRecord, Future]] = deque()
+
+    def submit(self, record: ArticleRecord):
+        """Постановка статьи в очередь выгрузки текста и индексация уже выгруженных"""
+        self.pending.append((record, self.bodies.submit(record)))
+        while self.pending and (self.pending[0][1].done() or len(self.pending) > self.max_pending):
+            self._index_next()
+
+    def _index_next(self):
+        record, future = self.pending.popleft()
+        # Ожидание без исключения: ошибки выгрузки текста учитываются в ее статистике
+        future.exception()
+        self.search_index.add(record, self.bodies.article_text(record))
+
+    def finish(self):
+        """Индексация оставшихся статей после завершения их выгрузки"""
+        while self.pending:
+            self._index_next()
+        self.search_index.flush()
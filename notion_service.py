@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Локальный HTTP-сервис запросов статей по диапазону дат.
+
+Один долгоживущий процесс держит прогретый поисковик (схема базы, пул
+соединений, ограничитель частоты) и отдает статьи в JSON или CSV.
+Одинаковые запросы, пришедшие одновременно, объединяются в одну выгрузку
+из Notion API, а результат хранится в общем для всех клиентов кэше в
+памяти (TTL + LRU), поэтому инструменты, запрашивающие "последние 7 дней"
+с разницей в несколько минут, не повторяют пагинацию.
+
+    python3 notion_service.py --port 8780
+    curl 'http://127.0.0.1:8780/articles?days=7'
+    curl 'http://127.0.0.1:8780/articles?start_date=2025-10-01&end_date=2025-10-31&format=csv'
+    curl 'http://127.0.0.1:8780/stats'
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from notion_lazy import lazy_import
+from notion_records import ArticleRecord
+
+if TYPE_CHECKING:
+    from notion_article_finder import NotionArticleFinder
+
+requests = lazy_import("requests")
+
+
+# Откуда взят результат запроса
+SOURCE_CACHE = "cache"
+SOURCE_COALESCED = "coalesced"
+SOURCE_FETCH = "fetch"
+
+
+class QueryService:
+    def __init__(self, finder: NotionArticleFinder, ttl: float = 300.0, max_entries: int = 64):
+        """
+        Запросы статей по датам с объединением одинаковых запросов и общим кэшем
+
+        Args:
+            finder: NotionArticleFinder (общий транспорт и ограничитель частоты для всех клиентов)
+            ttl: Сколько секунд результат выгрузки отдается из кэша
+            max_entries: Максимум диапазонов дат в кэше (давно не запрошенные вытесняются)
+        """
+        self.finder = finder
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "fetches": 0, "errors": 0}
+        # (начальная дата, конечная дата) -> (время выгрузки, записи)
+        self._cache: OrderedDict[Tuple[str, str], Tuple[float, List[ArticleRecord]]] = OrderedDict()
+        # Выгрузки, которые выполняются сейчас: остальные клиенты ждут их результата
+        self._in_flight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, start_date: str, end_date: str) -> List[ArticleRecord]:
+        """
+        Выгрузка статей из Notion API (все ответы пагинации)
+
+        Raises:
+            requests.exceptions.RequestException: Ошибка запроса к API (после повторов)
+        """
+        self.finder.resolve_extractor()
+        return list(self.finder.iter_articles_info(self.finder.iter_articles_by_date(start_date, end_date)))
+
+    def articles(self, start_date: str, end_date: str,
+                 refresh: bool = False) -> Tuple[List[ArticleRecord], str, float]:
+        """
+        Статьи за диапазон дат: из кэша, из уже идущей выгрузки или новой выгрузкой
+
+        Args:
+            start_date: Начальная дата в формате YYYY-MM-DD
+            end_date: Конечная дата в формате YYYY-MM-DD
+            refresh: Не брать результат из кэша (идущая выгрузка все равно переиспользуется)
+
+        Returns:
+            Записи, источник (cache, coalesced, fetch) и возраст результата в секундах
+
+        Raises:
+            requests.exceptions.RequestException: Ошибка выгрузки (ошибки в кэш не попадают)
+        """
+        key = (start_date, end_date)
+        with self._lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            cached = self._cache.get(key)
+            if cached and not refresh and now - cached[0] < self.ttl:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return cached[1], SOURCE_CACHE, now - cached[0]
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats["fetches"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            fetched_at, records = future.result()
+            return records, SOURCE_COALESCED, time.monotonic() - fetched_at
+
+        try:
+            records = self.fetch(start_date, end_date)
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+                self.stats["errors"] += 1
+            future.set_exception(e)
+            raise
+
+        fetched_at = time.monotonic()
+        with self._lock:
+            self._cache[key] = (fetched_at, records)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            del self._in_flight[key]
+        future.set_result((fetched_at, records))
+        return records, SOURCE_FETCH, 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Счетчики сервиса и транспорта (сколько запросов реально ушло в API)"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cache_entries"] = len(self._cache)
+            stats["in_flight"] = len(self._in_flight)
+        metrics = self.finder.metrics
+        stats["api"] = {
+            "requests": metrics.requests,
+            "retries": metrics.retries,
+            "throttled": metrics.throttled,
+            "throttle_wait_seconds": round(metrics.throttle_wait_seconds, 3),
+        }
+        return stats
+
+
+def parse_range(params: Dict[str, List[str]]) -> Tuple[str, str]:
+    """
+    Диапазон дат из параметров запроса: start_date и end_date или days (последние N дней)
+
+    Raises:
+        ValueError: Параметры не заданы или заданы неверно
+    """
+    if "days" in params:
+        try:
+            days = int(params["days"][0])
+        except ValueError:
+            raise ValueError("days должно быть целым числом") from None
+        if days < 0:
+            raise ValueError("days не может быть отрицательным")
+        end = datetime.now()
+        return (end - timedelta(days=days)).strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+    start_date = params.get("start_date", [""])[0]
+    end_date = params.get("end_date", [""])[0]
+    if not start_date or not end_date:
+        raise ValueError("укажите start_date и end_date (YYYY-MM-DD) или days")
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError("неверный формат даты, используйте YYYY-MM-DD") from None
+    if start > end:
+        raise ValueError("начальная дата не может быть больше конечной")
+    # Ключ кэша в одном виде: 2025-1-5 и 2025-01-05 - один и тот же запрос
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+class QueryServer:
+    def __init__(self, service: QueryService, host: str = "127.0.0.1", port: int = 8780):
+        """
+        HTTP-сервер поверх QueryService
+
+        GET /articles (start_date, end_date или days; format=json|csv; refresh=1),
+        GET /stats, GET /health
+
+        Args:
+            service: Сервис запросов
+            host: Адрес для прослушивания
+            port: Порт (0 - выбрать свободный)
+        """
+        self.service = service
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str,
+                      headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self._send(status, body, "application/json; charset=utf-8", headers)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                path = parsed.path.rstrip("/")
+                if path == "/health":
+                    self._send_json(200, {"status": "ok"})
+                elif path == "/stats":
+                    self._send_json(200, server.service.snapshot())
+                elif path == "/articles":
+                    self._articles(parse_qs(parsed.query))
+                else:
+                    self._send_json(404, {"error": "неизвестный путь, доступны /articles, /stats, /health"})
+
+            def _articles(self, params: Dict[str, List[str]]):
+                output_format = params.get("format", ["json"])[0]
+                if output_format not in ("json", "csv"):
+                    self._send_json(400, {"error": "format должен быть json или csv"})
+                    return
+                try:
+                    start_date, end_date = parse_range(params)
+                except ValueError as e:
+                    self._send_json(400, {"error": str(e)})
+                    return
+
+                refresh = params.get("refresh", ["0"])[0] not in ("0", "", "false")
+                try:
+                    records, source, age = server.service.articles(start_date, end_date, refresh)
+                except requests.exceptions.RequestException as e:
+                    self._send_json(502, {"error": f"ошибка запроса к Notion API: {e}"})
+                    return
+                except Exception as e:
+                    self._send_json(500, {"error": f"ошибка сервиса: {e}"})
+                    return
+
+                headers = {"X-Cache": source, "Age": str(int(age))}
+                if output_format == "csv":
+                    finder = server.service.finder
+                    body = finder.CSV_HEADER + "".join(finder.format_csv_row(record) for record in records)
+                    self._send(200, body.encode("utf-8"), "text/csv; charset=utf-8", headers)
+                    return
+                self._send_json(200, {
+                    "database_id": server.service.finder.database_id,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "count": len(records),
+                    "source": source,
+                    "age_seconds": round(age, 3),
+                    "articles": [record.to_dict() for record in records],
+                }, headers)
+
+        return Handler
+
+    def start(self) -> "QueryServer":
+        """Запуск сервера в фоновом потоке"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Остановка сервера"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Локальный HTTP-сервис запросов статей Notion по датам")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес (по умолчанию: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8780, help="Порт (по умолчанию: 8780)")
+    parser.add_argument("--token", help="Токен Notion API (по умолчанию: из config.py)")
+    parser.add_argument("--database-id", help="ID базы данных (по умолчанию: из config.py)")
+    parser.add_argument("--ttl", type=float, default=300,
+                        help="Сколько секунд отдавать результат из кэша (по умолчанию: 300)")
+    parser.add_argument("--max-entries", type=int, default=64,
+                        help="Максимум диапазонов дат в кэше (по умолчанию: 64)")
+    parser.add_argument("--rate", type=float, default=3.0,
+                        help="Ограничение запросов к API в секунду (по умолчанию: 3)")
+    parser.add_argument("--shared-rate", action="store_true",
+                        help="Лимит --rate общий с другими процессами с этим токеном на этом компьютере")
+    parser.add_argument("--rate-state", metavar="FILE",
+                        help="Файл состояния общего лимита (по умолчанию: свой для токена во временном каталоге)")
+    parser.add_argument("--mapping", metavar="FILE",
+                        help="Сопоставление полей, сохраненное debug_notion.py (например, notion_mapping.json)")
+    args = parser.parse_args()
+
+    token, database_id = args.token, args.database_id
+    property_mapping = query_filters = query_sorts = None
+    try:
+        import config
+        token = token or config.NOTION_TOKEN
+        database_id = database_id or config.DATABASE_ID
+        property_mapping = getattr(config, "PROPERTY_MAPPING", None)
+        query_filters = getattr(config, "QUERY_FILTERS", None)
+        query_sorts = getattr(config, "QUERY_SORTS", None)
+    except (ImportError, AttributeError):
+        pass
+    if not token or not database_id:
+        print("Ошибка: укажите --token и --database-id или заполните config.py")
+        return
+    if args.ttl < 0 or args.max_entries < 1:
+        print("Ошибка: --ttl не может быть отрицательным, --max-entries должно быть не меньше 1")
+        return
+    if args.mapping:
+        from notion_profile import load_property_mapping
+        saved = load_property_mapping(args.mapping, database_id)
+        if saved is None:
+            print(f"Внимание: {args.mapping} не найден или относится к другой базе данных, "
+                  "поля определяются по схеме")
+        else:
+            property_mapping = {**saved, **{k: v for k, v in (property_mapping or {}).items() if v}}
+
+    # Аргументы проверены: импорт сетевых модулей
+    from notion_article_finder import NotionArticleFinder
+    from notion_transport import make_rate_limiter
+
+    try:
+        rate_limiter = make_rate_limiter(token, args.rate, args.shared_rate, args.rate_state)
+        finder = NotionArticleFinder(token, database_id, property_mapping=property_mapping,
+                                     filters=query_filters, sorts=query_sorts, rate_limiter=rate_limiter)
+        server = QueryServer(QueryService(finder, ttl=args.ttl, max_entries=args.max_entries),
+                             args.host, args.port)
+    except (RuntimeError, OSError) as e:
+        print(f"Ошибка: {e}")
+        return
+
+    # Схема базы запрашивается один раз при запуске, а не первым клиентом
+    finder.resolve_extractor()
+    print(f"Сервис запросов: {server.base_url} (база {database_id}, кэш {args.ttl:g} с, "
+          f"до {args.max_entries} диапазонов)")
+    print(f"Пример: curl '{server.base_url}/articles?days=7'")
+    print("Для остановки нажмите Ctrl+C")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+    stats = server.service.snapshot()
+    print(f"\nЗапросов к сервису: {stats['requests']}, из кэша: {stats['cache_hits']}, "
+          f"объединено: {stats['coalesced']}, выгрузок: {stats['fetches']}, ошибок: {stats['errors']}")
+    print(f"Запросов к Notion API: {stats['api']['requests']} (повторов: {stats['api']['retries']})")
+    if hasattr(rate_limiter, "summary"):
+        print(rate_limiter.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Загрузка исходных статей по article_url: параллельно, с ограничением числа
+соединений на хост, условными запросами (ETag / Last-Modified) и дисковым
+кэшем, адресуемым по содержимому (sha256).
+
+Для каждой статьи записываются статус ответа, итоговый URL после редиректов
+и размер содержимого.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from notion_json import loads
+from notion_records import ArticleRecord
+
+
+USER_AGENT = "Notion-Article-Finder/1.0 (+source fetcher)"
+
+
+class SourceFetcher:
+    def __init__(self, cache_dir: str = ".source_cache",
+                 max_workers: int = 16,
+                 per_host: int = 4,
+                 timeout: Union[float, Tuple[float, float]] = (5.0, 30.0),
+                 refresh: bool = False):
+        """
+        Параллельная загрузка исходных статей
+
+        Args:
+            cache_dir: Каталог кэша (objects/ - содержимое по sha256, urls/ - метаданные URL)
+            max_workers: Общее число одновременных загрузок
+            per_host: Максимум одновременных соединений к одному хосту
+            timeout: Таймаут запроса в секундах (connect, read) или одно число
+            refresh: Загружать заново без условных заголовков
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.refresh = refresh
+        self.stats = {"fetched": 0, "not_modified": 0, "errors": 0, "skipped": 0, "bytes": 0}
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "urls"), exist_ok=True)
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Семафор, ограничивающий число одновременных запросов к хосту"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+        return slot
+
+    def _meta_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, "urls", hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def object_path(self, digest: str) -> str:
+        """Путь к сохраненному содержимому по его sha256"""
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest)
+
+    def load_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        """Метаданные прошлой загрузки URL (None, если URL не загружался)"""
+        try:
+            with open(self._meta_path(url), "rb") as f:
+                return loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def save_meta(self, url: str, meta: Dict[str, Any]):
+        """Атомарное сохранение метаданных URL"""
+        path = self._meta_path(url)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _store_body(self, response: requests.Response) -> Tuple[str, int]:
+        """
+        Потоковая запись тела ответа в кэш по sha256 содержимого
+
+        Одинаковое содержимое разных URL хранится один раз.
+
+        Returns:
+            Пара (sha256, размер в байтах)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        objects_dir = os.path.join(self.cache_dir, "objects")
+        fd, tmp_path = tempfile.mkstemp(dir=objects_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            hexdigest = digest.hexdigest()
+            path = self.object_path(hexdigest)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return hexdigest, size
+
+    def fetch(self, url: str) -> Dict[str, Any]:
+        """
+        Загрузка одного URL с условными заголовками
+
+        Args:
+            url: Адрес исходной статьи
+
+        Returns:
+            Словарь: status (HTTP статус, 0 - ошибка соединения), final_url, size,
+            sha256 и source (fetched, not_modified или error)
+        """
+        meta = None if self.refresh else self.load_meta(url)
+        headers = {}
+        if meta and meta.get("status") == 200:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            with self._host_slot(url):
+                with self.session.get(url, headers=headers, timeout=self.timeout,
+                                      stream=True, allow_redirects=True) as response:
+                    if response.status_code == 304 and meta:
+                        with self._lock:
+                            self.stats["not_modified"] += 1
+                        return dict(meta, source="not_modified")
+
+                    digest, size = self._store_body(response)
+                    result = {
+                        "url": url,
+                        "status": response.status_code,
+                        "final_url": response.url,
+                        "size": size,
+                        "sha256": digest,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "fetched_at": time.time(),
+                    }
+        except requests.exceptions.RequestException as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            return {"url": url, "status": 0, "final_url": "", "size": 0, "sha256": "",
+                    "error": str(e), "source": "error"}
+
+        self.save_meta(url, result)
+        with self._lock:
+            self.stats["fetched"] += 1
+            self.stats["bytes"] += size
+        return dict(result, source="fetched")
+
+    def fetch_record(self, record: ArticleRecord) -> ArticleRecord:
+        """Загрузка исходной статьи записи и заполнение колонок source_*"""
+        if not record.article_url.startswith(("http://", "https://")):
+            with self._lock:
+                self.stats["skipped"] += 1
+            return record
+
+        result = self.fetch(record.article_url)
+        record.source_status = result["status"]
+        record.source_final_url = result["final_url"]
+        record.source_size = result["size"]
+        return record
+
+    def iter_fetch(self, records: Iterable[ArticleRecord], window: Optional[int] = None) -> Iterator[ArticleRecord]:
+        """
+        Параллельная загрузка с сохранением порядка записей
+
+        Одновременно в работе не больше window записей, поэтому функция
+        подходит для потоковой выгрузки.
+
+        Args:
+            records: Поток записей о статьях
+            window: Число записей в работе (по умолчанию: 4 * max_workers)
+
+        Yields:
+            Те же записи с заполненными колонками source_*, в исходном порядке
+        """
+        window = window or 4 * self.max_workers
+        pending = deque()
+
+        for record in records:
+            pending.append(self.executor.submit(self.fetch_record, record))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+    def close(self):
+        """Остановка пула потоков и закрытие соединений"""
+        self.executor.shutdown()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
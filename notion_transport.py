@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Общий транспортный слой для запросов к Notion API: пул keep-alive соединений,
+повторы с экспоненциальной задержкой, таймауты и ограничение частоты запросов
+(в пределах процесса или общее для всех процессов с одним токеном).
+"""
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+
+from notion_metrics import Metrics
+
+
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+# Коды ответа, при которых запрос имеет смысл повторить
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Лимит Notion API для одной интеграции, запросов в секунду
+NOTION_RATE_LIMIT = 3.0
+
+
+def notion_headers(notion_token: str) -> Dict[str, str]:
+    """Заголовки авторизации и версии для запросов к Notion API"""
+    return {
+        "Authorization": f"Bearer {notion_token}",
+        "Content-Type": "application/json",
+        "Notion-Version": NOTION_VERSION
+    }
+
+
+def retry_delay(attempt: int, retry_after: Optional[str],
+                backoff_base: float, backoff_max: float) -> float:
+    """
+    Вычисляет задержку перед повтором запроса
+
+    Если сервер прислал заголовок Retry-After, используется он,
+    иначе - экспоненциальная задержка с полным джиттером.
+
+    Args:
+        attempt: Номер повтора, начиная с 0
+        retry_after: Значение заголовка Retry-After (или None)
+        backoff_base: Базовая задержка в секундах
+        backoff_max: Максимальная задержка в секундах
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), backoff_max)
+        except ValueError:
+            pass
+    return random.uniform(0, min(backoff_max, backoff_base * (2 ** attempt)))
+
+
+class RateLimiter:
+    def __init__(self, rate: float = 3.0, burst: Optional[float] = None):
+        """
+        Потокобезопасный ограничитель частоты запросов (token bucket)
+
+        Args:
+            rate: Допустимое число запросов в секунду
+            burst: Емкость корзины - сколько запросов можно сделать подряд без ожидания
+        """
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Получение разрешения на один запрос, при необходимости с ожиданием
+
+        Returns:
+            Время ожидания в секундах
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            # Токен резервируется сразу, поэтому при отрицательном балансе ждем его накопления
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Приостановка выдачи токенов (ответ 429): следующие запросы ждут не меньше seconds"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class SharedRateLimiter:
+    # Процесс считается активным, если запрашивал токен за последние столько секунд
+    ACTIVE_WINDOW = 10.0
+    # Максимальная пауза после 429, секунд
+    MAX_PAUSE = 60.0
+
+    def __init__(self, state_path: str, rate: float = NOTION_RATE_LIMIT, burst: Optional[float] = None,
+                 log_threshold: float = 0.5, log_interval: float = 10.0,
+                 log: Optional[Callable[[str], None]] = print):
+        """
+        Ограничитель частоты запросов (token bucket), общий для процессов на одном компьютере
+
+        Состояние корзины хранится в файле и меняется под блокировкой fcntl,
+        поэтому несколько процессов с одним токеном вместе не превышают rate.
+        Все процессы должны использовать одинаковые rate и burst.
+
+        Args:
+            state_path: Файл состояния (общий для всех процессов)
+            rate: Допустимое число запросов в секунду на все процессы
+            burst: Емкость корзины - сколько запросов можно сделать подряд без ожидания
+            log_threshold: Ожидания не короче этого (секунд) выводятся в лог
+            log_interval: Не чаще одного сообщения об ожидании за столько секунд
+            log: Функция вывода сообщений (None - не выводить)
+
+        Raises:
+            RuntimeError: Нет модуля fcntl (Windows)
+            OSError: Не удалось открыть файл состояния
+        """
+        if fcntl is None:
+            raise RuntimeError("Общий ограничитель частоты требует fcntl (Linux, macOS)")
+        self.state_path = state_path
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.log_threshold = log_threshold
+        self.log_interval = log_interval
+        self.log = log
+        self.stats = {"requests": 0, "waits": 0, "wait_seconds": 0.0, "max_wait": 0.0, "pauses": 0}
+        self._lock = threading.Lock()
+        self._fd = os.open(state_path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._logged_at = 0.0
+        self._unlogged = [0, 0.0]
+
+    @staticmethod
+    def default_path(notion_token: str) -> str:
+        """Файл состояния по умолчанию: свой для каждого токена (лимит Notion - на интеграцию)"""
+        digest = hashlib.sha256(notion_token.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(tempfile.gettempdir(), f"notion_rate_{digest}.json")
+
+    def _update(self, change: Callable[[Dict[str, Any], float], float]) -> Tuple[float, int]:
+        """
+        Изменение состояния корзины под блокировкой файла
+
+        Returns:
+            Результат change и число активных процессов
+        """
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                try:
+                    state = json.loads(os.pread(self._fd, 65536, 0))
+                    float(state["tokens"]), float(state["updated"])
+                except (ValueError, TypeError, KeyError):
+                    state = {"tokens": self.capacity, "updated": now, "clients": {}}
+
+                # Пополнение корзины (перевод часов назад не уменьшает баланс);
+                # до конца паузы после 429 баланс остается отрицательным
+                elapsed = max(0.0, now - state["updated"])
+                state["tokens"] = min(self.capacity, state["tokens"] + elapsed * self.rate)
+                state["updated"] = now
+                result = change(state, now)
+
+                clients = {pid: seen for pid, seen in state.get("clients", {}).items()
+                           if now - seen < self.ACTIVE_WINDOW}
+                clients[str(os.getpid())] = now
+                state["clients"] = clients
+
+                data = json.dumps(state).encode("utf-8")
+                os.ftruncate(self._fd, 0)
+                os.pwrite(self._fd, data, 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return result, len(clients)
+
+    def acquire(self) -> float:
+        """
+        Получение разрешения на один запрос, при необходимости с ожиданием
+
+        Returns:
+            Время ожидания в секундах
+        """
+        def reserve(state: Dict[str, Any], now: float) -> float:
+            # Токен резервируется сразу, поэтому при отрицательном балансе ждем его накопления
+            state["tokens"] -= 1
+            return -state["tokens"] / self.rate if state["tokens"] < 0 else 0.0
+
+        wait, clients = self._update(reserve)
+        self._record(wait, clients)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Приостановка выдачи токенов всем процессам (ответ 429): следующие запросы ждут не меньше seconds"""
+        def block(state: Dict[str, Any], now: float) -> float:
+            state["tokens"] = min(state["tokens"], -min(seconds, self.MAX_PAUSE) * self.rate)
+            return seconds
+
+        self._update(block)
+        with self._lock:
+            self.stats["pauses"] += 1
+
+    def _record(self, wait: float, clients: int):
+        """Учет ожидания и вывод в лог длинных ожиданий"""
+        message = None
+        with self._lock:
+            self.stats["requests"] += 1
+            if wait <= 0:
+                return
+            self.stats["waits"] += 1
+            self.stats["wait_seconds"] += wait
+            self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+            self._unlogged[0] += 1
+            self._unlogged[1] += wait
+            now = time.monotonic()
+            if self.log and wait >= self.log_threshold and now - self._logged_at >= self.log_interval:
+                message = (f"⏳ Общий лимит {self.rate:g} запр/с (активных процессов: {clients}): "
+                           f"ожидание {wait:.2f} с, с прошлого сообщения ожиданий {self._unlogged[0]} "
+                           f"(всего {self._unlogged[1]:.1f} с)")
+                self._logged_at = now
+                self._unlogged = [0, 0.0]
+        if message:
+            self.log(message)
+
+    def summary(self) -> str:
+        """Итог ожиданий этого процесса для вывода в конце выгрузки"""
+        with self._lock:
+            stats = dict(self.stats)
+        return (f"Общий лимит {self.rate:g} запр/с: запросов {stats['requests']}, "
+                f"ожиданий {stats['waits']} (всего {stats['wait_seconds']:.1f} с, "
+                f"максимум {stats['max_wait']:.2f} с), пауз после 429: {stats['pauses']}")
+
+    def close(self):
+        """Закрытие файла состояния"""
+        os.close(self._fd)
+
+
+def make_rate_limiter(notion_token: str, rate: Optional[float] = None, shared: bool = False,
+                      state_path: Optional[str] = None) -> Optional[Union[RateLimiter, SharedRateLimiter]]:
+    """
+    Ограничитель частоты запросов по параметрам командной строки
+
+    Args:
+        notion_token: Токен (по нему выбирается файл состояния общего ограничителя)
+        rate: Запросов в секунду (None - без ограничения, для общего - лимит Notion)
+        shared: Общий для процессов ограничитель (также включается state_path)
+        state_path: Файл состояния общего ограничителя
+
+    Returns:
+        RateLimiter, SharedRateLimiter или None
+    """
+    if shared or state_path:
+        return SharedRateLimiter(state_path or SharedRateLimiter.default_path(notion_token),
+                                 rate if rate else NOTION_RATE_LIMIT)
+    return RateLimiter(rate) if rate else None
+
+
+class StreamBody:
+    """
+    Тело потокового ответа (response.raw) для чтения парсером
+
+    Обрыв соединения при чтении response.raw напрямую приходит исключением
+    urllib3 (ProtocolError с IncompleteRead), мимо обработчиков
+    requests.RequestException. Ошибки переводятся так же, как в
+    Response.iter_content.
+    """
+
+    def __init__(self, raw: Any):
+        self.raw = raw
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        try:
+            return self.raw.read(size)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+
+
+class NotionTransport:
+    def __init__(self, notion_token: str,
+                 base_url: str = NOTION_API_URL,
+                 timeout: Union[float, Tuple[float, float]] = (10.0, 60.0),
+                 max_retries: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 pool_size: int = 10,
+                 rate_limiter: Optional[Union[RateLimiter, SharedRateLimiter]] = None,
+                 in_flight: Optional[threading.Semaphore] = None,
+                 metrics: Optional[Metrics] = None):
+        """
+        Инициализация транспорта
+
+        Args:
+            notion_token: Токен доступа к Notion API
+            base_url: Базовый URL Notion API
+            timeout: Таймаут запроса в секундах (connect, read) или одно число
+            max_retries: Максимальное число повторов одного запроса
+            backoff_base: Базовая задержка экспоненциального backoff в секундах
+            backoff_max: Максимальная задержка между повторами в секундах
+            pool_size: Размер пула keep-alive соединений
+            rate_limiter: Ограничитель частоты запросов (может быть общим для нескольких
+                транспортов, а SharedRateLimiter - и для нескольких процессов)
+            in_flight: Семафор, ограничивающий число одновременных запросов
+            metrics: Сборщик метрик (по умолчанию создается свой)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.in_flight = in_flight
+        self.metrics = metrics or Metrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(notion_headers(notion_token))
+
+    def _url(self, path: str) -> str:
+        """Преобразует относительный путь API в полный URL"""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Задержка перед повтором с учетом Retry-After из ответа"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        return retry_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+
+    def request(self, method: str, path: str, raise_for_status: bool = True,
+                **kwargs: Any) -> requests.Response:
+        """
+        Выполнение запроса к Notion API с повторами
+
+        Args:
+            method: HTTP метод
+            path: Путь относительно базового URL (или полный URL)
+            raise_for_status: Выбрасывать исключение при ошибочном статусе ответа
+            **kwargs: Дополнительные аргументы для requests.Session.request
+                (при stream=True тело ответа не читается, его читает вызывающий код)
+
+        Returns:
+            Ответ сервера
+        """
+        url = self._url(path)
+        kwargs.setdefault("timeout", self.timeout)
+
+        attempt = 0
+        while True:
+            response = None
+            if self.rate_limiter:
+                self.metrics.record_wait(self.rate_limiter.acquire())
+            try:
+                with self.in_flight or nullcontext():
+                    started = time.perf_counter()
+                    response = self.session.request(method, url, **kwargs)
+                    latency = time.perf_counter() - started
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.metrics.record_error()
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if kwargs.get("stream"):
+                    # Тело еще не прочитано, размер берется из заголовка
+                    size = int(response.headers.get("Content-Length") or 0)
+                else:
+                    size = len(response.content)
+                self.metrics.record_request(latency, size, response.status_code)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    if raise_for_status:
+                        response.raise_for_status()
+                    return response
+                # Непрочитанный ответ нужно закрыть, чтобы соединение вернулось в пул
+                response.close()
+
+            self.wait_before_retry(attempt, response)
+            attempt += 1
+
+    def wait_before_retry(self, attempt: int, response: Optional[requests.Response] = None):
+        """
+        Пауза перед повтором запроса (с учетом Retry-After и общего ограничителя)
+
+        Args:
+            attempt: Номер повтора, начиная с 0
+            response: Ответ, после которого нужен повтор (None - ошибка соединения)
+        """
+        delay = self._retry_delay(attempt, response)
+        if self.rate_limiter and response is not None and response.status_code == 429:
+            # Пауза для всех, кто делит ограничитель, а не только для этого запроса
+            self.rate_limiter.pause(delay)
+        self.metrics.record_retry(delay)
+        time.sleep(delay)
+
+    def get(self, path: str, **kwargs: Any) -> requests.Response:
+        """GET запрос к Notion API"""
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> requests.Response:
+        """POST запрос к Notion API"""
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        """Закрытие пула соединений"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Режим наблюдения: один процесс с прогретым поисковиком и пулом соединений
+периодически запрашивает страницы, созданные или измененные после последней
+проверки, и дописывает новые строки в выходной файл.
+
+Интервал опроса адаптивный: при отсутствии изменений он увеличивается
+(до max_interval), при появлении изменений сбрасывается до min_interval.
+"""
+
+import json
+import os
+import signal
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from notion_checkpoint import RESUMABLE_FORMATS
+from notion_exporters import CsvExporter, JsonlExporter
+from notion_index import CHANGE_CHANGED, CHANGE_DUPLICATE, CHANGE_NEW, ExportIndex
+from notion_json import loads
+from notion_lazy import lazy_import
+
+requests = lazy_import("requests")
+
+
+class ArticleWatcher:
+    def __init__(self, finder, output_file: str, export_format: str = "csv",
+                 start_date: Optional[str] = None, end_date: Optional[str] = None,
+                 min_interval: float = 30.0, max_interval: float = 600.0, backoff: float = 2.0,
+                 index_path: Optional[str] = None):
+        """
+        Наблюдение за базой данных Notion
+
+        Args:
+            finder: NotionArticleFinder (без кэша ответов: нужны свежие данные)
+            output_file: Путь к выходному файлу (строки дописываются)
+            export_format: Формат выгрузки: csv или jsonl
+            start_date: Учитывать только статьи с датой не раньше (YYYY-MM-DD)
+            end_date: Учитывать только статьи с датой не позже (YYYY-MM-DD)
+            min_interval: Минимальный интервал опроса в секундах
+            max_interval: Максимальный интервал опроса в секундах
+            backoff: Во сколько раз увеличивать интервал после опроса без изменений
+            index_path: Индекс уже записанных статей (по умолчанию: <выходной файл>.index.sqlite3)
+        """
+        if export_format not in RESUMABLE_FORMATS:
+            raise ValueError(f"Режим наблюдения поддерживает только форматы {', '.join(RESUMABLE_FORMATS)}")
+
+        self.finder = finder
+        self.export_format = export_format
+        self.output_file = finder.output_path(output_file, export_format)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.state_file = self.output_file + ".watch.json"
+        self.index_path = index_path or self.output_file + ".index.sqlite3"
+        self.index: Optional[ExportIndex] = None
+        self.columns = finder.delta_columns(export_format)
+        self.watermark: Optional[str] = None
+        self.polls = 0
+        self.written = 0
+        self._stop = threading.Event()
+        self._exporter = None
+
+    def load_state(self) -> Optional[str]:
+        """Отметка last_edited_time прошлого запуска (None - первый запуск)"""
+        try:
+            with open(self.state_file, "rb") as f:
+                state = loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if state.get("database_id") != self.finder.database_id:
+            return None
+        return state.get("watermark")
+
+    def save_state(self):
+        """Атомарное сохранение отметки last_edited_time"""
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"database_id": self.finder.database_id, "watermark": self.watermark,
+                       "updated_at": datetime.now().isoformat(timespec="seconds")}, f)
+        os.replace(tmp_path, self.state_file)
+
+    def open(self):
+        """Получение схемы и открытие выходного файла (дописывание, если наблюдение продолжается)"""
+        self.finder.resolve_extractor()
+        # Индекс открывается в потоке наблюдения: соединение SQLite привязано к потоку
+        self.index = ExportIndex(self.index_path, self.finder.database_id, self.finder.filters)
+        self.watermark = self.load_state()
+        appending = self.watermark is not None and os.path.exists(self.output_file)
+        if not appending:
+            # Новый файл: все подходящие статьи выгружаются заново
+            self.watermark = None
+            self.index.clear()
+        exporter_class = CsvExporter if self.export_format == "csv" else JsonlExporter
+        self._exporter = exporter_class(self.output_file, self.columns, append=appending)
+        self._exporter.sync()
+
+    def poll(self) -> Dict[str, Any]:
+        """
+        Одна проверка: запрос страниц, измененных с последней отметки, и дописывание строк
+
+        Страницы на границе отметки приходят повторно (фильтр on_or_after),
+        но отбрасываются индексом как неизмененные.
+
+        Returns:
+            Счетчики: new, changed, duplicate и unchanged
+        """
+        query = self.finder.build_watch_filter(self.watermark, self.start_date, self.end_date)
+        records = []
+        watermark = self.watermark
+        for results, _ in self.finder.query_responses(query, use_cache=False):
+            for record in self.finder.iter_articles_info(results):
+                records.append(record)
+                if record.last_edited_time and (watermark is None or record.last_edited_time > watermark):
+                    watermark = record.last_edited_time
+
+        changes, counts = self.index.diff(records)
+        if changes:
+            for row in self.finder.delta_rows(changes, self.columns):
+                self._exporter.write(row)
+            self._exporter.sync()
+            self.index.update(record for record, _ in changes)
+            self.written += len(changes)
+
+        self.watermark = watermark
+        self.save_state()
+        return {"new": counts[CHANGE_NEW], "changed": counts[CHANGE_CHANGED],
+                "duplicate": counts[CHANGE_DUPLICATE], "unchanged": counts[None]}
+
+    def next_interval(self, changed: int) -> float:
+        """Адаптивный интервал: сброс при изменениях, увеличение при их отсутствии"""
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        return self.interval
+
+    def run(self, max_polls: Optional[int] = None):
+        """
+        Цикл наблюдения до Ctrl+C, SIGTERM или max_polls проверок
+
+        Args:
+            max_polls: Число проверок (None - без ограничения)
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+
+        self.open()
+        if self.watermark:
+            print(f"Продолжение наблюдения с отметки {self.watermark}, файл: {self.output_file}")
+        else:
+            print(f"Начальная выгрузка в {self.output_file}...")
+
+        try:
+            while not self._stop.is_set():
+                self.polls += 1
+                try:
+                    counts = self.poll()
+                    changed = counts["new"] + counts["changed"]
+                    if changed:
+                        print(f"[{datetime.now():%H:%M:%S}] Добавлено строк: {changed} "
+                              f"(новых {counts['new']}, измененных {counts['changed']}), "
+                              f"всего за сеанс: {self.written}")
+                except requests.exceptions.RequestException as e:
+                    print(f"[{datetime.now():%H:%M:%S}] Ошибка при запросе к Notion API: {e}")
+                    changed = 0
+
+                if max_polls is not None and self.polls >= max_polls:
+                    break
+                self._stop.wait(self.next_interval(changed))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+        print(f"Наблюдение остановлено. Проверок: {self.polls}, добавлено строк: {self.written}")
+
+    def stop(self):
+        """Остановка цикла наблюдения (из обработчика сигнала или другого потока)"""
+        self._stop.set()
+
+    def close(self):
+        """Закрытие выходного файла и индекса"""
+        if self._exporter is not None:
+            self._exporter.close()
+            self._exporter = None
+        if self.index is not None:
+            self.index.close()
+            self.index = None
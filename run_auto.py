@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 """
 Автоматическая версия скрипта, которая берет все настройки из config.py
+
+С --watch скрипт не задает вопросов, а работает постоянно: новые и
+измененные статьи дописываются в выходной файл по мере появления.
 """
 
+import argparse
 import os
 import sys
 from datetime import datetime, timedelta
 from notion_article_finder import NotionArticleFinder
+from notion_profile import MAPPING_FILE, load_property_mapping
+from notion_search import SEARCH_INDEX_PATH, open_search_index
 
 def load_config():
     """Загрузка конфигурации из файла config.py"""
@@ -17,16 +23,19 @@ def load_config():
             config.DATABASE_ID,
             config.DEFAULT_START_DATE,
             config.DEFAULT_END_DATE,
-            config.DEFAULT_OUTPUT_FILE
+            config.DEFAULT_OUTPUT_FILE,
+            getattr(config, "PROPERTY_MAPPING", None),
+            getattr(config, "QUERY_FILTERS", None),
+            getattr(config, "QUERY_SORTS", None)
         )
     except ImportError:
         print("Ошибка: Файл config.py не найден.")
         print("Создайте файл config.py на основе config_example.py")
-        return None, None, None, None, None
+        return None, None, None, None, None, None, None, None
     except AttributeError as e:
         print(f"Ошибка в config.py: {e}")
         print("Убедитесь, что все необходимые переменные определены в config.py")
-        return None, None, None, None, None
+        return None, None, None, None, None, None, None, None
 
 def get_date_range():
     """Получение диапазона дат от пользователя или использование значений по умолчанию"""
@@ -65,15 +74,98 @@ def get_date_range():
         print("Неверный выбор. Используем значения по умолчанию.")
         return None, None
 
+def make_rate_limiter(args, notion_token):
+    """Ограничитель частоты запросов по --rate/--shared-rate (None - без ограничения)"""
+    from notion_transport import make_rate_limiter as make
+    
+    return make(notion_token, args.rate, args.shared_rate, args.rate_state)
+
+def close_rate_limiter(rate_limiter):
+    """Сводка и закрытие общего ограничителя (файл состояния и блокировка)"""
+    from notion_transport import SharedRateLimiter
+    
+    if isinstance(rate_limiter, SharedRateLimiter):
+        print(rate_limiter.summary())
+        rate_limiter.close()
+
+def watch(args, notion_token, database_id, default_output, property_mapping, query_filters, query_sorts):
+    """Режим наблюдения: один процесс с общим пулом соединений, адаптивный интервал опроса"""
+    from notion_watch import ArticleWatcher
+    
+    output_file = args.output or default_output
+    print(f"Режим наблюдения: база {database_id}, интервал {args.min_interval:g}-{args.max_interval:g} с")
+    print("Для остановки нажмите Ctrl+C")
+    
+    try:
+        rate_limiter = make_rate_limiter(args, notion_token)
+    except (RuntimeError, OSError) as e:
+        print(f"Ошибка: {e}")
+        return
+    try:
+        finder = NotionArticleFinder(notion_token, database_id, property_mapping=property_mapping,
+                                     filters=query_filters, sorts=query_sorts, rate_limiter=rate_limiter)
+        try:
+            watcher = ArticleWatcher(finder, output_file, export_format=args.format,
+                                     start_date=args.start_date, end_date=args.end_date,
+                                     min_interval=args.min_interval, max_interval=args.max_interval)
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            return
+        watcher.run()
+    finally:
+        close_rate_limiter(rate_limiter)
+
 def main():
     """Главная функция"""
+    parser = argparse.ArgumentParser(description="Поиск статей в Notion с настройками из config.py")
+    parser.add_argument("--watch", action="store_true",
+                        help="Работать постоянно и дописывать новые и измененные статьи в выходной файл")
+    parser.add_argument("--min-interval", type=float, default=30,
+                        help="Минимальный интервал опроса в режиме --watch, секунд (по умолчанию: 30)")
+    parser.add_argument("--max-interval", type=float, default=600,
+                        help="Максимальный интервал опроса, когда изменений нет, секунд (по умолчанию: 600)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv",
+                        help="Формат выходного файла в режиме --watch (по умолчанию: csv)")
+    parser.add_argument("--output", help="Выходной файл в режиме --watch (по умолчанию: из config.py)")
+    parser.add_argument("--start-date", help="В режиме --watch: только статьи с датой не раньше (YYYY-MM-DD)")
+    parser.add_argument("--end-date", help="В режиме --watch: только статьи с датой не позже (YYYY-MM-DD)")
+    parser.add_argument("--rate", type=float,
+                        help="Ограничение запросов к API в секунду (по умолчанию без ограничения)")
+    parser.add_argument("--shared-rate", action="store_true",
+                        help="Общий лимит --rate (по умолчанию 3 запроса/с) для всех процессов с этим токеном "
+                             "на этом компьютере")
+    parser.add_argument("--rate-state", metavar="FILE",
+                        help="Файл состояния общего лимита (по умолчанию: свой для токена во временном каталоге)")
+    args = parser.parse_args()
+    
     print("=== Notion Article Finder (Автоматический режим) ===")
     
     # Загрузка конфигурации
-    notion_token, database_id, default_start, default_end, default_output = load_config()
+    (notion_token, database_id, default_start, default_end, default_output,
+     property_mapping, query_filters, query_sorts) = load_config()
     if not all([notion_token, database_id, default_start, default_end, default_output]):
         return
     
+    # Поля, не заданные в PROPERTY_MAPPING, берутся из профиля debug_notion.py
+    saved_mapping = load_property_mapping(MAPPING_FILE, database_id)
+    if saved_mapping:
+        property_mapping = {**saved_mapping, **{k: v for k, v in (property_mapping or {}).items() if v}}
+    
+    if args.watch:
+        # Проверка аргументов до импорта сетевых модулей
+        try:
+            for value in (args.start_date, args.end_date):
+                if value:
+                    datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            print("Ошибка: Неверный формат даты. Используйте YYYY-MM-DD")
+            return
+        if args.min_interval <= 0 or args.max_interval < args.min_interval:
+            print("Ошибка: интервал опроса должен быть положительным, --max-interval не меньше --min-interval")
+            return
+        watch(args, notion_token, database_id, default_output, property_mapping, query_filters, query_sorts)
+        return
+    
     print(f"Токен: {notion_token[:10]}...")
     print(f"База данных: {database_id}")
     print(f"Даты по умолчанию: {default_start} - {default_end}")
@@ -98,12 +190,23 @@ def main():
     print()
     
     # Создание и запуск поисковика
+    rate_limiter = None
     try:
-        finder = NotionArticleFinder(notion_token, database_id)
-        finder.run(start_date, end_date, output_file)
+        rate_limiter = make_rate_limiter(args, notion_token)
+        finder = NotionArticleFinder(notion_token, database_id, property_mapping=property_mapping,
+                                     filters=query_filters, sorts=query_sorts, rate_limiter=rate_limiter)
+        # Недоступный индекс не прерывает выгрузку (см. open_search_index)
+        search_index = open_search_index(SEARCH_INDEX_PATH, database_id)
+        try:
+            finder.run(start_date, end_date, output_file, search_index=search_index)
+        finally:
+            if search_index is not None:
+                search_index.close()
     except Exception as e:
         print(f"Ошибка при выполнении: {e}")
         print("Проверьте правильность токена и ID базы данных в config.py")
+    finally:
+        close_rate_limiter(rate_limiter)
 
 if __name__ == "__main__":
     main()
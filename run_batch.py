@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Пакетная выгрузка статей из нескольких баз данных Notion.
+Список баз берется из DATABASES в config.py, все выгрузки выполняются параллельно
+с общим лимитом одновременных запросов и общим ограничением частоты запросов.
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from notion_article_finder import NotionArticleFinder
+
+if TYPE_CHECKING:
+    from notion_transport import RateLimiter, SharedRateLimiter
+
+# Обязательные поля описания выгрузки в DATABASES
+JOB_KEYS = ("database_id", "start_date", "end_date", "output")
+
+
+def load_jobs():
+    """Загрузка токена и списка баз данных из config.py"""
+    try:
+        import config
+        defaults = {
+            "property_mapping": getattr(config, "PROPERTY_MAPPING", None),
+            "filters": getattr(config, "QUERY_FILTERS", None),
+            "sorts": getattr(config, "QUERY_SORTS", None),
+        }
+        return config.NOTION_TOKEN, list(config.DATABASES), defaults
+    except ImportError:
+        print("Ошибка: Файл config.py не найден.")
+        return None, [], {}
+    except AttributeError as e:
+        print(f"Ошибка в config.py: {e}")
+        print("Для пакетного режима определите в config.py список DATABASES")
+        return None, [], {}
+
+
+def validate_job(job: Any) -> Optional[str]:
+    """Проверка описания выгрузки (None - описание корректно, иначе текст ошибки)"""
+    if not isinstance(job, dict):
+        return f"описание выгрузки должно быть словарем, а не {type(job).__name__}"
+    missing = [key for key in JOB_KEYS if not job.get(key)]
+    if missing:
+        return f"в описании выгрузки нет полей: {', '.join(missing)}"
+    return None
+
+
+def run_job(job: Dict[str, Any], notion_token: str, rate_limiter: Union[RateLimiter, SharedRateLimiter],
+            in_flight: threading.Semaphore, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Выгрузка одной базы данных
+
+    Args:
+        job: Описание выгрузки: database_id, start_date, end_date, output, (необязательно) token и api_url
+        notion_token: Токен по умолчанию
+        rate_limiter: Общий ограничитель частоты запросов
+        in_flight: Общий семафор одновременных запросов
+        defaults: Настройки по умолчанию: property_mapping, filters, sorts
+
+    Returns:
+        Итог выгрузки: число статей, время и ошибка (если была)
+    """
+    from notion_transport import NOTION_API_URL, NotionTransport
+
+    started = time.monotonic()
+    known = job if isinstance(job, dict) else {}
+    summary = {"database_id": known.get("database_id", "?"), "output": known.get("output", "?"),
+               "count": 0, "error": validate_job(job)}
+    if summary["error"]:
+        # Ошибка в одном описании не прерывает остальные выгрузки
+        summary["seconds"] = time.monotonic() - started
+        return summary
+
+    transport = NotionTransport(job.get("token", notion_token), base_url=job.get("api_url", NOTION_API_URL),
+                                rate_limiter=rate_limiter, in_flight=in_flight)
+    try:
+        finder = NotionArticleFinder(job.get("token", notion_token), job["database_id"],
+                                     transport=transport,
+                                     property_mapping=job.get("property_mapping", defaults.get("property_mapping")),
+                                     filters=job.get("filters", defaults.get("filters")),
+                                     sorts=job.get("sorts", defaults.get("sorts")))
+        summary["count"] = finder.run(job["start_date"], job["end_date"], job["output"])
+        # run() сообщает об ошибках API и записи файла через finder.error, а не исключением
+        summary["error"] = finder.error
+    except Exception as e:
+        summary["error"] = str(e)
+    finally:
+        transport.close()
+
+    summary["seconds"] = time.monotonic() - started
+    return summary
+
+
+def print_summary(results: List[Dict[str, Any]], total_seconds: float):
+    """Сводный отчет по всем выгрузкам"""
+    print("\n" + "=" * 60)
+    print("ИТОГИ ПАКЕТНОЙ ВЫГРУЗКИ")
+    print("=" * 60)
+
+    for result in results:
+        status = f"ошибка: {result['error']}" if result["error"] else f"{result['count']} статей"
+        print(f"- {result['database_id']}: {status}, {result['seconds']:.1f} с -> {result['output']}")
+
+    total = sum(result["count"] for result in results)
+    failed = sum(1 for result in results if result["error"])
+    print(f"\nВсего статей: {total}, баз: {len(results)}, с ошибками: {failed}")
+    print(f"Общее время: {total_seconds:.1f} с")
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Пакетная выгрузка статей из нескольких баз Notion")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Число баз, выгружаемых одновременно (по умолчанию: 4)")
+    parser.add_argument("--max-in-flight", type=int, default=3,
+                        help="Общий лимит одновременных запросов к API (по умолчанию: 3)")
+    parser.add_argument("--rate", type=float, default=3.0,
+                        help="Общий лимит запросов в секунду (по умолчанию: 3)")
+    parser.add_argument("--shared-rate", action="store_true",
+                        help="Лимит --rate общий и с другими процессами с этим токеном на этом компьютере")
+    parser.add_argument("--rate-state", metavar="FILE",
+                        help="Файл состояния общего лимита (по умолчанию: свой для токена во временном каталоге)")
+    args = parser.parse_args()
+
+    notion_token, jobs, defaults = load_jobs()
+    if not jobs:
+        print("Список DATABASES в config.py пуст.")
+        return
+
+    print(f"=== Пакетная выгрузка: баз {len(jobs)}, потоков {args.workers} ===")
+    print(f"Лимиты: {args.max_in_flight} запросов одновременно, {args.rate} запросов/с")
+    print()
+
+    from notion_transport import SharedRateLimiter, make_rate_limiter
+
+    try:
+        rate_limiter = make_rate_limiter(notion_token, args.rate, args.shared_rate, args.rate_state)
+    except (RuntimeError, OSError) as e:
+        print(f"Ошибка: {e}")
+        return
+    in_flight = threading.BoundedSemaphore(args.max_in_flight)
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(
+            lambda job: run_job(job, notion_token, rate_limiter, in_flight, defaults), jobs
+        ))
+
+    print_summary(results, time.monotonic() - started)
+    if isinstance(rate_limiter, SharedRateLimiter):
+        print(rate_limiter.summary())
+        rate_limiter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,30 +2,74 @@
 """
 Единый тест и диагностика Notion Article Finder
 Объединяет диагностику структуры БД и полное тестирование функционала
+
+Под pytest запросы к API воспроизводятся из кассеты cassettes/unified.json
+(без сети и без config.py). Режим задается переменной NOTION_CASSETTE:
+    replay - воспроизведение (по умолчанию под pytest)
+    record - запросы к API с записью новой кассеты
+    live   - запросы к API без кассеты (по умолчанию при запуске скрипта)
+Для записи и live токен и база берутся из config.py или переменных
+NOTION_TOKEN и NOTION_DATABASE_ID, адрес API - из NOTION_API_URL.
 """
 
 from notion_article_finder import NotionArticleFinder
-from config import NOTION_TOKEN, DATABASE_ID
+from notion_cassette import Cassette
+from notion_transport import NOTION_API_URL, NotionTransport
+import atexit
+import time
 import requests
 import os
 
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+CASSETTE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cassettes", "unified.json")
+CASSETTE_MODE = os.environ.get("NOTION_CASSETTE") or ("live" if __name__ == "__main__" else "replay")
+
+# Бюджеты времени при воспроизведении из кассеты, секунды
+REPLAY_SEARCH_BUDGET = 1.0
+REPLAY_SESSION_BUDGET = 3.0
+
+
+def make_transport():
+    """Транспорт для тестов: с кассетой (replay/record) или напрямую к API (live)"""
+    if CASSETTE_MODE == "replay":
+        cassette = Cassette(CASSETTE_PATH)
+        # Ожидание по Retry-After из записанных ответов 429 не нужно
+        transport = NotionTransport("replay-token", backoff_base=0.001, backoff_max=0.001)
+        cassette.install(transport)
+        return transport, cassette, "replay-token", cassette.meta["database_id"]
+    
+    try:
+        from config import NOTION_TOKEN as token, DATABASE_ID as database_id
+    except ImportError:
+        token = database_id = None
+    token = os.environ.get("NOTION_TOKEN", token)
+    database_id = os.environ.get("NOTION_DATABASE_ID", database_id)
+    transport = NotionTransport(token, base_url=os.environ.get("NOTION_API_URL", NOTION_API_URL))
+    cassette = None
+    if CASSETTE_MODE == "record":
+        cassette = Cassette(CASSETTE_PATH, record=True, meta={"database_id": database_id})
+        cassette.install(transport)
+        atexit.register(cassette.save)
+    return transport, cassette, token, database_id
+
+
+# Общий транспорт: одна сессия с пулом соединений на все тесты
+transport, cassette, NOTION_TOKEN, DATABASE_ID = make_transport()
+
 def diagnose_database_structure():
     """Диагностика структуры базы данных"""
     
     print("🔍 ДИАГНОСТИКА СТРУКТУРЫ БАЗЫ ДАННЫХ")
     print("-" * 50)
     
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
     try:
         # Получаем информацию о базе данных
-        url = f"https://api.notion.com/v1/databases/{DATABASE_ID}"
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        url = f"databases/{DATABASE_ID}"
+        response = transport.get(url)
         
         data = response.json()
         db_title = data.get('title', [{}])[0].get('text', {}).get('content', 'Неизвестно')
@@ -73,24 +117,18 @@ def diagnose_database_structure():
             print(f"   Ответ: {e.response.text}")
         return False, {}
 
-def test_api_connection():
-    """Тестирование подключения к API"""
+def check_api_connection():
+    """Проверка подключения к API: (успех, первая запись или None)"""
     
     print("\n🔌 ТЕСТ ПОДКЛЮЧЕНИЯ К API")
     print("-" * 50)
     
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
     try:
         # Простой запрос
-        url = f"https://api.notion.com/v1/databases/{DATABASE_ID}/query"
+        url = f"databases/{DATABASE_ID}/query"
         query_data = {"page_size": 1}
         
-        response = requests.post(url, headers=headers, json=query_data)
+        response = transport.post(url, json=query_data, raise_for_status=False)
         
         if response.status_code == 200:
             data = response.json()
@@ -113,13 +151,13 @@ def test_api_connection():
         print(f"❌ Ошибка подключения: {e}")
         return False, None
 
-def test_article_search():
-    """Тестирование поиска статей"""
+def search_test_ranges():
+    """Поиск статей в тестовых диапазонах дат: диапазоны, в которых нашлись статьи"""
     
     print("\n📊 ТЕСТ ПОИСКА СТАТЕЙ")
     print("-" * 50)
     
-    finder = NotionArticleFinder(NOTION_TOKEN, DATABASE_ID)
+    finder = NotionArticleFinder(NOTION_TOKEN, DATABASE_ID, transport=transport)
     
     # Тестовые диапазоны дат
     test_ranges = [
@@ -181,16 +219,17 @@ def test_article_search():
     
     return successful_tests
 
-def test_data_extraction(articles):
-    """Тестирование извлечения данных"""
+def extract_test_data(articles):
+    """Извлечение данных статей: (записи, число названий, число ссылок)"""
     
     print("\n📝 ТЕСТ ИЗВЛЕЧЕНИЯ ДАННЫХ")
     print("-" * 50)
     
-    finder = NotionArticleFinder(NOTION_TOKEN, DATABASE_ID)
+    finder = NotionArticleFinder(NOTION_TOKEN, DATABASE_ID, transport=transport)
     
     try:
-        # Извлекаем информацию о статьях
+        # Собираем экстрактор по схеме базы данных и извлекаем информацию о статьях
+        finder.resolve_extractor()
         articles_info = finder.extract_articles_info(articles)
         
         print(f"✅ Извлечение данных успешно!")
@@ -222,8 +261,8 @@ def test_data_extraction(articles):
         traceback.print_exc()
         return [], 0, 0
 
-def test_csv_export(articles_info):
-    """Тестирование экспорта в CSV"""
+def export_test_csv(articles_info, csv_file="unified_test_results.csv"):
+    """Экспорт в CSV: успешно ли создан файл"""
     
     print("\n💾 ТЕСТ ЭКСПОРТА В CSV")
     print("-" * 50)
@@ -233,10 +272,9 @@ def test_csv_export(articles_info):
         return False
     
     try:
-        finder = NotionArticleFinder(NOTION_TOKEN, DATABASE_ID)
+        finder = NotionArticleFinder(NOTION_TOKEN, DATABASE_ID, transport=transport)
         
         # Сохраняем в CSV
-        csv_file = "unified_test_results.csv"
         finder.save_articles_to_file(articles_info, csv_file)
         
         print(f"✅ CSV файл создан: {csv_file}")
@@ -292,6 +330,626 @@ def check_data_quality(articles_info):
     else:
         print("✅ Качество данных отличное!")
 
+def test_import_time():
+    """Проверка бюджета времени импорта модулей командной строки (без обращения к API)"""
+    from benchmarks.bench_import import check_budgets
+    
+    print("\n⏱️  ТЕСТ ВРЕМЕНИ ИМПОРТА")
+    print("-" * 50)
+    
+    problems = check_budgets(runs=3)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Импорт укладывается в бюджет, requests загружается только перед запросами")
+    assert not problems, "; ".join(problems)
+
+if pytest is not None:
+    @pytest.fixture(scope="module")
+    def articles():
+        """Страницы первого диапазона, в котором нашлись статьи"""
+        successful_tests = search_test_ranges()
+        if not successful_tests:
+            pytest.skip("Статьи не найдены ни в одном диапазоне")
+        return successful_tests[0]['articles']
+
+    @pytest.fixture(scope="module")
+    def articles_info(articles):
+        """Извлеченные данные статей"""
+        return extract_test_data(articles)[0]
+
+def test_api_connection():
+    """Тестирование подключения к API"""
+    api_ok, sample_record = check_api_connection()
+    assert api_ok
+    assert sample_record is not None, "база данных пуста"
+
+def test_article_search():
+    """Тестирование поиска статей: статьи находятся хотя бы в одном диапазоне"""
+    successful_tests = search_test_ranges()
+    assert successful_tests
+    assert all(test_range['articles'] for test_range in successful_tests)
+
+def test_data_extraction(articles):
+    """Тестирование извлечения данных"""
+    articles_info, titles_found, urls_found = extract_test_data(articles)
+    assert len(articles_info) == len(articles)
+    assert titles_found == len(articles_info)
+    assert urls_found == len(articles_info)
+
+def test_csv_export(articles_info, tmp_path):
+    """Тестирование экспорта в CSV (файл - во временном каталоге)"""
+    csv_file = str(tmp_path / "unified_test_results.csv")
+    assert export_test_csv(articles_info, csv_file)
+    with open(csv_file, encoding='utf-8') as f:
+        lines = f.readlines()
+    assert len(lines) == len(articles_info) + 1
+
+def test_search_results_consistent():
+    """Поиск по вложенным диапазонам дат: без дублей, узкий диапазон - подмножество широкого"""
+    
+    print("\n🧮 ТЕСТ СОГЛАСОВАННОСТИ ПОИСКА")
+    print("-" * 50)
+    
+    # Отдельная кассета: ответы (включая 429 и повторы) воспроизводятся с начала
+    search_transport, search_cassette = transport, cassette
+    if CASSETTE_MODE == "replay":
+        search_cassette = Cassette(CASSETTE_PATH)
+        search_transport = NotionTransport("replay-token", backoff_base=0.001, backoff_max=0.001)
+        search_cassette.install(search_transport)
+    finder = NotionArticleFinder(NOTION_TOKEN, DATABASE_ID, transport=search_transport)
+    
+    started = time.perf_counter()
+    wide = finder.search_articles_by_date("2024-01-01", "2025-12-31")
+    narrow = finder.search_articles_by_date("2025-10-01", "2025-10-31")
+    finder.resolve_extractor()
+    articles_info = finder.extract_articles_info(wide)
+    elapsed = time.perf_counter() - started
+    
+    wide_ids = [page["id"] for page in wide]
+    narrow_ids = [page["id"] for page in narrow]
+    print(f"✅ Найдено статей: {len(wide_ids)} за 2024-2025, {len(narrow_ids)} за октябрь 2025")
+    print(f"✅ Время: {elapsed:.3f} с, запросов: {search_transport.metrics.requests}, "
+          f"повторов: {search_transport.metrics.retries}")
+    
+    assert len(wide_ids) == len(set(wide_ids)), "дубли страниц в результатах (ошибка пагинации)"
+    assert len(narrow_ids) == len(set(narrow_ids)), "дубли страниц в результатах (ошибка пагинации)"
+    assert set(narrow_ids) <= set(wide_ids)
+    for page in narrow:
+        assert "2025-10-01" <= finder.page_date(page)[:10] <= "2025-10-31"
+    assert len(articles_info) == len(wide)
+    assert all(info['notion_url'].startswith("https://notion.so/") for info in articles_info)
+    
+    if CASSETTE_MODE == "replay":
+        # Каждый записанный ответ 429/5xx должен привести ровно к одному повтору
+        assert search_transport.metrics.retries == search_cassette.played_retryable
+        assert elapsed < REPLAY_SEARCH_BUDGET, f"поиск из кассеты занял {elapsed:.2f} с"
+
+def test_error_responses():
+    """Ответ API на несуществующую базу данных: ошибка без повторов"""
+    
+    print("\n🚫 ТЕСТ ОТВЕТОВ С ОШИБКОЙ")
+    print("-" * 50)
+    
+    retries = transport.metrics.retries
+    response = transport.get("databases/00000000000000000000000000000000", raise_for_status=False)
+    print(f"✅ Статус ответа: {response.status_code}")
+    
+    assert response.status_code in (400, 404)
+    assert response.json().get("object") == "error"
+    if CASSETTE_MODE == "replay":
+        assert transport.metrics.retries == retries
+
+def test_replay_session_budget():
+    """Вся сессия из кассеты (все записанные запросы) укладывается в бюджет времени"""
+    if CASSETTE_MODE != "replay":
+        if pytest is not None:
+            pytest.skip("Бюджет проверяется только при воспроизведении из кассеты")
+        return
+    
+    print("\n⏱️  ТЕСТ ВРЕМЕНИ СЕССИИ ИЗ КАССЕТЫ")
+    print("-" * 50)
+    
+    session_cassette = Cassette(CASSETTE_PATH)
+    session_transport = NotionTransport("replay-token", backoff_base=0.001, backoff_max=0.001)
+    session_cassette.install(session_transport)
+    
+    started = time.perf_counter()
+    for interaction in session_cassette.interactions:
+        request = interaction["request"]
+        session_transport.session.request(request["method"], f"{session_transport.base_url}/{request['path']}",
+                                          params=request["query"], json=request["body"])
+    elapsed = time.perf_counter() - started
+    print(f"✅ Воспроизведено ответов: {session_cassette.played} за {elapsed:.3f} с")
+    
+    assert session_cassette.played == len(session_cassette.interactions)
+    assert elapsed < REPLAY_SESSION_BUDGET, f"сессия из кассеты заняла {elapsed:.2f} с"
+
+def test_shared_rate_limiter():
+    """Общий ограничитель частоты: два экземпляра (как два процесса) делят одну корзину"""
+    import tempfile
+    from notion_transport import SharedRateLimiter
+    
+    print("\n🚦 ТЕСТ ОБЩЕГО ОГРАНИЧИТЕЛЯ ЧАСТОТЫ")
+    print("-" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_path = os.path.join(tmp_dir, "rate.json")
+        first = SharedRateLimiter(state_path, rate=50, burst=1, log=None)
+        second = SharedRateLimiter(state_path, rate=50, burst=1, log=None)
+        
+        started = time.perf_counter()
+        for _ in range(5):
+            first.acquire()
+            second.acquire()
+        elapsed = time.perf_counter() - started
+        print(f"✅ 10 запросов с лимитом 50 запр/с на двоих: {elapsed:.3f} с")
+        # Первый запрос без ожидания, остальные 9 - не чаще одного в 20 мс
+        assert elapsed >= 9 / 50 * 0.9
+        
+        # Пауза после 429 в одном экземпляре задерживает и другой
+        first.pause(0.2)
+        wait = second.acquire()
+        print(f"✅ Ожидание после паузы в другом экземпляре: {wait:.3f} с")
+        assert wait >= 0.2
+        first.close()
+        second.close()
+
+def test_query_service_coalescing():
+    """Сервис запросов: одинаковые одновременные запросы - одна выгрузка из API"""
+    import threading
+    from notion_service import QueryServer, QueryService
+    
+    print("\n🔁 ТЕСТ СЕРВИСА ЗАПРОСОВ")
+    print("-" * 50)
+    
+    finder = NotionArticleFinder(NOTION_TOKEN, DATABASE_ID, transport=transport)
+    requests_before = transport.metrics.requests
+    responses = []
+    
+    with QueryServer(QueryService(finder), port=0) as server:
+        url = f"{server.base_url}/articles"
+        params = {"start_date": "2024-01-01", "end_date": "2025-12-31"}
+        
+        def client():
+            response = requests.get(url, params=params)
+            responses.append((response.status_code, response.headers.get("X-Cache"), response.json()["count"]))
+        
+        clients = [threading.Thread(target=client) for _ in range(8)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        stats = server.service.snapshot()
+        bad_request = requests.get(url, params={"start_date": "2025-12-31", "end_date": "2024-01-01"})
+    
+    api_requests = transport.metrics.requests - requests_before
+    print(f"✅ Ответов: {len(responses)}, выгрузок: {stats['fetches']}, из кэша: {stats['cache_hits']}, "
+          f"объединено: {stats['coalesced']}, запросов к API: {api_requests}")
+    
+    assert all(status == 200 for status, _, _ in responses)
+    assert len({count for _, _, count in responses}) == 1
+    assert stats["fetches"] == 1
+    assert stats["cache_hits"] + stats["coalesced"] == 7
+    assert sorted(source for _, source, _ in responses).count("fetch") == 1
+    assert bad_request.status_code == 400
+
+def test_mirror_sync_sees_edits():
+    """Зеркало: правка между синхронизациями видна и с кэшем ответов, архивированные страницы удаляет сверка"""
+    import tempfile
+    from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+    from notion_cache import ResponseCache
+    from notion_mirror import NotionMirror
+    
+    print("\n🪞 ТЕСТ СИНХРОНИЗАЦИИ ЗЕРКАЛА")
+    print("-" * 50)
+    
+    database = SyntheticDatabase(30, start_date="2025-10-01", days=30)
+    with StubNotionServer(database) as server, tempfile.TemporaryDirectory() as tmp_dir:
+        stub_transport = NotionTransport("stub-token", base_url=server.base_url, backoff_base=0.01)
+        finder = NotionArticleFinder("stub-token", "stub-db", transport=stub_transport,
+                                     cache=ResponseCache(os.path.join(tmp_dir, "cache")))
+        finder.resolve_extractor()
+        with NotionMirror(os.path.join(tmp_dir, "mirror.sqlite3")) as mirror:
+            first = mirror.sync(finder)
+            # Повтор с той же отметкой: раньше этот ответ попадал в кэш
+            mirror.sync(finder)
+            database.edit(5, "2024-07-01T00:00:00.000Z", title="Edited article")
+            synced = mirror.sync(finder)
+            titles = {record.page_id: record.title
+                      for record in mirror.query_by_date("stub-db", "2025-10-01", "2025-10-31")}
+            
+            # Архивированную страницу инкрементальный запрос не видит, ее удаляет полная сверка
+            database.archive(7)
+            mirror.sync(finder)
+            kept = len(mirror.query_by_date("stub-db", "2025-10-01", "2025-10-31"))
+            mirror.sync(finder, reconcile=True)
+            removed = mirror.removed
+            remaining = {record.page_id for record in mirror.query_by_date("stub-db", "2025-10-01", "2025-10-31")}
+        stub_transport.close()
+    
+    edited_id = database.page(5)["id"]
+    print(f"✅ Первая синхронизация: {first}, после правки: {synced}, название: {titles[edited_id]}, "
+          f"удалено сверкой: {removed}")
+    assert first == 30
+    assert titles[edited_id] == "Edited article"
+    assert len(titles) == 30
+    assert kept == 30
+    assert removed == 1
+    assert database.page(7)["id"] not in remaining and len(remaining) == 29
+
+def test_truncated_stream():
+    """Инкрементальный разбор: оборванный ответ повторяется, обрыв после выдачи страниц - RequestException"""
+    from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+    from notion_json import require_incremental
+    
+    try:
+        require_incremental()
+    except ImportError as e:
+        if pytest is not None:
+            pytest.skip(str(e))
+        return
+    
+    print("\n✂️  ТЕСТ ОБОРВАННОГО ОТВЕТА")
+    print("-" * 50)
+    
+    # Маленький ответ обрывается до первой страницы: повтор дает все страницы
+    database = SyntheticDatabase(30, start_date="2025-10-01", days=30)
+    with StubNotionServer(database, truncate_responses=1) as server:
+        stub_transport = NotionTransport("stub-token", base_url=server.base_url, backoff_base=0.01)
+        finder = NotionArticleFinder("stub-token", "stub-db", transport=stub_transport, incremental_json=True)
+        pages = list(finder.iter_articles_by_date("2025-10-01", "2025-10-31"))
+        retries = stub_transport.metrics.retries
+        stub_transport.close()
+    print(f"✅ После обрыва и повтора: {len(pages)} страниц, повторов: {retries}")
+    assert len(pages) == 30
+    assert retries == 1
+    
+    # Большой ответ обрывается после выданных страниц: повторять нельзя
+    database = SyntheticDatabase(100, start_date="2025-10-01", days=30, extra_properties=4, extra_text_size=2000)
+    with StubNotionServer(database, truncate_responses=1) as server:
+        stub_transport = NotionTransport("stub-token", base_url=server.base_url, backoff_base=0.01)
+        finder = NotionArticleFinder("stub-token", "stub-db", transport=stub_transport, incremental_json=True)
+        pages = []
+        error = None
+        try:
+            for page in finder.iter_articles_by_date("2025-10-01", "2025-10-31"):
+                pages.append(page)
+        except requests.exceptions.RequestException as e:
+            error = e
+        stub_transport.close()
+    print(f"✅ Обрыв после {len(pages)} страниц: {type(error).__name__}")
+    assert isinstance(error, requests.exceptions.ChunkedEncodingError)
+    assert 0 < len(pages) < 100
+
+def test_checkpoint_resume_after_last_page():
+    """Контрольная точка: --resume после записи последнего ответа не дописывает строки повторно"""
+    import tempfile
+    from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+    from notion_checkpoint import ExportCheckpoint
+    
+    print("\n📍 ТЕСТ ПРОДОЛЖЕНИЯ ЗАВЕРШЕННОЙ ВЫГРУЗКИ")
+    print("-" * 50)
+    
+    class InterruptedCheckpoint(ExportCheckpoint):
+        # Сбой между записью последнего ответа и удалением контрольной точки
+        def clear(self):
+            pass
+    
+    database = SyntheticDatabase(150, start_date="2025-10-01", days=30)
+    with StubNotionServer(database) as server, tempfile.TemporaryDirectory() as tmp_dir:
+        stub_transport = NotionTransport("stub-token", base_url=server.base_url, backoff_base=0.01)
+        finder = NotionArticleFinder("stub-token", "stub-db", transport=stub_transport)
+        output_file = os.path.join(tmp_dir, "articles.jsonl")
+        checkpoint_path = ExportCheckpoint.default_path(output_file)
+        
+        first = finder.run_checkpointed("2025-10-01", "2025-10-31", output_file,
+                                        InterruptedCheckpoint(checkpoint_path), export_format="jsonl")
+        requests_before = stub_transport.metrics.requests
+        resumed = finder.run_checkpointed("2025-10-01", "2025-10-31", output_file,
+                                          ExportCheckpoint(checkpoint_path), resume=True, export_format="jsonl")
+        resume_requests = stub_transport.metrics.requests - requests_before
+        with open(output_file, encoding="utf-8") as f:
+            lines = sum(1 for _ in f)
+        
+        # Другие колонки (с проверкой ссылок) - другая выгрузка, контрольная точка не подходит
+        checkpoint = ExportCheckpoint(checkpoint_path)
+        checkpoint.start("stub-db", {}, None, output_file, "jsonl", ["title", "url"])
+        other_columns = checkpoint.matches("stub-db", {}, None, output_file, "jsonl", ["title", "url", "status"])
+        stub_transport.close()
+    
+    print(f"✅ Записано: {first}, после --resume: {resumed}, строк в файле: {lines}, "
+          f"запросов при продолжении: {resume_requests}")
+    assert first == resumed == lines == 150
+    assert resume_requests == 0
+    assert not other_columns
+
+def test_export_index_filters():
+    """Индекс дельта-выгрузки: смена фильтров и смена ссылки статьи"""
+    import tempfile
+    from notion_index import ExportIndex, normalize_url
+    from notion_records import ArticleRecord
+    
+    print("\n🗂️  ТЕСТ ИНДЕКСА ДЕЛЬТА-ВЫГРУЗКИ")
+    print("-" * 50)
+    
+    records = [ArticleRecord(f"Article {n}", f"https://example.com/{n}", f"page-{n}", "2025-10-0{n}")
+               for n in range(1, 4)]
+    tag_filter = [{"property": "Tags", "multi_select": {"contains": "AI"}}]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_path = os.path.join(tmp_dir, "index.sqlite3")
+        with ExportIndex(index_path, "db") as index:
+            index.update(records)
+        # С фильтром видна только одна статья: остальные отброшены фильтром, а не удалены
+        with ExportIndex(index_path, "db", tag_filter) as index:
+            filtered_removed = index.removed("2025-10-01", "2025-10-31", {"page-1"})
+        with ExportIndex(index_path, "db") as index:
+            unfiltered_removed = index.removed("2025-10-01", "2025-10-31", {"page-1"})
+    
+            # Ссылка статьи изменилась: прежнюю может занять другая страница
+            moved = ArticleRecord("Article 1", "https://example.com/moved", "page-1", "2025-10-01")
+            index.update([moved])
+            reused = index.classify(ArticleRecord("Other", "https://example.com/1", "page-9", "2025-10-05"))
+        with ExportIndex(index_path, "db") as index:
+            reused_after_reopen = index.classify(
+                ArticleRecord("Other", "https://example.com/1", "page-9", "2025-10-05"))
+    
+    print(f"✅ Удалено с новым фильтром: {len(filtered_removed)}, без фильтра: {len(unfiltered_removed)}, "
+          f"прежняя ссылка у другой страницы: {reused}")
+    assert filtered_removed == []
+    assert sorted(record.page_id for record in unfiltered_removed) == ["page-2", "page-3"]
+    assert reused == reused_after_reopen == "new"
+    
+    # Параметры отслеживания убираются, похожие по имени параметры - нет
+    assert normalize_url("http://www.example.com/a/?utm_source=x&ref=feed&id=1") == "https://example.com/a?id=1"
+    assert normalize_url("https://example.com/a?referrer=x&refresh=1&ref=y") == "https://example.com/a?referrer=x&refresh=1"
+
+def test_batch_invalid_job():
+    """Пакетная выгрузка: неполное описание, ошибка API и ошибка записи - ошибки в итогах, а не исключение"""
+    from run_batch import run_job
+    
+    print("\n📦 ТЕСТ ОПИСАНИЙ ПАКЕТНОЙ ВЫГРУЗКИ")
+    print("-" * 50)
+    
+    missing = run_job({"database_id": "db", "start_date": "2025-10-01"}, "token", None, None, {})
+    malformed = run_job("db", "token", None, None, {})
+    print(f"✅ {missing['database_id']}: {missing['error']}; {malformed['error']}")
+    
+    assert missing["count"] == 0 and "end_date" in missing["error"] and "output" in missing["error"]
+    assert malformed["error"]
+    
+    # Ошибка API (неизвестная база) и ошибка записи файла тоже попадают в итоги
+    import tempfile
+    from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+    
+    with StubNotionServer(SyntheticDatabase(20, start_date="2025-10-01", days=30),
+                          database_id="stub-db") as server, tempfile.TemporaryDirectory() as tmp_dir:
+        job = {"database_id": "stub-db", "start_date": "2025-10-01", "end_date": "2025-10-31",
+               "output": os.path.join(tmp_dir, "articles.csv"), "api_url": server.base_url}
+        succeeded = run_job(job, "token", None, None, {})
+        unknown = run_job(dict(job, database_id="other-db"), "token", None, None, {})
+        unwritable = run_job(dict(job, output=os.path.join(tmp_dir, "missing", "articles.csv")),
+                             "token", None, None, {})
+    print(f"✅ Успешно: {succeeded['count']}; неизвестная база: {unknown['error']}; запись: {unwritable['error']}")
+    
+    assert succeeded["error"] is None and succeeded["count"] == 20
+    assert unknown["error"] and "404" in unknown["error"]
+    assert unwritable["error"] and unwritable["count"] == 0
+
+def test_search_index_failures():
+    """Поисковый индекс: недоступный файл или ошибка записи не прерывают выгрузку"""
+    import tempfile
+    from notion_records import ArticleRecord
+    from notion_search import open_search_index
+    
+    print("\n🔎 ТЕСТ ОШИБОК ПОИСКОВОГО ИНДЕКСА")
+    print("-" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        unavailable = open_search_index(os.path.join(tmp_dir, "missing", "search.sqlite3"), "db")
+        search_index = open_search_index(os.path.join(tmp_dir, "search.sqlite3"), "db")
+        search_index.conn.execute("DROP TABLE articles")
+        search_index.add(ArticleRecord("Article", "https://example.com/1", "page-1", "2025-10-01"))
+        search_index.flush()
+        search_index.add(ArticleRecord("Article", "https://example.com/2", "page-2", "2025-10-02"))
+        disabled = search_index.disabled
+        search_index.close()
+    
+    print(f"✅ Недоступный индекс: {unavailable}, отключен после ошибки записи: {disabled}")
+    assert unavailable is None
+    assert disabled and search_index.stats["indexed"] == 0
+
+def test_stream_bodies_indexing():
+    """Потоковая выгрузка с --bodies: статьи индексируются по мере выгрузки текста, очередь ограничена"""
+    import tempfile
+    from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+    from notion_blocks import ArticleBodyExporter
+    from notion_search import BodyIndexer, SearchIndex
+    
+    print("\n📚 ТЕСТ ИНДЕКСАЦИИ ТЕКСТА СТАТЕЙ")
+    print("-" * 50)
+    
+    class TrackedIndexer(BodyIndexer):
+        max_seen = 0
+        
+        def submit(self, record):
+            super().submit(record)
+            TrackedIndexer.max_seen = max(TrackedIndexer.max_seen, len(self.pending))
+    
+    database = SyntheticDatabase(250, start_date="2025-10-01", days=30, blocks_per_page=2)
+    with StubNotionServer(database) as server, tempfile.TemporaryDirectory() as tmp_dir:
+        stub_transport = NotionTransport("stub-token", base_url=server.base_url, backoff_base=0.01)
+        finder = NotionArticleFinder("stub-token", "stub-db", transport=stub_transport)
+        with ArticleBodyExporter(stub_transport, os.path.join(tmp_dir, "bodies"), cache_dir=None) as bodies, \
+                SearchIndex(os.path.join(tmp_dir, "search.sqlite3"), "stub-db") as search_index:
+            written = finder.run("2025-10-01", "2025-10-31", os.path.join(tmp_dir, "articles.csv"),
+                                 stream=True, bodies=bodies, search_index=search_index)
+            indexed = len(search_index)
+            found = search_index.search("Paragraph", limit=500)
+            
+            indexer = TrackedIndexer(search_index, bodies, max_pending=20)
+            for record in finder.search_article_records("2025-10-01", "2025-10-31"):
+                indexer.submit(record)
+            indexer.finish()
+        stub_transport.close()
+    
+    print(f"✅ Записано: {written}, в индексе: {indexed}, с текстом: {len(found)}, "
+          f"максимум в очереди: {TrackedIndexer.max_seen}")
+    assert written == indexed == len(found) == 250
+    assert TrackedIndexer.max_seen <= 20
+
+def test_body_export_failures():
+    """Текст статей: нет строки источника без URL, ошибка записи считается, а не прерывает выгрузку"""
+    import tempfile
+    from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+    from notion_blocks import ArticleBodyExporter
+    from notion_records import NO_URL, ArticleRecord
+    
+    print("\n📝 ТЕСТ ОШИБОК ВЫГРУЗКИ ТЕКСТА")
+    print("-" * 50)
+    
+    database = SyntheticDatabase(2, start_date="2025-10-01", days=1, blocks_per_page=2)
+    records = [ArticleRecord(f"Статья {i}", NO_URL, database.page(i)["id"], "2025-10-01") for i in range(2)]
+    with StubNotionServer(database) as server, tempfile.TemporaryDirectory() as tmp_dir:
+        stub_transport = NotionTransport("stub-token", base_url=server.base_url, backoff_base=0.01)
+        with ArticleBodyExporter(stub_transport, os.path.join(tmp_dir, "bodies"), cache_dir=None) as bodies:
+            assert bodies.export(records[0])[0] == "fetched"
+            with open(bodies.article_path(records[0], "md"), encoding="utf-8") as f:
+                header = f.read().split("\n\n", 2)[1]
+            
+            bodies.output_dir = os.path.join(tmp_dir, "missing")
+            bodies.submit(records[1])
+            stats = bodies.wait()
+        stub_transport.close()
+    
+    print(f"✅ Заголовок: {header!r}, статистика: {stats}")
+    assert "Источник" not in header
+    assert stats["fetched"] == 1 and stats["errors"] == 1
+    
+def test_source_fetch_conditional():
+    """Загрузка исходных статей: первый запуск - 200, повторный - 304 по ETag; колонки source_* в CSV"""
+    import csv
+    import tempfile
+    from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+    from benchmarks.stub_source_server import StubSourceServer
+    from notion_sources import SourceFetcher
+    
+    print("\n🌐 ТЕСТ ЗАГРУЗКИ ИСХОДНЫХ СТАТЕЙ")
+    print("-" * 50)
+    
+    with StubSourceServer(body_size=2000) as source_server, tempfile.TemporaryDirectory() as tmp_dir:
+        database = SyntheticDatabase(20, start_date="2025-10-01", days=10,
+                                     url_base=f"{source_server.base_url}/articles")
+        with StubNotionServer(database) as server:
+            stub_transport = NotionTransport("stub-token", base_url=server.base_url, backoff_base=0.01)
+            finder = NotionArticleFinder("stub-token", "stub-db", transport=stub_transport)
+            runs = []
+            for run_index in range(2):
+                output_file = os.path.join(tmp_dir, f"articles_{run_index}.csv")
+                with SourceFetcher(os.path.join(tmp_dir, "sources"), max_workers=4) as sources:
+                    written = finder.run("2025-10-01", "2025-10-10", output_file, sources=sources)
+                    stats = dict(sources.stats)
+                with open(output_file, encoding="utf-8", newline="") as f:
+                    rows = {row["URL статьи"]: row for row in csv.DictReader(f)}
+                runs.append((written, stats, rows))
+            stub_transport.close()
+        server_not_modified = source_server.stats["not_modified"]
+    
+    (first_written, first_stats, first_rows), (second_written, second_stats, second_rows) = runs
+    print(f"✅ Первый запуск: {first_stats}, повторный: {second_stats}")
+    assert first_written == second_written == 20
+    # 19 статей отвечают 200 (статья 7 - через редирект), статья 13 - 404 и запрашивается заново
+    assert first_stats["fetched"] == 20 and first_stats["not_modified"] == 0
+    assert second_stats["not_modified"] == server_not_modified == 19
+    assert second_stats["fetched"] == 1 and second_stats["errors"] == 0
+    
+    base = f"{source_server.base_url}/articles"
+    for rows in (first_rows, second_rows):
+        assert len(rows) == 20
+        assert rows[f"{base}/0"]["Статус"] == "200"
+        assert rows[f"{base}/0"]["Итоговый URL"] == f"{base}/0"
+        assert int(rows[f"{base}/0"]["Размер"]) > 0
+        assert rows[f"{base}/7"]["Статус"] == "200"
+        assert rows[f"{base}/7"]["Итоговый URL"] == f"{source_server.base_url}/moved/7"
+        assert rows[f"{base}/13"]["Статус"] == "404"
+    assert second_rows == first_rows
+    
+def test_async_run():
+    """Асинхронный клиент: run возвращает число статей, как синхронный; ошибка API - 0 и self.error"""
+    import asyncio
+    import tempfile
+    from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+    
+    if pytest is not None:
+        pytest.importorskip("httpx")
+    from notion_async import AsyncNotionArticleFinder, AsyncNotionTransport
+    
+    print("\n⚡ ТЕСТ АСИНХРОННОГО КЛИЕНТА")
+    print("-" * 50)
+    
+    async def run_all(base_url, tmp_dir):
+        results = {}
+        for name, database_id, shard, keep_raw in (("plain", "stub-db", None, False),
+                                                   ("sharded", "stub-db", "day", False),
+                                                   ("raw", "stub-db", "week", True),
+                                                   ("unknown", "missing-db", None, False)):
+            transport = AsyncNotionTransport("stub-token", base_url=base_url, backoff_base=0.01, max_retries=1)
+            async with AsyncNotionArticleFinder("stub-token", database_id, transport=transport,
+                                                keep_raw=keep_raw) as finder:
+                output_file = os.path.join(tmp_dir, f"{name}.csv")
+                count = await finder.run("2025-10-01", "2025-10-10", output_file, shard=shard)
+                results[name] = (count, finder.error, os.path.exists(output_file))
+        return results
+    
+    database = SyntheticDatabase(150, start_date="2025-10-01", days=10)
+    with StubNotionServer(database, database_id="stub-db") as server, tempfile.TemporaryDirectory() as tmp_dir:
+        results = asyncio.run(run_all(server.base_url, tmp_dir))
+        stub_transport = NotionTransport("stub-token", base_url=server.base_url, backoff_base=0.01)
+        sync_count = NotionArticleFinder("stub-token", "stub-db", transport=stub_transport).run(
+            "2025-10-01", "2025-10-10", os.path.join(tmp_dir, "sync.csv"))
+        stub_transport.close()
+    
+    print(f"✅ Синхронно: {sync_count}, асинхронно: {results}")
+    assert sync_count == 150
+    for name in ("plain", "sharded", "raw"):
+        assert results[name] == (sync_count, None, True)
+    count, error, written = results["unknown"]
+    assert count == 0 and "404" in error and not written
+    
+def test_sharded_search_bounded():
+    """Шардированный поиск: шардов больше, чем потоков, и больше страницы API в шарде"""
+    import threading
+    from benchmarks.stub_notion_server import StubNotionServer, SyntheticDatabase
+    
+    print("\n🧩 ТЕСТ ШАРДИРОВАННОГО ПОИСКА")
+    print("-" * 50)
+    
+    database = SyntheticDatabase(1500, start_date="2025-10-01", days=10)
+    results = {}
+    
+    def search():
+        results["all"] = list(finder.search_articles_sharded("2025-10-01", "2025-10-10",
+                                                             granularity="day", max_workers=2))
+        partial = finder.search_articles_sharded("2025-10-01", "2025-10-10", granularity="day", max_workers=2)
+        results["first"] = [next(partial) for _ in range(10)]
+        partial.close()
+    
+    with StubNotionServer(database) as server:
+        stub_transport = NotionTransport("stub-token", base_url=server.base_url, backoff_base=0.01)
+        finder = NotionArticleFinder("stub-token", "stub-db", transport=stub_transport)
+        thread = threading.Thread(target=search, daemon=True)
+        thread.start()
+        thread.join(timeout=60)
+        stub_transport.close()
+    
+    assert not thread.is_alive(), "шардированный поиск завис"
+    pages = results["all"]
+    dates = [finder.page_date(page) for page in pages]
+    print(f"✅ Найдено: {len(pages)}, уникальных: {len({page['id'] for page in pages})}")
+    assert len(pages) == len({page["id"] for page in pages}) == 1500
+    assert dates == sorted(dates)
+    assert results["first"] == pages[:10]
+    
 def main():
     """Главная функция единого теста"""
     
@@ -309,13 +967,13 @@ def main():
         return
     
     # Шаг 2: Тест подключения к API
-    api_ok, sample_record = test_api_connection()
+    api_ok, sample_record = check_api_connection()
     if not api_ok:
         print("❌ Не удалось подключиться к API. Проверьте токен.")
         return
     
     # Шаг 3: Тест поиска статей
-    successful_tests = test_article_search()
+    successful_tests = search_test_ranges()
     if not successful_tests:
         print("❌ Не удалось найти статьи. Проверьте диапазон дат.")
         return
@@ -325,13 +983,13 @@ def main():
     articles = test_case['articles']
     
     # Шаг 4: Тест извлечения данных
-    articles_info, titles_found, urls_found = test_data_extraction(articles)
+    articles_info, titles_found, urls_found = extract_test_data(articles)
     if not articles_info:
         print("❌ Не удалось извлечь данные из статей.")
         return
     
     # Шаг 5: Тест экспорта в CSV
-    export_ok = test_csv_export(articles_info)
+    export_ok = export_test_csv(articles_info)
     
     # Шаг 6: Проверка качества данных
     check_data_quality(articles_info)